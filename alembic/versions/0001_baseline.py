@@ -0,0 +1,117 @@
+"""Baseline schema: the tables as they were before migrations were introduced
+
+Databases created earlier from data/sql/init.sql or Base.metadata.create_all
+already have these tables; run `alembic stamp 0001` on them once, then
+`alembic upgrade head`. Later revisions add every column, index and table
+introduced since, so this revision is a frozen snapshot and must not import
+the live models.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False),
+        sa.Column("email", sa.String(100), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("full_name", sa.String(100)),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_superuser", sa.Boolean()),
+        sa.Column("preferences", sa.JSON()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("parent_id", sa.Integer(), sa.ForeignKey("categories.id")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+    op.create_index("ix_categories_name", "categories", ["name"])
+
+    op.create_table(
+        "items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id")),
+        sa.Column("price", sa.Float()),
+        sa.Column("currency", sa.String(3)),
+        sa.Column("rating", sa.Float()),
+        sa.Column("rating_count", sa.Integer()),
+        sa.Column("attributes", sa.JSON()),
+        sa.Column("is_available", sa.Integer()),
+        sa.Column("stock_quantity", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_items_id", "items", ["id"])
+    op.create_index("ix_items_name", "items", ["name"])
+
+    op.create_table(
+        "user_interactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("interaction_type", sa.String(20), nullable=False),
+        sa.Column("rating", sa.Integer()),
+        sa.Column("feedback", sa.Text()),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_user_interactions_id", "user_interactions", ["id"])
+    op.create_index("ix_user_interactions_user_id", "user_interactions", ["user_id"])
+    op.create_index("ix_user_interactions_item_id", "user_interactions", ["item_id"])
+
+    op.create_table(
+        "choices",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("query_text", sa.Text(), nullable=False),
+        sa.Column("processed_query", sa.Text()),
+        sa.Column("intent", sa.String(50)),
+        sa.Column("selected_items", sa.JSON()),
+        sa.Column("user_feedback", sa.Integer()),
+        sa.Column("feedback_text", sa.Text()),
+        sa.Column("algorithm_version", sa.String(20)),
+        sa.Column("processing_time_ms", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_choices_id", "choices", ["id"])
+
+    op.create_table(
+        "query_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("session_id", sa.String(100)),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("queries", sa.JSON()),
+        sa.Column("context", sa.JSON()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("expires_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_query_sessions_id", "query_sessions", ["id"])
+    op.create_index("ix_query_sessions_session_id", "query_sessions", ["session_id"], unique=True)
+
+
+def downgrade() -> None:
+    for name in ("query_sessions", "choices", "user_interactions", "items", "categories", "users"):
+        op.drop_table(name)
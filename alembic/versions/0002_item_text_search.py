@@ -0,0 +1,23 @@
+"""Item text search: tsvector + GIN and pg_trgm on PostgreSQL, FTS5 on SQLite
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+from app.core.text_search import create_text_search, drop_text_search
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_text_search(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_text_search(op.get_bind())
@@ -0,0 +1,54 @@
+"""Composite, partial and covering indexes on user_interactions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+POSITIVE_SIGNAL_SQL = "interaction_type IN ('like', 'purchase') AND rating >= 4"
+
+# name -> (columns, create_index keyword arguments)
+INDEXES = {
+    "ix_user_interactions_user_time": (
+        ["user_id", "timestamp"],
+        {"postgresql_include": ["item_id", "interaction_type", "rating"]},
+    ),
+    "ix_user_interactions_positive": (
+        ["user_id", "item_id", "rating"],
+        {"postgresql_where": sa.text(POSITIVE_SIGNAL_SQL), "sqlite_where": sa.text(POSITIVE_SIGNAL_SQL)},
+    ),
+    "ix_user_interactions_item_type_rating": (
+        ["item_id", "interaction_type", "rating"],
+        {},
+    ),
+    "ix_user_interactions_time": (
+        ["timestamp"],
+        {"postgresql_include": ["item_id", "interaction_type", "rating"]},
+    ),
+}
+
+
+def upgrade() -> None:
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; it avoids
+    # blocking writes to user_interactions while the indexes build
+    with op.get_context().autocommit_block():
+        for name, (columns, options) in INDEXES.items():
+            op.create_index(name, "user_interactions", columns, if_not_exists=True,
+                            postgresql_concurrently=concurrently, **options)
+
+
+def downgrade() -> None:
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name in reversed(list(INDEXES)):
+            op.drop_index(name, table_name="user_interactions", if_exists=True,
+                          postgresql_concurrently=concurrently)
@@ -0,0 +1,42 @@
+"""Item attributes as JSONB with a GIN (jsonb_path_ops) index on PostgreSQL
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # SQLite stores JSON as text and filters through json_extract; no index needed locally
+        return
+
+    # Tables created by create_all before the JSONB variant have a json column
+    data_type = bind.execute(sa.text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = 'items' AND column_name = 'attributes'"
+    )).scalar()
+    if data_type == "json":
+        op.execute("ALTER TABLE items ALTER COLUMN attributes TYPE jsonb USING attributes::jsonb")
+        op.execute("ALTER TABLE items ALTER COLUMN attributes SET DEFAULT '{}'::jsonb")
+
+    with op.get_context().autocommit_block():
+        op.create_index("ix_items_attributes", "items", ["attributes"], if_not_exists=True,
+                        postgresql_using="gin", postgresql_ops={"attributes": "jsonb_path_ops"},
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_items_attributes", table_name="items", if_exists=True, postgresql_concurrently=True)
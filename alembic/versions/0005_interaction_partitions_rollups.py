@@ -0,0 +1,100 @@
+"""Monthly partitions for user_interactions and daily interaction rollups
+
+On PostgreSQL, user_interactions becomes a table partitioned by RANGE on
+timestamp. It gets monthly partitions from its oldest event through a few
+months ahead, plus a DEFAULT partition for anything outside them. Rows are copied over, and the primary key becomes
+(id, timestamp) because a partition key must be part of every unique
+constraint. The copy holds locks on the table, so run it in a maintenance
+window. Later partitions are created by the interaction maintenance task.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.partitions import add_months, create_month_partitions, is_partitioned, month_start
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+TABLE = "user_interactions"
+MONTHS_AHEAD = 3
+
+# Indexes of user_interactions (model + 0003), rebuilt on the new parent table
+INDEXES = [
+    ("ix_user_interactions_id", ["id"], {}),
+    ("ix_user_interactions_user_id", ["user_id"], {}),
+    ("ix_user_interactions_item_id", ["item_id"], {}),
+    ("ix_user_interactions_user_time", ["user_id", "timestamp"],
+     {"postgresql_include": ["item_id", "interaction_type", "rating"]}),
+    ("ix_user_interactions_positive", ["user_id", "item_id", "rating"],
+     {"postgresql_where": sa.text("interaction_type IN ('like', 'purchase') AND rating >= 4")}),
+    ("ix_user_interactions_item_type_rating", ["item_id", "interaction_type", "rating"], {}),
+    ("ix_user_interactions_time", ["timestamp"],
+     {"postgresql_include": ["item_id", "interaction_type", "rating"]}),
+]
+
+
+def _rollup_table(name: str, key: str):
+    # Databases created by create_all at app startup may already have it
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(
+        name,
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column(key, sa.Integer(), primary_key=True),
+        sa.Column("interaction_type", sa.String(20), primary_key=True),
+        sa.Column("events", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(f"ix_{name}_{key.split('_')[0]}", name, [key, "day"])
+
+
+def _recreate_table(partitioned: bool):
+    """Copy user_interactions into a new (partitioned or plain) table of the same shape"""
+    bind = op.get_bind()
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_old")
+    op.execute(
+        f"CREATE TABLE {TABLE} (LIKE {TABLE}_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        + (" PARTITION BY RANGE (timestamp)" if partitioned else "")
+    )
+    if partitioned:
+        first = bind.execute(sa.text(f"SELECT min(timestamp) FROM {TABLE}_old")).scalar()
+        today = datetime.now(timezone.utc).date()
+        if first is not None and first.tzinfo is not None:
+            first = first.astimezone(timezone.utc)
+        create_month_partitions(bind, TABLE, first.date() if first else today,
+                                add_months(month_start(today), MONTHS_AHEAD))
+    op.execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_old")
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    op.execute(f"DROP TABLE {TABLE}_old CASCADE")
+    op.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY ({'id, timestamp' if partitioned else 'id'})")
+    for name, columns, options in INDEXES:
+        op.create_index(name, TABLE, columns, **options)
+
+
+def upgrade() -> None:
+    _rollup_table("item_interaction_daily", "item_id")
+
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or is_partitioned(bind, TABLE):
+        # Elsewhere retention deletes raw rows in batches instead of dropping partitions
+        return
+    op.execute(f"UPDATE {TABLE} SET timestamp = CURRENT_TIMESTAMP WHERE timestamp IS NULL")
+    op.execute(f"ALTER TABLE {TABLE} ALTER COLUMN timestamp SET NOT NULL")
+    _recreate_table(partitioned=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql" and is_partitioned(bind, TABLE):
+        _recreate_table(partitioned=False)
+    op.drop_table("item_interaction_daily")
@@ -0,0 +1,64 @@
+"""Summary tables for the analytics dashboard
+
+The tables are filled and refreshed by the analytics summary task. Its
+incremental per-day scans of choices seek on the new created_at index.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+TABLES = {
+    "analytics_totals": [
+        sa.Column("metric", sa.String(50), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    ],
+    "query_intent_daily": [
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("intent", sa.String(50), primary_key=True),
+        sa.Column("queries", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("processing_ms_sum", sa.BigInteger(), nullable=False, server_default="0"),
+    ],
+    "category_interaction_counts": [
+        sa.Column("category_id", sa.Integer(), primary_key=True),
+        sa.Column("events", sa.BigInteger(), nullable=False, server_default="0"),
+    ],
+    "recent_decisions": [
+        sa.Column("choice_id", sa.Integer(), primary_key=True),
+        sa.Column("query_text", sa.Text(), nullable=False),
+        sa.Column("intent", sa.String(50)),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+    ],
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, columns in TABLES.items():
+        # Databases created by create_all at app startup may already have them
+        if not inspector.has_table(name):
+            op.create_table(name, *columns)
+
+    # Built concurrently (outside a transaction) so query logging is not blocked
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index("ix_choices_created_at", "choices", ["created_at"], if_not_exists=True,
+                        postgresql_concurrently=concurrently)
+
+
+def downgrade() -> None:
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_choices_created_at", table_name="choices", if_exists=True,
+                      postgresql_concurrently=concurrently)
+    for name in reversed(list(TABLES)):
+        op.drop_table(name)
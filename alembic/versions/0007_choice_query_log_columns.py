@@ -0,0 +1,36 @@
+"""Query log columns on choices: per-stage timings, anonymous queries
+
+The write-behind query log stores per-stage pipeline timings and logs
+queries without a user, so choices gains stage_timings and user_id becomes
+nullable. Databases created by create_all after these model changes already
+have both.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {c["name"]: c for c in sa.inspect(op.get_bind()).get_columns("choices")}
+    # Batch mode recreates the table on SQLite, which cannot ALTER COLUMN
+    with op.batch_alter_table("choices") as batch:
+        if "stage_timings" not in columns:
+            batch.add_column(sa.Column("stage_timings", sa.JSON()))
+        if not columns["user_id"]["nullable"]:
+            batch.alter_column("user_id", existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM choices WHERE user_id IS NULL")
+    with op.batch_alter_table("choices") as batch:
+        batch.alter_column("user_id", existing_type=sa.Integer(), nullable=False)
+        batch.drop_column("stage_timings")
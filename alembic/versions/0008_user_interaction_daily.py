@@ -0,0 +1,60 @@
+"""Per-user daily interaction rollup, backfilled from the retained raw events
+
+User profiles are built from user_interaction_daily plus the raw events of
+days not rolled up yet. Days already in item_interaction_daily are
+summarized here from whatever raw events retention has kept.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+
+from datetime import datetime, time, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Databases created by create_all at app startup may already have it
+    if not sa.inspect(bind).has_table("user_interaction_daily"):
+        op.create_table(
+            "user_interaction_daily",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), primary_key=True),
+            sa.Column("item_id", sa.Integer(), primary_key=True),
+            sa.Column("interaction_type", sa.String(20), primary_key=True),
+            sa.Column("events", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index("ix_user_interaction_daily_user", "user_interaction_daily", ["user_id", "day"])
+
+    rolled_through = bind.execute(sa.text("SELECT max(day) FROM item_interaction_daily")).scalar()
+    if rolled_through is None:
+        return
+    if isinstance(rolled_through, str):
+        rolled_through = datetime.strptime(rolled_through, "%Y-%m-%d").date()
+    through = datetime.combine(rolled_through + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    if bind.dialect.name == "postgresql":
+        day = "CAST(timestamp AT TIME ZONE 'UTC' AS date)"
+    else:
+        # SQLite stores naive UTC text timestamps
+        day, through = "date(timestamp)", through.strftime("%Y-%m-%d %H:%M:%S")
+    op.execute(sa.text(
+        "INSERT INTO user_interaction_daily "
+        "(day, user_id, item_id, interaction_type, events, rating_sum, rating_count) "
+        f"SELECT {day}, user_id, item_id, interaction_type, count(*), coalesce(sum(rating), 0), count(rating) "
+        "FROM user_interactions WHERE timestamp < :through "
+        "GROUP BY 1, 2, 3, 4"
+    ).bindparams(through=through))
+
+
+def downgrade() -> None:
+    op.drop_table("user_interaction_daily")
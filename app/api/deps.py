@@ -1,17 +1,18 @@
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 
-from app.core.database import get_db, SessionLocal
+from app.core.database import get_async_db
 from app.core.config import settings
 from app.models.user import User
+from app.repositories.users import get_user_by_username
 
 security = HTTPBearer()
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
     """Get current authenticated user"""
@@ -33,13 +34,13 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await get_user_by_username(db, username)
     if user is None:
         raise credentials_exception
 
     return user
 
-def get_current_active_user(
+async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
     """Get current active user"""
@@ -47,8 +48,8 @@ def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_optional_user(
-    db: Session = Depends(get_db),
+async def get_optional_user(
+    db: AsyncSession = Depends(get_async_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[User]:
     """Get user if authenticated, None otherwise"""
@@ -65,7 +66,7 @@ def get_optional_user(
         if username is None:
             return None
 
-        user = db.query(User).filter(User.username == username).first()
+        user = await get_user_by_username(db, username)
         return user if user and user.is_active else None
 
     except JWTError:
@@ -0,0 +1,37 @@
+"""
+Opaque keyset-pagination cursors
+"""
+
+import base64
+import json
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    """Raised for malformed cursors or cursors issued for different filters"""
+
+
+def filters_fingerprint(filters: Dict[str, Any]) -> int:
+    raw = json.dumps(filters, sort_keys=True, ensure_ascii=False, default=str)
+    return zlib.crc32(raw.encode("utf-8"))
+
+
+def encode_cursor(key: Tuple[Optional[float], int], filters: Dict[str, Any]) -> str:
+    """Cursor for the row after `key` = (sort value, id) under these filters"""
+    payload = json.dumps({"k": key[0], "i": key[1], "f": filters_fingerprint(filters)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, filters: Dict[str, Any]) -> Tuple[Optional[float], int]:
+    """(sort value, id) from a cursor; the filters must match the ones it was issued for"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = (None if payload["k"] is None else float(payload["k"]), int(payload["i"]))
+        fingerprint = payload["f"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if fingerprint != filters_fingerprint(filters):
+        raise InvalidCursor("Cursor was issued for a different query")
+    return key
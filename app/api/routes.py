@@ -1,15 +1,19 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db, check_connections
+from app.core.database import (
+    get_async_db, get_read_db, check_connections, get_pool_stats, sql_stats, replica_router
+)
 from app.core.config import settings
-from app.models.user import User, UserInteraction
-from app.models.choice import Item, Category, Choice
+from app.models.user import User
 from app.models.schemas import (
     RecommendationRequest, RecommendationResponse,
+    BulkRecommendationRequest, SimilarDecisionRequest,
     NLPRequest, NLPResponse, HealthCheck,
     SearchRequest, SearchResponse,
     FeedbackRequest, FeedbackResponse
@@ -17,7 +21,15 @@ from app.models.schemas import (
 from app.services.nlp_service import nlp_processor
 from app.services.recommendation_service import recommendation_engine
 from app.services.vector_service import vector_service
+from app.services.cache_service import response_cache
+from app.services.interaction_aggregates import interaction_aggregates
+from app.services.bulk_recommendation_service import bulk_recommender
+from app.services.similar_decisions import similar_decisions
+from app.repositories import (
+    analytics as analytics_repo, choices as choice_repo, interactions as interaction_repo, items as item_repo
+)
 from app.api.deps import get_current_active_user, get_optional_user
+from app.api.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 router = APIRouter()
 
@@ -33,6 +45,21 @@ async def health_check():
         version="1.0.0"
     )
 
+@router.get("/health/db-pool", response_model=Dict[str, Any])
+async def db_pool_stats():
+    """Connection pool saturation and checkout wait metrics"""
+    return get_pool_stats()
+
+@router.get("/health/sql", response_model=Dict[str, Any])
+async def sql_statement_stats(limit: int = Query(20, ge=1, le=200)):
+    """Per-fingerprint SQL counts and latency histograms, slowest cumulative first"""
+    return sql_stats.get_stats(limit=limit)
+
+@router.get("/health/replicas", response_model=Dict[str, Any])
+async def replica_stats():
+    """Read-replica lag, availability and read routing counters"""
+    return replica_router.get_stats()
+
 @router.post("/nlp/process", response_model=Dict[str, Any])
 async def process_nlp(request: NLPRequest):
     """Process text with NLP pipeline"""
@@ -58,7 +85,8 @@ async def get_recommendations(
             user_id=user_id,
             query=request.query,
             filters=request.filters,
-            limit=request.limit
+            limit=request.limit,
+            diversity_lambda=request.diversity_lambda
         )
 
         return result
@@ -69,33 +97,50 @@ async def get_recommendations(
             detail=f"Recommendation failed: {str(e)}"
         )
 
+@router.post("/recommendations/bulk")
+async def get_bulk_recommendations(request: BulkRecommendationRequest):
+    """Top-N recommendations for many (user_id, query) pairs, streamed as NDJSON"""
+    pairs = [(r.user_id, r.query) for r in request.requests]
+
+    try:
+        # Catalog and interaction matrix are shared and reloaded off the event loop
+        recommender = await bulk_recommender.get()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Bulk recommendation failed: {str(e)}"
+        )
+
+    async def generate():
+        async for result in recommender.stream(pairs, request.limit):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @router.post("/recommendations/feedback", response_model=FeedbackResponse)
 async def submit_feedback(
     request: FeedbackRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user)
 ):
     """Submit feedback for recommendations"""
     try:
         # Update choice with feedback
-        choice = db.query(Choice).filter(Choice.id == request.query_id).first()
-        if choice:
-            choice.user_feedback = request.rating
-            choice.feedback_text = request.feedback_text
-            db.commit()
+        if request.query_id.isdigit():
+            await choice_repo.record_feedback(db, int(request.query_id), request.rating, request.feedback_text)
+            await db.commit()
 
         # Record individual item ratings
         if request.item_ratings and current_user:
-            for item_id, rating in request.item_ratings.items():
-                interaction = UserInteraction(
-                    user_id=current_user.id,
-                    item_id=int(item_id),
-                    interaction_type="rating",
-                    rating=rating,
-                    feedback=request.feedback_text
-                )
-                db.add(interaction)
-            db.commit()
+            item_ratings = {int(item_id): rating for item_id, rating in request.item_ratings.items()}
+            interaction_repo.add_ratings(db, current_user.id, item_ratings, request.feedback_text)
+            await db.commit()
+            replica_router.note_write(current_user.id)
+            # Fold the committed rows into the decayed aggregates now rather than at the next sync
+            await asyncio.get_running_loop().run_in_executor(None, interaction_aggregates.catch_up)
+
+            # Cached personalized responses are stale once the profile changes
+            response_cache.invalidate_user(current_user.id)
 
         return FeedbackResponse(
             success=True,
@@ -108,6 +153,50 @@ async def submit_feedback(
             detail=f"Feedback submission failed: {str(e)}"
         )
 
+@router.post("/decisions/similar", response_model=Dict[str, Any])
+async def find_similar_decisions(request: SimilarDecisionRequest):
+    """People in a similar situation: nearest historical decisions and their outcomes"""
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, similar_decisions.find, request.query, request.limit, request.category, request.factors
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Similar decision search failed: {str(e)}"
+        )
+
+@router.get("/decisions/{decision_id}/similar", response_model=Dict[str, Any])
+async def get_similar_decisions(
+    decision_id: int,
+    category: Optional[str] = None,
+    limit: int = Query(5, ge=1, le=50)
+):
+    """Historical decisions most similar to an existing one"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, similar_decisions.ensure_built)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Similar decision search failed: {str(e)}"
+        )
+
+    if decision_id not in similar_decisions.dataset.ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Decision not found")
+    return similar_decisions.similar_to(decision_id, limit, category)
+
+def parse_attributes(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Attribute filter from a JSON query parameter"""
+    if not raw:
+        return None
+    try:
+        attributes = json.loads(raw)
+    except ValueError:
+        attributes = None
+    if not isinstance(attributes, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="attributes must be a JSON object")
+    return attributes or None
+
 @router.get("/search", response_model=SearchResponse)
 async def search_items(
     query: Optional[str] = None,
@@ -116,60 +205,57 @@ async def search_items(
     max_price: Optional[float] = None,
     min_rating: Optional[float] = None,
     tags: Optional[List[str]] = None,
-    limit: int = 20,
-    offset: int = 0,
-    db: Session = Depends(get_db)
+    attributes: Optional[str] = Query(None, description='JSON object the item attributes must contain, e.g. {"brand": "Dell"}'),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces offset"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$",
+                       description="exact: COUNT(*); estimated: planner estimate or cached count; none: skip"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Search items with filters"""
+    filters = {
+        "query": query,
+        "category_id": category_id,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_rating": min_rating,
+        "attributes": parse_attributes(attributes)
+    }
     try:
-        # Build query
-        db_query = db.query(Item)
-        
-        if query:
-            # Simple text search
-            db_query = db_query.filter(
-                or_(
-                    Item.name.ilike(f"%{query}%"),
-                    Item.description.ilike(f"%{query}%")
-                )
-            )
-        
-        if category_id:
-            db_query = db_query.filter(Item.category_id == category_id)
-        
-        if min_price is not None:
-            db_query = db_query.filter(Item.price >= min_price)
-        
-        if max_price is not None:
-            db_query = db_query.filter(Item.price <= max_price)
-        
-        if min_rating is not None:
-            db_query = db_query.filter(Item.rating >= min_rating)
-        
-        # Get total count
-        total = db_query.count()
-        
-        # Apply pagination
-        items = db_query.offset(offset).limit(limit).all()
-        
-        # Build response
-        filters_applied = {
-            "query": query,
-            "category_id": category_id,
-            "min_price": min_price,
-            "max_price": max_price,
-            "min_rating": min_rating,
-            "tags": tags
-        }
-        
+        after = decode_cursor(cursor, filters) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        items, next_key = await item_repo.search_items(db, limit=limit, offset=offset, after=after, **filters)
+
+        total, estimated = None, False
+        if count == "exact":
+            total = await item_repo.count_items(db, **filters)
+        elif count == "estimated":
+            total, estimated = await item_repo.estimate_items(db, **filters), True
+            if total is None:
+                # No planner statistics on this backend: exact count, cached per filters and catalog version
+                cache_key = await response_cache.make_key(query or "", filters, 0, "search_count")
+
+                async def compute_total():
+                    return {"total": await item_repo.count_items(db, **filters)}
+
+                total = (await response_cache.get_or_compute(cache_key, compute_total))["total"]
+
         return SearchResponse(
             items=items,
             total=total,
+            total_estimated=estimated,
             limit=limit,
-            offset=offset,
-            filters_applied=filters_applied
+            offset=0 if after else offset,
+            next_cursor=encode_cursor(next_key, filters) if next_key else None,
+            filters_applied={**filters, "tags": tags}
         )
 
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -177,10 +263,10 @@ async def search_items(
         )
 
 @router.get("/categories", response_model=List[Dict[str, Any]])
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: AsyncSession = Depends(get_read_db)):
     """Get all categories"""
     try:
-        categories = db.query(Category).all()
+        categories = await item_repo.list_categories(db)
         return [
             {
                 "id": cat.id,
@@ -197,10 +283,10 @@ async def get_categories(db: Session = Depends(get_db)):
         )
 
 @router.get("/items/{item_id}", response_model=Dict[str, Any])
-async def get_item(item_id: int, db: Session = Depends(get_db)):
+async def get_item(item_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get item details"""
     try:
-        item = db.query(Item).filter(Item.id == item_id).first()
+        item = await item_repo.get_item(db, item_id)
         if not item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -230,6 +316,29 @@ async def get_item(item_id: int, db: Session = Depends(get_db)):
             detail=f"Failed to get item: {str(e)}"
         )
 
+@router.get("/analytics/stats", response_model=Dict[str, Any])
+async def get_analytics(
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Dashboard analytics from the precomputed summary tables"""
+    try:
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        return {
+            **await analytics_repo.get_totals(db),
+            "intents": await analytics_repo.intent_counts(db, since),
+            "categories": await analytics_repo.category_counts(db),
+            "recent": [
+                {"id": r[0], "query": r[1], "intent": r[2], "created_at": r[3]}
+                for r in await analytics_repo.recent_decisions(db, limit=10)
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Analytics failed: {str(e)}"
+        )
+
 @router.post("/vector/search", response_model=List[Dict[str, Any]])
 async def vector_search(
     query: str,
@@ -1,25 +1,154 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 import redis
 from pymilvus import connections, Collection, utility
 from loguru import logger
 from app.core.config import settings
+from app.core.sql_stats import SQLStatementStats
+from app.core.replicas import Replica, ReplicaRouter
+
+# Upper bounds (ms) of the checkout wait histogram buckets
+POOL_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+class PoolMetrics:
+    """Checkout wait time and timeout counters for a connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.histogram = [0] * (len(POOL_WAIT_BUCKETS_MS) + 1)
+
+    def observe(self, wait: float):
+        wait_ms = wait * 1000
+        bucket = next((i for i, bound in enumerate(POOL_WAIT_BUCKETS_MS) if wait_ms <= bound), len(POOL_WAIT_BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.histogram[bucket] += 1
+
+    def timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+class TimedCheckoutMixin:
+    """Records how long each checkout waited for a connection"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timed_out()
+            raise
+        self.metrics.observe(time.perf_counter() - start)
+        return connection
+
+class TimedQueuePool(TimedCheckoutMixin, QueuePool):
+    metrics = pool_metrics
+
+class TimedAsyncQueuePool(TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+def async_database_url(url: str) -> str:
+    """The same database through its asyncio driver (asyncpg / aiosqlite)"""
+    scheme, rest = url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    if backend in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+def _engine_options(url: str, poolclass=TimedQueuePool) -> dict:
+    if url.startswith("sqlite"):
+        # One shared connection: in-memory SQLite databases are per connection
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
 
 # PostgreSQL
 engine = create_engine(
     settings.DATABASE_URL,
-    poolclass=StaticPool,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=True
+    echo=settings.SQL_ECHO,
+    **_engine_options(settings.DATABASE_URL)
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for request handlers; the sync engine stays for startup DDL,
+# scripts and batch jobs that run in executor threads
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    echo=settings.SQL_ECHO,
+    **_engine_options(settings.DATABASE_URL, TimedAsyncQueuePool)
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+def _replica(index: int, url: str) -> Replica:
+    """Async engine for one read replica, with its own pool metrics"""
+    poolclass = type(f"TimedReplicaPool{index}", (TimedAsyncQueuePool,), {"metrics": PoolMetrics()})
+    replica_engine = create_async_engine(
+        async_database_url(url),
+        echo=settings.SQL_ECHO,
+        **_engine_options(url, poolclass)
+    )
+    sessions = async_sessionmaker(replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    return Replica(f"replica{index}", replica_engine, sessions)
+
+# Read replicas for read-only request paths; the primary serves all writes
+# and any read while no replica is within the lag limit
+replica_router = ReplicaRouter(
+    AsyncSessionLocal,
+    [_replica(i, url.strip()) for i, url in enumerate(settings.DATABASE_REPLICA_URLS.split(",")) if url.strip()],
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_CHECK_INTERVAL
+)
+
+# Statement fingerprints and latency for both engines
+sql_stats = SQLStatementStats(
+    sample_rate=settings.SQL_LOG_SAMPLE_RATE,
+    slow_ms=settings.SQL_SLOW_QUERY_MS,
+    max_fingerprints=settings.SQL_STATS_MAX_FINGERPRINTS,
+    log_parameters=settings.SQL_LOG_PARAMETERS
+)
+if settings.SQL_STATS_ENABLED:
+    sql_stats.attach(engine, "sync")
+    sql_stats.attach(async_engine.sync_engine, "async")
+    for replica in replica_router.replicas:
+        sql_stats.attach(replica.engine.sync_engine, replica.name)
+
 Base = declarative_base()
 
 # Redis
 redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+# Binary-safe client for packed NumPy state
+redis_bytes_client = redis.from_url(settings.REDIS_URL)
 
 # Milvus
 def connect_milvus():
@@ -42,9 +171,53 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+async def get_read_db():
+    """Session for read-only handlers: a replica within the lag limit, else the primary"""
+    async with replica_router.read_session() as session:
+        yield session
+
 def get_redis():
     return redis_client
 
+def _pool_stats(pool, metrics: PoolMetrics) -> dict:
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    in_use = pool.checkedout()
+    checkouts = metrics.checkouts
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": in_use,
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "saturation": round(in_use / capacity, 3) if capacity else 0.0,
+        "checkouts": checkouts,
+        "timeouts": metrics.timeouts,
+        "avg_wait_ms": round(metrics.total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+        "max_wait_ms": round(metrics.max_wait * 1000, 3),
+        "wait_histogram_ms": dict(zip(
+            [f"le_{bound}" for bound in POOL_WAIT_BUCKETS_MS] + ["inf"], metrics.histogram
+        ))
+    }
+
+def get_pool_stats() -> dict:
+    """Pool gauges (size, in use, overflow, saturation) and checkout wait metrics"""
+    stats = {
+        "async": _pool_stats(async_engine.pool, async_pool_metrics),
+        "sync": _pool_stats(engine.pool, pool_metrics)
+    }
+    for replica in replica_router.replicas:
+        pool = replica.engine.pool
+        stats[replica.name] = _pool_stats(pool, getattr(pool, "metrics", PoolMetrics()))
+    return stats
+
 def check_connections():
     """Check all database connections"""
     status = {
@@ -56,7 +229,7 @@ def check_connections():
     # Check PostgreSQL
     try:
         with engine.connect() as conn:
-            conn.execute("SELECT 1")
+            conn.execute(text("SELECT 1"))
         status["postgresql"] = True
         logger.info("PostgreSQL connection OK")
     except Exception as e:
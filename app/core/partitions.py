@@ -0,0 +1,85 @@
+"""
+Monthly range partitions for PostgreSQL tables partitioned on a timestamp,
+plus a DEFAULT partition for rows outside every monthly range
+"""
+
+from datetime import date
+from typing import List, Tuple
+from sqlalchemy import text
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def is_partitioned(connection, table: str) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"), {"table": table}
+    ).first() is not None
+
+
+def create_month_partitions(connection, table: str, first: date, last: date, column: str = "timestamp") -> List[str]:
+    """Create the monthly partitions covering [first, last] and the DEFAULT
+    partition; existing ones are kept. Bounds are UTC month starts.
+
+    Rows of a new month that already landed in the DEFAULT partition (a clock-skewed
+    client, a month created late) are moved into the new partition before it is
+    attached, since PostgreSQL refuses a range that the DEFAULT partition overlaps.
+    """
+    default = default_partition_name(table)
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {default} PARTITION OF {table} DEFAULT"))
+
+    created = []
+    month = month_start(first)
+    while month <= last:
+        name = partition_name(table, month)
+        lower, upper = f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+        exists = connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+        if not exists:
+            connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            connection.execute(text(
+                f"WITH moved AS (DELETE FROM {default} WHERE {column} >= :lower AND {column} < :upper RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ), {"lower": lower, "upper": upper})
+            connection.execute(text(
+                f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+            ))
+        created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def list_partitions(connection, table: str) -> List[Tuple[str, date]]:
+    """(partition name, month) of the monthly partitions, oldest first (DEFAULT excluded)"""
+    rows = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": table}).scalars().all()
+    prefix = f"{table}_p"
+    partitions = []
+    for name in rows:
+        suffix = name[len(prefix):] if name.startswith(prefix) else ""
+        if len(suffix) == 6 and suffix.isdigit():
+            partitions.append((name, date(int(suffix[:4]), int(suffix[4:]), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def drop_partition(connection, table: str, name: str):
+    """Detach and drop one partition (instant, unlike DELETE of its rows)"""
+    connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    connection.execute(text(f"DROP TABLE {name}"))
@@ -0,0 +1,172 @@
+"""
+Read-replica routing for read-only sessions
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, Hashable, List, Optional
+from sqlalchemy import event, text
+from loguru import logger
+
+# Seconds the replica is behind its primary; 0 once it has replayed all WAL it
+# received (an idle primary would otherwise look like a growing lag)
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    """One read replica: its async engine, session factory and last lag check"""
+
+    def __init__(self, name: str, engine, sessionmaker):
+        self.name = name
+        self.engine = engine
+        self.sessionmaker = sessionmaker
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.reads = 0
+
+        # A dropped connection takes the replica out of rotation until the next check
+        event.listen(engine.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect:
+            self.healthy = False
+            self.error = str(context.original_exception)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "checked_ago_seconds": round(time.monotonic() - self.checked_at, 3) if self.checked_at else None,
+            "reads": self.reads,
+            "error": self.error
+        }
+
+
+class ReplicaRouter:
+    """Routes read-only sessions to replicas, everything else to the primary.
+
+    A background task measures each replica's replay lag; a replica serves
+    reads only while it is reachable, its lag is within `max_lag` seconds and
+    the measurement is fresh. Otherwise reads fall back to the primary.
+    Keys passed to `note_write` (e.g. a user id) read from the primary for a
+    short while after a write, so users see their own changes; this pinning is
+    per process.
+    """
+
+    def __init__(self,
+                 primary_sessionmaker,
+                 replicas: List[Replica],
+                 max_lag: float,
+                 check_interval: float):
+        self.primary = primary_sessionmaker
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.pin_seconds = max_lag + check_interval
+        self._pinned: Dict[Hashable, float] = {}
+        self._cycle = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"replica_reads": 0, "primary_reads": 0, "fallbacks": 0, "pinned_reads": 0}
+
+    async def start(self):
+        if self.replicas and self._task is None:
+            await self.check()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    async def _measure(self, replica: Replica) -> float:
+        try:
+            async with replica.engine.connect() as conn:
+                if conn.dialect.name != "postgresql":
+                    await conn.execute(text("SELECT 1"))
+                    return 0.0
+                lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+        except BaseException:
+            # Close pooled and half-open connections of an unreachable replica
+            await replica.engine.dispose()
+            raise
+        # No transaction replayed yet: lag unknown
+        return float("inf") if lag is None else float(lag)
+
+    async def check(self):
+        """Measure reachability and replay lag of every replica"""
+        for replica in self.replicas:
+            try:
+                replica.lag = await asyncio.wait_for(self._measure(replica), timeout=self.check_interval)
+                replica.healthy = True
+                replica.error = None
+            except Exception as e:
+                if replica.healthy:
+                    logger.warning(f"Replica {replica.name} taken out of rotation: {e}")
+                replica.healthy = False
+                replica.error = str(e) or type(e).__name__
+            replica.checked_at = time.monotonic()
+
+    def available(self) -> List[Replica]:
+        """Replicas currently allowed to serve reads"""
+        now = time.monotonic()
+        return [
+            r for r in self.replicas
+            if r.healthy and r.lag is not None and r.lag <= self.max_lag
+            and r.checked_at is not None and now - r.checked_at <= 3 * self.check_interval
+        ]
+
+    def note_write(self, key: Hashable):
+        """Send reads for `key` to the primary until replicas have caught up"""
+        now = time.monotonic()
+        if len(self._pinned) > 10000:
+            self._pinned = {k: until for k, until in self._pinned.items() if until > now}
+        self._pinned[key] = now + self.pin_seconds
+
+    def read_sessionmaker(self, key: Optional[Hashable] = None):
+        """Session factory for a read-only unit of work"""
+        if key is not None and self._pinned.get(key, 0) > time.monotonic():
+            self.stats["pinned_reads"] += 1
+            self.stats["primary_reads"] += 1
+            return self.primary
+
+        candidates = self.available()
+        if not candidates:
+            if self.replicas:
+                self.stats["fallbacks"] += 1
+            self.stats["primary_reads"] += 1
+            return self.primary
+
+        replica = candidates[next(self._cycle) % len(candidates)]
+        replica.reads += 1
+        self.stats["replica_reads"] += 1
+        return replica.sessionmaker
+
+    def read_session(self, key: Optional[Hashable] = None):
+        return self.read_sessionmaker(key)()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "max_lag_seconds": self.max_lag,
+            "available": [r.name for r in self.available()],
+            "replicas": [r.get_stats() for r in self.replicas]
+        }
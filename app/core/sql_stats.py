@@ -0,0 +1,178 @@
+"""
+Low-overhead SQL statement statistics: fingerprints, counts and latency
+histograms, with full statement text logged only for sampled or slow queries
+"""
+
+import random
+import re
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from loguru import logger
+from sqlalchemy import event
+
+# Upper bounds (ms) of the statement latency histogram buckets
+SQL_LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+MAX_LOGGED_PARAMS_CHARS = 500
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Statement shape with literals, placeholders and IN lists collapsed to `?`"""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def fingerprint_id(shape: str) -> str:
+    return f"{zlib.crc32(shape.encode('utf-8')):08x}"
+
+
+class _StatementStats:
+    __slots__ = ("shape", "count", "errors", "total", "max", "histogram")
+
+    def __init__(self, shape: str):
+        self.shape = shape
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(SQL_LATENCY_BUCKETS_MS) + 1)
+
+
+class SQLStatementStats:
+    """Aggregates statement timings per fingerprint for engines it is attached to.
+
+    Only counters are updated per query; the statement text is logged for a
+    `sample_rate` fraction of queries and for every query slower than
+    `slow_ms`. Bound parameters can hold user data (emails, query text), so
+    they are logged only with `log_parameters`.
+    """
+
+    def __init__(self,
+                 sample_rate: float = 0.0,
+                 slow_ms: float = 500.0,
+                 max_fingerprints: int = 500,
+                 log_parameters: bool = False):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.max_fingerprints = max_fingerprints
+        self.log_parameters = log_parameters
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._statements: Dict[str, _StatementStats] = {}
+            self.queries = 0
+            self.slow_queries = 0
+            self.sampled = 0
+            self.untracked = 0
+
+    def attach(self, engine, name: str = "sync"):
+        """Listen to cursor executions on a sync Engine (use `.sync_engine` for async engines)"""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute(name))
+        event.listen(engine, "handle_error", self._on_error)
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sql_stats_start", []).append(time.perf_counter())
+
+    def _after_execute(self, name: str):
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("sql_stats_start")
+            if not starts:
+                return
+            self.observe(statement, time.perf_counter() - starts.pop(), parameters, name)
+        return listener
+
+    def _on_error(self, context):
+        starts = context.connection.info.get("sql_stats_start") if context.connection is not None else None
+        if not starts:
+            return
+        starts.pop()
+        shape = fingerprint(context.statement or "")
+        with self._lock:
+            stats = self._entry(shape)
+            if stats is not None:
+                stats.errors += 1
+
+    def _entry(self, shape: str) -> Optional[_StatementStats]:
+        """Stats for a shape, created while under `max_fingerprints` (lock held)"""
+        stats = self._statements.get(shape)
+        if stats is None:
+            if len(self._statements) >= self.max_fingerprints:
+                self.untracked += 1
+                return None
+            stats = self._statements[shape] = _StatementStats(shape)
+        return stats
+
+    def observe(self, statement: str, duration: float, parameters: Any = None, engine: str = "sync"):
+        """Record one execution and log its text if sampled or slow"""
+        shape = fingerprint(statement)
+        duration_ms = duration * 1000
+        bucket = next((i for i, bound in enumerate(SQL_LATENCY_BUCKETS_MS) if duration_ms <= bound),
+                      len(SQL_LATENCY_BUCKETS_MS))
+        slow = self.slow_ms > 0 and duration_ms >= self.slow_ms
+        sampled = not slow and self.sample_rate > 0 and random.random() < self.sample_rate
+
+        with self._lock:
+            self.queries += 1
+            stats = self._entry(shape)
+            if stats is not None:
+                stats.count += 1
+                stats.total += duration
+                stats.max = max(stats.max, duration)
+                stats.histogram[bucket] += 1
+            if slow:
+                self.slow_queries += 1
+            elif sampled:
+                self.sampled += 1
+
+        if slow or sampled:
+            message = (f"{'Slow' if slow else 'Sampled'} SQL [{engine}] {fingerprint_id(shape)} "
+                       f"{duration_ms:.1f} ms: {statement}")
+            if self.log_parameters:
+                params = repr(parameters)
+                if len(params) > MAX_LOGGED_PARAMS_CHARS:
+                    params = params[:MAX_LOGGED_PARAMS_CHARS] + "..."
+                message += f" | params={params}"
+            (logger.warning if slow else logger.info)(message)
+
+    def get_stats(self, limit: Optional[int] = 20) -> Dict[str, Any]:
+        """Totals plus the statements with the highest cumulative time"""
+        with self._lock:
+            statements = sorted(self._statements.values(), key=lambda s: s.total, reverse=True)
+            top = [{
+                "fingerprint": fingerprint_id(s.shape),
+                "statement": s.shape,
+                "count": s.count,
+                "errors": s.errors,
+                "total_ms": round(s.total * 1000, 3),
+                "avg_ms": round(s.total / s.count * 1000, 3) if s.count else 0.0,
+                "max_ms": round(s.max * 1000, 3),
+                "latency_histogram_ms": dict(zip(
+                    [f"le_{bound}" for bound in SQL_LATENCY_BUCKETS_MS] + ["inf"], s.histogram
+                ))
+            } for s in statements[:limit]]
+            return {
+                "queries": self.queries,
+                "slow_queries": self.slow_queries,
+                "sampled": self.sampled,
+                "fingerprints": len(self._statements),
+                "untracked": self.untracked,
+                "sample_rate": self.sample_rate,
+                "slow_ms": self.slow_ms,
+                "statements": top
+            }
@@ -0,0 +1,116 @@
+"""
+Item text search: PostgreSQL tsvector (Russian) + pg_trgm, SQLite FTS5 locally
+"""
+
+import re
+from typing import Any, Optional, Tuple
+from sqlalchemy import column, func, literal, literal_column, or_, table, text
+from loguru import logger
+
+from app.models.choice import Item
+
+TS_CONFIG = "russian"
+FTS_TABLE = "items_fts"
+# Name matches outrank description matches
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""ALTER TABLE items ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('{TS_CONFIG}', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS idx_items_search_vector ON items USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS idx_items_name_trgm ON items USING GIN (name gin_trgm_ops)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS idx_items_name_trgm",
+    "DROP INDEX IF EXISTS idx_items_search_vector",
+    "ALTER TABLE items DROP COLUMN IF EXISTS search_vector",
+]
+
+# External-content FTS5 table kept in sync with items by triggers
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, content='items', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF name, description ON items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS items_fts_au",
+    "DROP TRIGGER IF EXISTS items_fts_ad",
+    "DROP TRIGGER IF EXISTS items_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def create_text_search(connection) -> bool:
+    """Create the search column/indexes (or FTS table) for the connection's dialect; idempotent"""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.execute(text(statement))
+        return True
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first()
+        for statement in SQLITE_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        return True
+    logger.warning(f"No text search index for dialect {dialect}; search falls back to LIKE")
+    return False
+
+
+def drop_text_search(connection):
+    statements = {"postgresql": POSTGRES_DROP, "sqlite": SQLITE_DROP}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def fts5_query(query: str) -> Optional[str]:
+    """FTS5 MATCH expression: every word as a quoted prefix term, all required"""
+    tokens = _TOKEN.findall(query.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def apply_text_search(statement, dialect: str, query: str) -> Tuple[Any, Any]:
+    """Restrict an items select to matches of `query`; returns (statement, relevance expression)"""
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{TS_CONFIG}'"), query)
+        search_vector = literal_column("items.search_vector")
+        # Full-text match on name+description, or fuzzy (trigram) match on the name
+        statement = statement.where(or_(search_vector.op("@@")(tsquery), Item.name.op("%")(query)))
+        return statement, func.ts_rank_cd(search_vector, tsquery) + func.similarity(Item.name, query)
+
+    if dialect == "sqlite":
+        match = fts5_query(query)
+        if match is None:
+            return statement.where(literal(False)), literal(0.0)
+        fts = table(FTS_TABLE, column("rowid"))
+        statement = statement.join(fts, fts.c.rowid == Item.id).where(literal_column(FTS_TABLE).op("MATCH")(match))
+        # bm25 is lower for better matches
+        return statement, -func.bm25(literal_column(FTS_TABLE), NAME_WEIGHT, DESCRIPTION_WEIGHT)
+
+    pattern = f"%{query}%"
+    return statement.where(or_(Item.name.ilike(pattern), Item.description.ilike(pattern))), literal(0.0)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Offline bulk recommendation job for email and push campaigns
+
+Reads (user_id, query) pairs from a CSV or NDJSON file and writes top-N
+recommendations per pair as NDJSON or Parquet.
+
+Usage:
+    python -m app.jobs.bulk_recommendations pairs.csv out.ndjson --limit 10
+    python -m app.jobs.bulk_recommendations pairs.ndjson out.parquet --format parquet
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from typing import List, Optional, Tuple
+from loguru import logger
+
+from app.services.bulk_recommendation_service import BulkRecommender
+
+
+def read_pairs(path: str) -> List[Tuple[Optional[int], str]]:
+    """Read (user_id, query) pairs from CSV (with a header) or NDJSON"""
+    pairs = []
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+
+        for row in rows:
+            user_id = row.get("user_id")
+            user_id = int(user_id) if user_id not in (None, "") else None
+            pairs.append((user_id, row["query"]))
+    return pairs
+
+
+async def run(input_path: str, output_path: str, output_format: str, limit: int, batch_size: int):
+    pairs = read_pairs(input_path)
+    logger.info(f"Loaded {len(pairs)} pairs from {input_path}")
+
+    recommender = BulkRecommender(batch_size=batch_size)
+    start = time.perf_counter()
+
+    if output_format == "ndjson":
+        with open(output_path, "w", encoding="utf-8") as out:
+            async for result in recommender.stream(pairs, limit):
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    else:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            logger.error("Parquet output requires pyarrow (pip install pyarrow)")
+            sys.exit(1)
+
+        # One row per (pair, recommended item), written batch by batch
+        writer = None
+        rows = []
+        try:
+            async for result in recommender.stream(pairs, limit):
+                for rank, rec in enumerate(result["recommendations"], start=1):
+                    rows.append({
+                        "user_id": result["user_id"],
+                        "query": result["query"],
+                        "rank": rank,
+                        "item_id": rec["item_id"],
+                        "name": rec["name"],
+                        "score": rec["score"]
+                    })
+                if len(rows) >= batch_size * limit:
+                    table = pa.Table.from_pylist(rows)
+                    writer = writer or pq.ParquetWriter(output_path, table.schema)
+                    writer.write_table(table)
+                    rows = []
+            if rows:
+                table = pa.Table.from_pylist(rows)
+                writer = writer or pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer:
+                writer.close()
+
+    seconds = time.perf_counter() - start
+    logger.info(
+        f"Wrote {recommender.stats['pairs']} results to {output_path} "
+        f"({recommender.stats['pairs'] / seconds if seconds else 0.0:.1f} pairs/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk recommendations for many users/queries")
+    parser.add_argument("input", help="CSV or NDJSON file with user_id and query columns")
+    parser.add_argument("output", help="Output file path")
+    parser.add_argument("--format", choices=["ndjson", "parquet"], default="ndjson")
+    parser.add_argument("--limit", type=int, default=10, help="Recommendations per pair")
+    parser.add_argument("--batch-size", type=int, default=128)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.input, args.output, args.format, args.limit, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
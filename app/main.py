@@ -3,13 +3,24 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import time
 import uuid
 from loguru import logger
 
 from app.core.config import settings
-from app.core.database import Base, engine, check_connections, get_db
+from app.core.database import Base, engine, async_engine, check_connections, replica_router
+from app.core.text_search import create_text_search
+from app.repositories import analytics as analytics_repo, choices as choice_repo
 from app.api.routes import router as api_router
+from app.services.query_log import query_log_writer
+from app.services.popularity_service import popularity_service
+from app.services.interaction_rollups import interaction_maintenance
+from app.services.analytics_summary import analytics_summary
+from app.services.item_features import item_features
+from app.services.interaction_aggregates import interaction_aggregates
+from app.services.bandit_service import contextual_bandit
+from app.services.similar_decisions import similar_decisions
 from sqlalchemy.orm import Session
 
 # Safer imports with fallbacks
@@ -21,6 +32,12 @@ except ImportError:
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+# Text search index (tsvector/trigram on PostgreSQL, FTS5 on SQLite); managed by alembic in production
+try:
+    with engine.begin() as conn:
+        create_text_search(conn)
+except Exception as e:
+    logger.error(f"Failed to create text search index: {e}")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -100,6 +117,24 @@ async def log_requests(request: Request, call_next):
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
 # Compatibility endpoints for existing frontend
+async def _bandit_order(options: list, payload: dict, user_id) -> tuple:
+    """Reorder candidate options with the contextual bandit; keep the order on failure.
+    Ranking reads arm state from Redis and stores the decision token, so it runs in an executor."""
+    try:
+        features = {
+            "decision_type": payload.get("decisionType"),
+            "daypart": time.localtime().tm_hour // 6,
+            "known_user": user_id is not None
+        }
+        token, ranked = await asyncio.get_running_loop().run_in_executor(
+            None, contextual_bandit.rank, [o["arm"] for o in options], features
+        )
+        by_arm = {o["arm"]: o for o in options}
+        return token, [by_arm[r["arm"]] for r in ranked]
+    except Exception as e:
+        logger.warning(f"Bandit ranking skipped: {e}")
+        return None, options
+
 @app.post("/api/decisions/simple")
 async def decisions_simple(payload: dict = Body(...)):
     """Compatibility endpoint for index.html -> app-new.js.
@@ -107,6 +142,7 @@ async def decisions_simple(payload: dict = Body(...)):
     Returns minimal structure used by the frontend."""
     question = payload.get("question") or ""
     user_id = payload.get("userId")
+    user_id = int(user_id) if str(user_id).isdigit() else None
 
     if not question:
         return JSONResponse(status_code=400, content={"detail": "question is required"})
@@ -115,7 +151,7 @@ async def decisions_simple(payload: dict = Body(...)):
     if recommendation_engine:
         try:
             result = await recommendation_engine.get_recommendations(
-                user_id=int(user_id) if str(user_id).isdigit() else None,
+                user_id=user_id,
                 query=question,
                 filters={},
                 limit=5,
@@ -123,48 +159,96 @@ async def decisions_simple(payload: dict = Body(...)):
             
             # Adapt to frontend expected shape
             recs = result.get("recommendations", [])
-            top = recs[0] if recs else None
+            options = [
+                {
+                    "arm": str(r.get("item_id")),
+                    "name": r.get("item", {}).get("name"),
+                    "confidence": r.get("confidence", 0.6)
+                }
+                for r in recs
+            ]
+            token, options = await _bandit_order(options, payload, user_id)
+            top = options[0] if options else None
             response = {
-                "recommendation": top.get("item", {}).get("name") if top else "Подходящий вариант не найден",
-                "confidence": top.get("confidence", 0.6) if top else 0.5,
+                "recommendation": top["name"] if top else "Подходящий вариант не найден",
+                "confidence": top["confidence"] if top else 0.5,
                 "reasoning": result.get("explanation", "Рекомендация основана на анализе запроса и предпочтений."),
-                "alternatives": [r.get("item", {}).get("name") for r in recs[1:4]] if len(recs) > 1 else []
+                "alternatives": [o["name"] for o in options[1:4]],
+                "decisionId": token,
+                "options": [o["arm"] for o in options]
             }
             return response
         except Exception as e:
             logger.warning(f"Recommendation engine failed: {e}")
     
-    # Fallback: simple rule-based responses
-    import random
-    fallback_items = [
-        "Ноутбук ASUS", "iPhone 15", "Samsung Galaxy", "MacBook Pro",
-        "Квартира в центре", "Дом за городом", "Отпуск в Сочи", "Поездка в Европу"
-    ]
-    
-    alternatives = random.sample(fallback_items, min(3, len(fallback_items)))
-    confidence = random.uniform(0.6, 0.9)
+    # Fallback: precomputed popular items, hard-coded list only before the first refresh
+    popular = popularity_service.get_items(limit=4)
+    token = None
+    if popular:
+        options = [{"arm": str(item["item_id"]), "name": item["name"]} for item in popular]
+        token, options = await _bandit_order(options, payload, user_id)
+        alternatives = [o["name"] for o in options]
+        confidence = 0.6
+    else:
+        import random
+        fallback_items = [
+            "Ноутбук ASUS", "iPhone 15", "Samsung Galaxy", "MacBook Pro",
+            "Квартира в центре", "Дом за городом", "Отпуск в Сочи", "Поездка в Европу"
+        ]
+        options = []
+        alternatives = random.sample(fallback_items, min(3, len(fallback_items)))
+        confidence = random.uniform(0.6, 0.9)
     
     response = {
         "recommendation": f"На основе анализа '{question}', рекомендую рассмотреть {alternatives[0]}",
         "confidence": confidence,
         "reasoning": f"Анализ запроса показывает, что {alternatives[0]} лучше всего подходит под ваши критерии.",
-        "alternatives": alternatives[1:] if len(alternatives) > 1 else []
+        "alternatives": alternatives[1:] if len(alternatives) > 1 else [],
+        "decisionId": token,
+        "options": [o["arm"] for o in options]
     }
     return response
 
+@app.post("/api/decisions/feedback")
+async def decisions_feedback(payload: dict = Body(...)):
+    """Report the outcome of a served decision to the bandit.
+    Expects: { decisionId: str, option: str, reward: float in [0, 1] }"""
+    token = payload.get("decisionId")
+    option = payload.get("option")
+    try:
+        reward = float(payload.get("reward"))
+    except (TypeError, ValueError):
+        reward = None
+
+    if not token or option is None or reward is None or not 0.0 <= reward <= 1.0:
+        return JSONResponse(
+            status_code=400,
+            content={"detail": "decisionId, option and reward in [0, 1] are required"}
+        )
+
+    try:
+        updated = await asyncio.get_running_loop().run_in_executor(
+            None, contextual_bandit.update, token, str(option), reward
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
+    except Exception as e:
+        logger.error(f"Bandit update failed: {e}")
+        return JSONResponse(status_code=503, content={"detail": "Feedback could not be recorded"})
+
+    if not updated:
+        return JSONResponse(status_code=404, content={"detail": "Unknown, expired or already rewarded decisionId"})
+    return {"status": "recorded"}
+
 @app.get("/api/decisions/recent")
 async def decisions_recent():
     """Return a simple recent list for the dashboard cards."""
     try:
-        db = next(get_db())
-        rows = db.execute(
-            """
-            SELECT id, query_text, intent, created_at
-            FROM choices
-            ORDER BY created_at DESC
-            LIMIT 5
-            """
-        ).fetchall()
+        # Precomputed by the analytics summary; the live query only until its first refresh
+        async with replica_router.read_session() as db:
+            rows = await analytics_repo.recent_decisions(db, limit=5)
+            if not rows:
+                rows = await choice_repo.recent_choices(db, limit=5)
         items = [
             {
                 "title": r[1],
@@ -216,12 +300,33 @@ async def startup_event():
                 logger.warning(f"  - {service}: NOT CONNECTED")
     else:
         logger.info("All services connected successfully")
+    await replica_router.start()
+    await query_log_writer.start()
+    await interaction_maintenance.start()
+    await popularity_service.start()
+    await analytics_summary.start()
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, item_features.refresh)
+    except Exception as e:
+        logger.warning(f"Item feature matrix not built at startup: {e}")
+    await interaction_aggregates.start()
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, similar_decisions.ensure_built)
+    except Exception as e:
+        logger.warning(f"Similar decision index not built at startup: {e}")
     logger.info("System startup completed")
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down SmartChoice AI...")
+    await interaction_aggregates.stop()
+    await analytics_summary.stop()
+    await popularity_service.stop()
+    await interaction_maintenance.stop()
+    await query_log_writer.stop()
+    await replica_router.stop()
+    await async_engine.dispose()
     logger.info("Shutdown completed")
 
 if __name__ == "__main__":
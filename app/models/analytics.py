@@ -0,0 +1,35 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, Integer, String, Text
+from app.core.database import Base
+
+class AnalyticsTotal(Base):
+    """Precomputed dashboard counter, one row per metric"""
+    __tablename__ = "analytics_totals"
+
+    metric = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+class QueryIntentDaily(Base):
+    """Logged queries per UTC day and detected intent"""
+    __tablename__ = "query_intent_daily"
+
+    day = Column(Date, primary_key=True)
+    intent = Column(String(50), primary_key=True)
+    queries = Column(Integer, nullable=False, default=0)
+    processing_ms_sum = Column(BigInteger, nullable=False, default=0)
+
+class CategoryInteractionCount(Base):
+    """All-time interaction count per item category"""
+    __tablename__ = "category_interaction_counts"
+
+    category_id = Column(Integer, primary_key=True)
+    events = Column(BigInteger, nullable=False, default=0)
+
+class RecentDecision(Base):
+    """Copy of the newest logged queries for the dashboard's recent list"""
+    __tablename__ = "recent_decisions"
+
+    choice_id = Column(Integer, primary_key=True)
+    query_text = Column(Text, nullable=False)
+    intent = Column(String(50))
+    created_at = Column(DateTime(timezone=True))
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Float, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -18,6 +19,11 @@ class Category(Base):
 
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        # Containment (@>) lookups on attributes; jsonb_path_ops is smaller and faster for @> only
+        Index("ix_items_attributes", "attributes", postgresql_using="gin",
+              postgresql_ops={"attributes": "jsonb_path_ops"}).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False, index=True)
@@ -30,8 +36,8 @@ class Item(Base):
     rating = Column(Float, default=0.0)
     rating_count = Column(Integer, default=0)
 
-    # JSON attributes for flexible data
-    attributes = Column(JSON, default={})
+    # JSON attributes for flexible data (JSONB on PostgreSQL)
+    attributes = Column(JSON().with_variant(JSONB(), "postgresql"), default={})
 
     # Availability
     is_available = Column(Integer, default=1)
@@ -47,7 +53,7 @@ class Choice(Base):
     __tablename__ = "choices"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))  # NULL for anonymous queries
 
     # Query information
     query_text = Column(Text, nullable=False)
@@ -62,8 +68,9 @@ class Choice(Base):
     # Metadata
     algorithm_version = Column(String(20))
     processing_time_ms = Column(Integer)
+    stage_timings = Column(JSON)  # Per-stage pipeline timings in ms
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     # Relationship
     user = relationship("User", back_populates="choices")
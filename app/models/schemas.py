@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 
@@ -53,6 +53,7 @@ class RecommendationRequest(BaseModel):
     user_id: Optional[int] = None
     filters: Optional[Dict[str, Any]] = {}
     limit: int = 10
+    diversity_lambda: Optional[float] = Field(None, ge=0.0, le=1.0)  # MMR re-ranking
 
 class RecommendationItem(BaseModel):
     item_id: int
@@ -73,6 +74,21 @@ class RecommendationResponse(BaseModel):
     processing_time_ms: int
     explanation: str
 
+class BulkRecommendationPair(BaseModel):
+    user_id: Optional[int] = None
+    query: str
+
+class BulkRecommendationRequest(BaseModel):
+    requests: List[BulkRecommendationPair] = Field(..., min_length=1, max_length=1000)
+    limit: int = Field(10, ge=1, le=100)
+
+# Similar decision schemas
+class SimilarDecisionRequest(BaseModel):
+    query: str
+    category: Optional[str] = None
+    factors: Optional[Dict[str, str]] = None
+    limit: int = Field(5, ge=1, le=50)
+
 # NLP schemas
 class NLPRequest(BaseModel):
     text: str
@@ -121,9 +137,11 @@ class SearchRequest(BaseModel):
 
 class SearchResponse(BaseModel):
     items: List[Item]
-    total: int
+    total: Optional[int] = None
+    total_estimated: bool = False
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
     filters_applied: Dict[str, Any]
 
 # Health check
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Boolean, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, JSON, Boolean, Text, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -22,11 +22,34 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    interactions = relationship("UserInteraction", back_populates="user")
+    interactions = relationship(
+        "UserInteraction",
+        back_populates="user",
+        primaryjoin="User.id == foreign(UserInteraction.user_id)"
+    )
     choices = relationship("Choice", back_populates="user")
 
+# Positive feedback as used by collaborative filtering; literal so that the
+# partial index predicate below can be matched by the planner
+POSITIVE_INTERACTION_TYPES = ("like", "purchase")
+POSITIVE_MIN_RATING = 4
+POSITIVE_SIGNAL_SQL = "interaction_type IN ('like', 'purchase') AND rating >= 4"
+
 class UserInteraction(Base):
     __tablename__ = "user_interactions"
+    __table_args__ = (
+        # History listing: a user's interactions, newest first
+        Index("ix_user_interactions_user_time", "user_id", "timestamp",
+              postgresql_include=["item_id", "interaction_type", "rating"]),
+        # Positive signals per user (collaborative filtering)
+        Index("ix_user_interactions_positive", "user_id", "item_id", "rating",
+              postgresql_where=text(POSITIVE_SIGNAL_SQL), sqlite_where=text(POSITIVE_SIGNAL_SQL)),
+        # Signals per item and type
+        Index("ix_user_interactions_item_type_rating", "item_id", "interaction_type", "rating"),
+        # Recent-window scans (popularity)
+        Index("ix_user_interactions_time", "timestamp",
+              postgresql_include=["item_id", "interaction_type", "rating"]),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False, index=True)
@@ -34,7 +57,39 @@ class UserInteraction(Base):
     interaction_type = Column(String(20), nullable=False)  # view, like, dislike, purchase
     rating = Column(Integer)  # 1-5 stars
     feedback = Column(Text)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key of the monthly partitions on PostgreSQL
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationship
-    user = relationship("User", back_populates="interactions")
+    # user_interactions has no FK constraint in the schema, so the join is explicit
+    user = relationship(
+        "User",
+        back_populates="interactions",
+        primaryjoin="User.id == foreign(UserInteraction.user_id)"
+    )
+
+class UserInteractionDaily(Base):
+    """Per-user daily rollup of user_interactions by item, kept beyond raw-event
+    retention; the user profile is built from it"""
+    __tablename__ = "user_interaction_daily"
+    __table_args__ = (Index("ix_user_interaction_daily_user", "user_id", "day"),)
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    interaction_type = Column(String(20), primary_key=True)
+    events = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+
+class ItemInteractionDaily(Base):
+    """Per-item daily rollup of user_interactions, kept beyond raw-event retention"""
+    __tablename__ = "item_interaction_daily"
+    __table_args__ = (Index("ix_item_interaction_daily_item", "item_id", "day"),)
+
+    day = Column(Date, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    interaction_type = Column(String(20), primary_key=True)
+    events = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
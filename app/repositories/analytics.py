@@ -0,0 +1,78 @@
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analytics import AnalyticsTotal, CategoryInteractionCount, QueryIntentDaily, RecentDecision
+from app.models.choice import Category, Item
+from app.models.user import ItemInteractionDaily, UserInteraction
+
+
+def interaction_events_statement(raw_since: Optional[datetime]):
+    """(item_id, events) from the daily rollups plus raw events at or after `raw_since`
+    (all raw events when nothing is rolled up yet)"""
+    rolled = select(ItemInteractionDaily.item_id, ItemInteractionDaily.events)
+    raw = select(UserInteraction.item_id, func.count().label("events")).group_by(UserInteraction.item_id)
+    if raw_since is None:
+        return raw
+    return union_all(rolled, raw.where(UserInteraction.timestamp >= raw_since))
+
+
+def category_counts_statement(raw_since: Optional[datetime]):
+    """Interaction counts per category, for CategoryInteractionCount"""
+    events = interaction_events_statement(raw_since).subquery()
+    return select(Item.category_id, func.sum(events.c.events)).join(
+        Item, Item.id == events.c.item_id
+    ).where(Item.category_id.is_not(None)).group_by(Item.category_id)
+
+
+def total_events_statement(raw_since: Optional[datetime]):
+    events = interaction_events_statement(raw_since).subquery()
+    return select(func.coalesce(func.sum(events.c.events), 0))
+
+
+async def get_totals(session: AsyncSession) -> Dict[str, Any]:
+    """Counters by metric and the time they were last refreshed"""
+    rows = (await session.execute(select(AnalyticsTotal))).scalars().all()
+    return {
+        "totals": {row.metric: row.value for row in rows},
+        "updated_at": max((row.updated_at for row in rows), default=None)
+    }
+
+
+async def intent_counts(session: AsyncSession, since: date) -> List[Dict[str, Any]]:
+    """Queries and average processing time per day and intent since `since`"""
+    result = await session.execute(
+        select(QueryIntentDaily).where(QueryIntentDaily.day >= since)
+        .order_by(QueryIntentDaily.day, QueryIntentDaily.intent)
+    )
+    return [
+        {
+            "day": row.day,
+            "intent": row.intent,
+            "queries": row.queries,
+            "avg_processing_ms": round(row.processing_ms_sum / row.queries, 1) if row.queries else None
+        }
+        for row in result.scalars().all()
+    ]
+
+
+async def category_counts(session: AsyncSession, limit: int = 10) -> List[Dict[str, Any]]:
+    """Categories with the most interactions"""
+    result = await session.execute(
+        select(CategoryInteractionCount.category_id, Category.name, CategoryInteractionCount.events)
+        .outerjoin(Category, Category.id == CategoryInteractionCount.category_id)
+        .order_by(CategoryInteractionCount.events.desc())
+        .limit(limit)
+    )
+    return [{"category_id": r.category_id, "name": r.name, "events": r.events} for r in result.all()]
+
+
+async def recent_decisions(session: AsyncSession, limit: int = 5) -> List[RecentDecision]:
+    """Newest logged queries as (id, query_text, intent, created_at) rows"""
+    result = await session.execute(
+        select(RecentDecision.choice_id, RecentDecision.query_text, RecentDecision.intent, RecentDecision.created_at)
+        .order_by(RecentDecision.created_at.desc(), RecentDecision.choice_id.desc())
+        .limit(limit)
+    )
+    return list(result.all())
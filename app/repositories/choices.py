@@ -0,0 +1,34 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.choice import Choice
+
+
+async def insert_choices(session: AsyncSession, rows: List[Dict[str, Any]]):
+    """Multi-row insert of query log rows; the caller commits"""
+    if rows:
+        await session.execute(insert(Choice.__table__), rows)
+
+
+async def record_feedback(session: AsyncSession,
+                          choice_id: int,
+                          rating: Optional[int],
+                          feedback_text: Optional[str]) -> bool:
+    """Attach user feedback to a logged query; False if it does not exist"""
+    result = await session.execute(
+        update(Choice)
+        .where(Choice.id == choice_id)
+        .values(user_feedback=rating, feedback_text=feedback_text)
+    )
+    return result.rowcount > 0
+
+
+async def recent_choices(session: AsyncSession, limit: int = 5) -> List[Choice]:
+    """Most recently logged queries"""
+    result = await session.execute(
+        select(Choice.id, Choice.query_text, Choice.intent, Choice.created_at)
+        .order_by(Choice.created_at.desc())
+        .limit(limit)
+    )
+    return list(result.all())
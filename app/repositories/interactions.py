@@ -0,0 +1,151 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import and_, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import (
+    POSITIVE_INTERACTION_TYPES, POSITIVE_MIN_RATING, ItemInteractionDaily, UserInteraction, UserInteractionDaily
+)
+
+
+def positive_signal():
+    """Positive-feedback predicate with literal values, so the planner can use
+    the partial index ix_user_interactions_positive"""
+    return and_(
+        UserInteraction.interaction_type.in_(
+            [literal(t, literal_execute=True) for t in POSITIVE_INTERACTION_TYPES]
+        ),
+        UserInteraction.rating >= literal(POSITIVE_MIN_RATING, literal_execute=True)
+    )
+
+
+def history_statement(user_id: int, limit: Optional[int] = None):
+    """A user's interactions, newest first (ix_user_interactions_user_time)"""
+    statement = select(UserInteraction).where(UserInteraction.user_id == user_id).order_by(
+        UserInteraction.timestamp.desc()
+    )
+    return statement.limit(limit) if limit else statement
+
+
+def positive_signals_statement():
+    """(user_id, item_id, rating) of every positive interaction"""
+    return select(UserInteraction.user_id, UserInteraction.item_id, UserInteraction.rating).where(positive_signal())
+
+
+def window_statement(since: datetime):
+    """(item_id, interaction_type, rating, timestamp) of interactions since a time"""
+    return select(
+        UserInteraction.item_id, UserInteraction.interaction_type,
+        UserInteraction.rating, UserInteraction.timestamp
+    ).where(UserInteraction.timestamp >= since)
+
+
+def first_event_statement(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Timestamp of the earliest raw interaction (at or after `since`, before `until`)"""
+    statement = select(func.min(UserInteraction.timestamp))
+    if since:
+        statement = statement.where(UserInteraction.timestamp >= since)
+    return statement.where(UserInteraction.timestamp < until) if until else statement
+
+
+def rolled_through_statement():
+    """Last day covered by the daily rollups"""
+    return select(func.max(ItemInteractionDaily.day))
+
+
+def item_daily_statement(since: date, until: Optional[date] = None):
+    """Per-item daily rollup rows from `since` (through `until`)"""
+    statement = select(
+        ItemInteractionDaily.day, ItemInteractionDaily.item_id, ItemInteractionDaily.interaction_type,
+        ItemInteractionDaily.events, ItemInteractionDaily.rating_sum, ItemInteractionDaily.rating_count
+    ).where(ItemInteractionDaily.day >= since)
+    return statement.where(ItemInteractionDaily.day <= until) if until else statement
+
+
+def user_daily_totals_statement(user_id: int):
+    """A user's rolled-up (item_id, interaction_type) totals and the last day seen
+    (ix_user_interaction_daily_user)"""
+    return select(
+        UserInteractionDaily.item_id, UserInteractionDaily.interaction_type,
+        func.sum(UserInteractionDaily.events), func.sum(UserInteractionDaily.rating_sum),
+        func.sum(UserInteractionDaily.rating_count), func.max(UserInteractionDaily.day)
+    ).where(UserInteractionDaily.user_id == user_id).group_by(
+        UserInteractionDaily.item_id, UserInteractionDaily.interaction_type
+    )
+
+
+def user_raw_totals_statement(user_id: int, since: Optional[datetime] = None):
+    """The same totals from raw events at or after `since` (ix_user_interactions_user_time)"""
+    statement = select(
+        UserInteraction.item_id, UserInteraction.interaction_type,
+        func.count(), func.coalesce(func.sum(UserInteraction.rating), 0),
+        func.count(UserInteraction.rating), func.max(UserInteraction.timestamp)
+    ).where(UserInteraction.user_id == user_id)
+    if since:
+        statement = statement.where(UserInteraction.timestamp >= since)
+    return statement.group_by(UserInteraction.item_id, UserInteraction.interaction_type)
+
+
+async def get_user_interaction_totals(session: AsyncSession,
+                                      user_id: int,
+                                      limit: Optional[int] = None) -> List[Dict]:
+    """A user's interactions per (item, type) over the whole history, most recently
+    seen first: daily rollups plus the raw events of days not rolled up yet"""
+    rolled_through = (await session.execute(rolled_through_statement())).scalar()
+    raw_since = None
+    if rolled_through is not None:
+        raw_since = datetime.combine(rolled_through + timedelta(days=1), time.min, tzinfo=timezone.utc)
+
+    totals: Dict[tuple, Dict] = {}
+
+    def merge(item_id, interaction_type, events, rating_sum, rating_count, last_seen: date):
+        entry = totals.setdefault((item_id, interaction_type), {
+            "item_id": item_id, "type": interaction_type,
+            "events": 0, "rating_sum": 0, "rating_count": 0, "last_seen": last_seen
+        })
+        entry["events"] += int(events)
+        entry["rating_sum"] += int(rating_sum or 0)
+        entry["rating_count"] += int(rating_count or 0)
+        entry["last_seen"] = max(entry["last_seen"], last_seen)
+
+    if rolled_through is not None:
+        for row in (await session.execute(user_daily_totals_statement(user_id))).all():
+            merge(*row)
+    for *row, last_timestamp in (await session.execute(user_raw_totals_statement(user_id, raw_since))).all():
+        if last_timestamp.tzinfo:
+            last_timestamp = last_timestamp.astimezone(timezone.utc)
+        merge(*row, last_timestamp.date())
+
+    ordered = sorted(totals.values(), key=lambda e: e["last_seen"], reverse=True)
+    for entry in ordered:
+        rating_sum, rating_count = entry.pop("rating_sum"), entry.pop("rating_count")
+        entry["rating"] = round(rating_sum / rating_count, 2) if rating_count else None
+        entry["last_seen"] = entry["last_seen"].isoformat()
+    return ordered[:limit] if limit else ordered
+
+
+async def get_user_interactions(session: AsyncSession,
+                                user_id: int,
+                                limit: Optional[int] = None) -> List[UserInteraction]:
+    """Interactions of a user, newest first"""
+    result = await session.execute(history_statement(user_id, limit))
+    return list(result.scalars().all())
+
+
+def add_ratings(session: AsyncSession,
+                user_id: int,
+                item_ratings: Dict[int, int],
+                feedback_text: Optional[str] = None) -> List[UserInteraction]:
+    """Stage one rating interaction per item; the caller commits"""
+    interactions = [
+        UserInteraction(
+            user_id=user_id,
+            item_id=item_id,
+            interaction_type="rating",
+            rating=rating,
+            feedback=feedback_text
+        )
+        for item_id, rating in item_ratings.items()
+    ]
+    session.add_all(interactions)
+    return interactions
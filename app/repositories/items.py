@@ -0,0 +1,158 @@
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.text_search import apply_text_search
+from app.models.choice import Category, Item
+
+# (relevance or None, id) of the last row of a search page
+SearchKey = Tuple[Optional[float], int]
+
+
+async def get_item(session: AsyncSession, item_id: int) -> Optional[Item]:
+    """Item by primary key"""
+    return await session.get(Item, item_id)
+
+
+async def get_items_by_ids(session: AsyncSession, item_ids: Sequence[int]) -> List[Item]:
+    """Items for a set of ids, in no particular order"""
+    if not item_ids:
+        return []
+    result = await session.execute(select(Item).where(Item.id.in_(list(item_ids))))
+    return list(result.scalars().all())
+
+
+def attribute_filter(dialect: str, attributes: Dict[str, Any]):
+    """SQL predicate: item attributes contain every key/value pair given.
+
+    PostgreSQL uses JSONB containment (@>), served by the GIN index; other
+    backends compare the extracted scalar values.
+    """
+    if dialect == "postgresql":
+        return Item.attributes.op("@>")(literal(attributes, JSONB))
+
+    conditions = []
+    for key, value in attributes.items():
+        element = Item.attributes[key]
+        if isinstance(value, bool):
+            conditions.append(element.as_boolean() == value)
+        elif isinstance(value, int):
+            conditions.append(element.as_integer() == value)
+        elif isinstance(value, float):
+            conditions.append(element.as_float() == value)
+        elif isinstance(value, str):
+            conditions.append(element.as_string() == value)
+        else:
+            raise ValueError(f"Attribute {key}: only scalar values can be matched on {dialect}")
+    return and_(*conditions)
+
+
+def _search_statement(statement,
+                      dialect: str,
+                      query: Optional[str] = None,
+                      category_id: Optional[int] = None,
+                      min_price: Optional[float] = None,
+                      max_price: Optional[float] = None,
+                      min_rating: Optional[float] = None,
+                      attributes: Optional[Dict[str, Any]] = None) -> Tuple[Any, Optional[Any]]:
+    """Apply search filters; returns (statement, relevance expression or None)"""
+    if attributes:
+        statement = statement.where(attribute_filter(dialect, attributes))
+    if category_id:
+        statement = statement.where(Item.category_id == category_id)
+    if min_price is not None:
+        statement = statement.where(Item.price >= min_price)
+    if max_price is not None:
+        statement = statement.where(Item.price <= max_price)
+    if min_rating is not None:
+        statement = statement.where(Item.rating >= min_rating)
+    if query:
+        return apply_text_search(statement, dialect, query)
+    return statement, None
+
+
+async def search_items(session: AsyncSession,
+                       limit: int = 20,
+                       offset: int = 0,
+                       after: Optional[SearchKey] = None,
+                       **filters) -> Tuple[List[Item], Optional[SearchKey]]:
+    """Page of matching items, most relevant first (then by id), and the key
+    of its last row when more rows follow.
+
+    `after` continues from such a key (keyset pagination): the database seeks
+    past it instead of scanning and discarding `offset` rows.
+    """
+    dialect = session.bind.dialect.name
+    statement, relevance = _search_statement(select(Item), dialect, **filters)
+    if relevance is not None:
+        statement = statement.add_columns(relevance.label("relevance"))
+        order_by = [relevance.desc(), Item.id]
+    else:
+        order_by = [Item.id]
+
+    if after is not None:
+        score, last_id = after
+        if relevance is not None:
+            statement = statement.where(or_(relevance < score, and_(relevance == score, Item.id > last_id)))
+        else:
+            statement = statement.where(Item.id > last_id)
+        offset = 0
+
+    # One extra row tells whether a next page exists
+    result = await session.execute(statement.order_by(*order_by).offset(offset).limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [row[0] for row in rows]
+    if not has_more or not rows:
+        return items, None
+    last = rows[-1]
+    return items, (float(last[1]) if relevance is not None else None, last[0].id)
+
+
+async def count_items(session: AsyncSession, **filters) -> int:
+    """Exact number of matching items"""
+    statement, _ = _search_statement(select(func.count()).select_from(Item), session.bind.dialect.name, **filters)
+    return await session.scalar(statement) or 0
+
+
+def explain_statement(statement, dialect) -> Tuple[str, Any]:
+    """EXPLAIN (FORMAT JSON) SQL and driver parameters for a statement.
+
+    Values stay bound parameters: no literal rendering is needed (JSONB has
+    none) and user text such as ":pro" is never parsed as SQL.
+    """
+    compiled = statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return f"EXPLAIN (FORMAT JSON) {compiled}", params
+
+
+async def estimate_items(session: AsyncSession, **filters) -> Optional[int]:
+    """Planner row estimate for the search (PostgreSQL only; None elsewhere)"""
+    dialect = session.bind.dialect
+    if dialect.name != "postgresql":
+        return None
+    statement, _ = _search_statement(select(Item.id), dialect.name, **filters)
+    sql, params = explain_statement(statement, dialect)
+    connection = await session.connection()
+    plan = (await connection.exec_driver_sql(sql, params)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def item_ids_with_attributes(session: AsyncSession, attributes: Dict[str, Any]) -> List[int]:
+    """Ids of the items whose attributes contain all the given pairs"""
+    statement = select(Item.id).where(attribute_filter(session.bind.dialect.name, attributes))
+    result = await session.execute(statement)
+    return list(result.scalars().all())
+
+
+async def list_categories(session: AsyncSession) -> List[Category]:
+    """All categories"""
+    result = await session.execute(select(Category))
+    return list(result.scalars().all())
@@ -0,0 +1,16 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+
+
+async def get_user(session: AsyncSession, user_id: int) -> Optional[User]:
+    """User by primary key"""
+    return await session.get(User, user_id)
+
+
+async def get_user_by_username(session: AsyncSession, username: str) -> Optional[User]:
+    """User by unique username"""
+    result = await session.execute(select(User).where(User.username == username))
+    return result.scalars().first()
@@ -0,0 +1,174 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy import Date, delete, func, insert, literal, select
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.analytics import AnalyticsTotal, CategoryInteractionCount, QueryIntentDaily, RecentDecision
+from app.models.choice import Choice, Item
+from app.models.user import User
+from app.repositories import analytics as analytics_repo, interactions as interaction_repo
+from app.services.interaction_rollups import day_bounds, utc_date
+
+
+class AnalyticsSummary:
+    """Keeps the dashboard summary tables up to date.
+
+    Query counts per day and intent are recomputed only from the last
+    summarized day on; the recent-decision list is rebuilt from the newest
+    `recent_limit` choices by creation time; category and total
+    interaction counts are rebuilt from the daily interaction rollups plus
+    the raw events since the last rollup. Dashboards read these rows instead
+    of scanning choices and user_interactions on every request.
+    """
+
+    def __init__(self,
+                 interval: int,
+                 recent_limit: int = 50,
+                 max_days_per_run: int = 31,
+                 db_engine=engine):
+        self.engine = db_engine
+        self.interval = interval
+        self.recent_limit = recent_limit
+        self.max_days_per_run = max_days_per_run
+        self._task: Optional[asyncio.Task] = None
+        self.refreshed_at: Optional[datetime] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @staticmethod
+    def _vector_count() -> Optional[int]:
+        """Milvus entity count (a blocking RPC), None when the collection is unavailable"""
+        from app.services.vector_service import vector_service
+        try:
+            return vector_service.collection.num_entities if vector_service.collection else None
+        except Exception as e:
+            logger.warning(f"Failed to count vectors: {e}")
+            return None
+
+    def _refresh_with_vectors(self) -> Dict[str, Any]:
+        return self.refresh(vectors=self._vector_count())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Both the Milvus RPC and the SQL refresh run in the executor
+                await loop.run_in_executor(None, self._refresh_with_vectors)
+            except Exception as e:
+                logger.error(f"Analytics summary refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def refresh(self, today: Optional[date] = None, vectors: Optional[int] = None) -> Dict[str, Any]:
+        """Bring every summary table up to date"""
+        today = today or datetime.now(timezone.utc).date()
+        days = self.refresh_intents(today)
+        recent = self.refresh_recent()
+        raw_since = self._raw_since()
+        self.refresh_categories(raw_since)
+        self.refresh_totals(raw_since, vectors)
+        self.refreshed_at = datetime.now(timezone.utc)
+        logger.info(f"Analytics summary refreshed: {days} days of queries, {recent} recent decisions")
+        return {"intent_days": days, "recent": recent}
+
+    def summarize_day(self, conn, day: date):
+        """(Re)compute query counts by intent for one day"""
+        start, end = day_bounds(day)
+        intent = func.coalesce(Choice.intent, "unknown")
+        conn.execute(delete(QueryIntentDaily).where(QueryIntentDaily.day == day))
+        conn.execute(insert(QueryIntentDaily).from_select(
+            ["day", "intent", "queries", "processing_ms_sum"],
+            select(literal(day, Date), intent, func.count(), func.coalesce(func.sum(Choice.processing_time_ms), 0))
+            .where(Choice.created_at >= start, Choice.created_at < end)
+            .group_by(intent)
+        ))
+
+    def refresh_intents(self, today: date) -> int:
+        """Summarize days from the last summarized one (it may have been partial),
+        skipping days without queries"""
+        summarized = 0
+        with self.engine.connect() as conn:
+            next_day = conn.execute(select(func.max(QueryIntentDaily.day))).scalar()
+
+        while summarized < self.max_days_per_run:
+            with self.engine.begin() as conn:
+                first = select(func.min(Choice.created_at))
+                if next_day:
+                    first = first.where(Choice.created_at >= day_bounds(next_day)[0])
+                first_query = conn.execute(first).scalar()
+                if first_query is None:
+                    break
+                day = utc_date(first_query)
+                self.summarize_day(conn, day)
+            summarized += 1
+            if day >= today:
+                break
+            next_day = day + timedelta(days=1)
+        return summarized
+
+    def refresh_recent(self) -> int:
+        """Rebuild the list from the newest `recent_limit` choices.
+
+        Ids are assigned before batched query-log rows commit, so an id
+        watermark would skip rows that commit out of order; reading the
+        (created_at) index top-N each run picks them up.
+        """
+        with self.engine.begin() as conn:
+            conn.execute(delete(RecentDecision))
+            copied = conn.execute(insert(RecentDecision).from_select(
+                ["choice_id", "query_text", "intent", "created_at"],
+                select(Choice.id, Choice.query_text, Choice.intent, Choice.created_at)
+                .order_by(Choice.created_at.desc(), Choice.id.desc())
+                .limit(self.recent_limit)
+            )).rowcount
+        return max(copied, 0)
+
+    def _raw_since(self) -> Optional[datetime]:
+        """Start of the first day not covered by the interaction rollups"""
+        with self.engine.connect() as conn:
+            rolled_through = conn.execute(interaction_repo.rolled_through_statement()).scalar()
+        return day_bounds(rolled_through + timedelta(days=1))[0] if rolled_through else None
+
+    def refresh_categories(self, raw_since: Optional[datetime]):
+        with self.engine.begin() as conn:
+            conn.execute(delete(CategoryInteractionCount))
+            conn.execute(insert(CategoryInteractionCount).from_select(
+                ["category_id", "events"], analytics_repo.category_counts_statement(raw_since)
+            ))
+
+    def refresh_totals(self, raw_since: Optional[datetime], vectors: Optional[int] = None):
+        now = datetime.now(timezone.utc)
+        counters = {
+            "users": select(func.count()).select_from(User),
+            "items": select(func.count()).select_from(Item),
+            "queries": select(func.coalesce(func.sum(QueryIntentDaily.queries), 0)),
+            "interactions": analytics_repo.total_events_statement(raw_since)
+        }
+        with self.engine.begin() as conn:
+            values = {metric: int(conn.execute(statement).scalar() or 0) for metric, statement in counters.items()}
+            if vectors is not None:
+                values["vectors"] = int(vectors)
+            conn.execute(delete(AnalyticsTotal).where(AnalyticsTotal.metric.in_(list(values))))
+            conn.execute(insert(AnalyticsTotal), [
+                {"metric": metric, "value": value, "updated_at": now} for metric, value in values.items()
+            ])
+
+
+# Global instance
+analytics_summary = AnalyticsSummary(
+    interval=settings.ANALYTICS_REFRESH_INTERVAL,
+    recent_limit=settings.ANALYTICS_RECENT_LIMIT
+)
@@ -0,0 +1,157 @@
+import json
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+from redis import WatchError
+
+from app.core.config import settings
+from app.core.database import redis_bytes_client
+from app.services.linucb import context_vector, initial_state, sherman_morrison_update, score_arms
+
+MAX_UPDATE_RETRIES = 5
+
+
+class ContextualBandit:
+    """Online contextual bandit for choosing among decision options.
+
+    Each arm keeps A^-1 and b of a ridge regression on context features,
+    updated with Sherman-Morrison on every reward. State lives in Redis as
+    packed float64 (the upper triangle of the symmetric A^-1 plus b, about
+    1 KB per arm at d=16), so all API workers share one model.
+
+    Redis layout:
+        bandit:arm:{arm_id}     hash    a_inv, b, n
+        bandit:context:{token}  string  context vector and served arm ids of a
+                                        decision, consumed by its reward
+    """
+
+    def __init__(self, redis, dim: int, alpha: float, strategy: str = "ucb",
+                 context_ttl: int = 86400, prefix: str = "bandit"):
+        self.redis = redis
+        self.dim = dim
+        self.alpha = alpha
+        self.strategy = strategy
+        self.context_ttl = context_ttl
+        self.prefix = prefix
+        self._triu = np.triu_indices(dim)
+
+    def _arm_key(self, arm_id: str) -> str:
+        return f"{self.prefix}:arm:{arm_id}"
+
+    def _context_key(self, token: str) -> str:
+        return f"{self.prefix}:context:{token}"
+
+    def _pack(self, a_inv: np.ndarray) -> bytes:
+        return a_inv[self._triu].tobytes()
+
+    def _pack_context(self, x: np.ndarray, arm_ids: List[str]) -> bytes:
+        return x.tobytes() + json.dumps(arm_ids).encode("utf-8")
+
+    def _unpack_context(self, packed: bytes) -> Tuple[np.ndarray, List[str]]:
+        size = self.dim * 8
+        return np.frombuffer(packed[:size], dtype=np.float64), json.loads(packed[size:])
+
+    def _unpack(self, packed: bytes) -> np.ndarray:
+        a_inv = np.zeros((self.dim, self.dim))
+        a_inv[self._triu] = np.frombuffer(packed, dtype=np.float64)
+        return a_inv + np.triu(a_inv, 1).T
+
+    def _load(self, arm_ids: List[str]) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+        """Stacked (K, d, d) A^-1 and (K, d) b for the arms, in one round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        for arm_id in arm_ids:
+            pipe.hmget(self._arm_key(arm_id), "a_inv", "b", "n")
+
+        a_inv_0, b_0 = initial_state(self.dim)
+        a_inv = np.broadcast_to(a_inv_0, (len(arm_ids), self.dim, self.dim)).copy()
+        b = np.zeros((len(arm_ids), self.dim))
+        counts = [0] * len(arm_ids)
+        for k, (packed_a, packed_b, n) in enumerate(pipe.execute()):
+            if packed_a is not None:
+                a_inv[k] = self._unpack(packed_a)
+                b[k] = np.frombuffer(packed_b, dtype=np.float64)
+                counts[k] = int(n)
+        return a_inv, b, counts
+
+    def rank(self, arm_ids: List[str], features: Dict[str, Any]) -> Tuple[Optional[str], List[Dict]]:
+        """Score all arms for a context; best first, ties keep the given order.
+
+        Returns a token for reporting the reward later, and per-arm scores.
+        """
+        if not arm_ids:
+            return None, []
+
+        x = context_vector(features, self.dim)
+        a_inv, b, counts = self._load(arm_ids)
+        scores, expected, width = score_arms(a_inv, b, x, self.alpha, self.strategy)
+
+        token = uuid.uuid4().hex
+        self.redis.setex(self._context_key(token), self.context_ttl, self._pack_context(x, arm_ids))
+
+        order = np.argsort(-scores, kind="stable")
+        return token, [
+            {
+                "arm": arm_ids[k],
+                "score": float(scores[k]),
+                "expected_reward": float(expected[k]),
+                "confidence": float(width[k]),
+                "plays": counts[k]
+            }
+            for k in order
+        ]
+
+    def update(self, token: str, arm_id: str, reward: float) -> bool:
+        """Fold an observed reward in [0, 1] into the arm's model.
+
+        Each served decision is rewarded once, and only for an arm it served:
+        False for unknown, expired or already rewarded tokens, ValueError for
+        an arm that was not served.
+        """
+        context_key = self._context_key(token)
+        packed = self.redis.get(context_key)
+        if packed is None:
+            return False
+        x, served = self._unpack_context(packed)
+        if arm_id not in served:
+            raise ValueError(f"Option {arm_id} was not served for this decision")
+        # Only the caller whose GETDEL removes the token applies the reward
+        if self.redis.getdel(context_key) is None:
+            return False
+        key = self._arm_key(arm_id)
+
+        # Optimistic concurrency: retry if another worker updated the arm meanwhile
+        for _ in range(MAX_UPDATE_RETRIES):
+            with self.redis.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    packed_a, packed_b, n = pipe.hmget(key, "a_inv", "b", "n")
+                    if packed_a is None:
+                        a_inv, b = initial_state(self.dim)
+                    else:
+                        a_inv, b = self._unpack(packed_a), np.frombuffer(packed_b, dtype=np.float64)
+                    a_inv, b = sherman_morrison_update(a_inv, b, x, reward)
+
+                    pipe.multi()
+                    pipe.hset(key, mapping={
+                        "a_inv": self._pack(a_inv),
+                        "b": b.tobytes(),
+                        "n": int(n or 0) + 1
+                    })
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+
+        logger.warning(f"Bandit update for arm {arm_id} dropped after {MAX_UPDATE_RETRIES} conflicts")
+        return False
+
+
+# Global instance
+contextual_bandit = ContextualBandit(
+    redis_bytes_client,
+    dim=settings.BANDIT_CONTEXT_DIM,
+    alpha=settings.BANDIT_ALPHA,
+    strategy=settings.BANDIT_STRATEGY,
+    context_ttl=settings.BANDIT_CONTEXT_TTL
+)
@@ -0,0 +1,289 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.choice import Item
+from app.models.user import User
+from app.repositories import interactions as interaction_repo
+from app.services.nlp_service import nlp_processor
+from app.services.vector_service import vector_service
+from app.services.ranking import batch_top_k
+from app.services.recommendation_service import recommendation_engine
+
+
+class BulkRecommender:
+    """Batched recommendations for many (user_id, query) pairs.
+
+    The catalog and the positive-interaction matrix are loaded once per run.
+    Each batch embeds all queries in one encoder call, runs one Milvus search
+    for all vectors and scores every source as a [batch, n_items] matrix, so
+    the per-pair cost is a few vectorized row operations. Batches run in an
+    executor thread so a large request does not hold the event loop.
+    """
+
+    def __init__(self, batch_size: int = 128):
+        self.batch_size = batch_size
+        self.item_ids: Optional[np.ndarray] = None
+        self.item_names: List[str] = []
+        self.item_category_cols: Optional[np.ndarray] = None
+        self.item_prices: Optional[np.ndarray] = None
+        self.item_ratings: Optional[np.ndarray] = None
+        self.category_ids: Optional[np.ndarray] = None
+        self.user_index: Dict[int, int] = {}
+        self.interactions: Optional[sparse.csr_matrix] = None
+        self.liked: Optional[sparse.csr_matrix] = None
+        self.stats = {"pairs": 0, "batches": 0, "streams": 0}
+
+    def load(self):
+        """Load catalog arrays and the user x item positive-interaction matrix"""
+        db = SessionLocal()
+        try:
+            items = db.query(
+                Item.id, Item.name, Item.category_id, Item.price, Item.rating
+            ).order_by(Item.id).all()
+
+            self.item_ids = np.array([i.id for i in items], dtype=np.int64)
+            self.item_names = [i.name for i in items]
+            self.item_prices = np.array([i.price if i.price is not None else np.inf for i in items])
+            self.item_ratings = np.array([i.rating or 0.0 for i in items])
+
+            raw_categories = np.array([i.category_id if i.category_id is not None else -1 for i in items])
+            self.category_ids, self.item_category_cols = np.unique(raw_categories, return_inverse=True)
+
+            # Same positive-signal definition as the online collaborative filter
+            rows = db.execute(interaction_repo.positive_signals_statement()).all()
+        finally:
+            db.close()
+
+        if rows:
+            user_ids = np.array([r[0] for r in rows], dtype=np.int64)
+            cols = self._item_columns(np.array([r[1] for r in rows], dtype=np.int64))
+            ratings = np.array([r[2] for r in rows], dtype=np.float32) / 5.0
+            known = cols >= 0
+
+            unique_users, user_rows = np.unique(user_ids[known], return_inverse=True)
+            cols, ratings = cols[known], ratings[known]
+
+            # Duplicate (user, item) events collapse to their best rating
+            keys = user_rows * self.item_ids.size + cols
+            order = np.lexsort((ratings, keys))
+            is_last = np.r_[keys[order][1:] != keys[order][:-1], True]
+            keep = order[is_last]
+
+            self.user_index = {int(u): i for i, u in enumerate(unique_users)}
+            self.interactions = sparse.csr_matrix(
+                (ratings[keep], (user_rows[keep], cols[keep])),
+                shape=(unique_users.size, self.item_ids.size)
+            )
+        else:
+            self.user_index = {}
+            self.interactions = sparse.csr_matrix((0, self.item_ids.size), dtype=np.float32)
+
+        self.liked = self.interactions.copy()
+        self.liked.data = np.ones_like(self.liked.data)
+
+        logger.info(
+            f"Bulk recommender loaded {self.item_ids.size} items and "
+            f"{self.interactions.nnz} positive interactions"
+        )
+
+    def _item_columns(self, item_ids: np.ndarray) -> np.ndarray:
+        """Map item ids to catalog columns (-1 for unknown ids)"""
+        cols = np.searchsorted(self.item_ids, item_ids)
+        cols = np.clip(cols, 0, max(self.item_ids.size - 1, 0))
+        found = self.item_ids.size > 0
+        valid = (self.item_ids[cols] == item_ids) if found else np.zeros(item_ids.shape, dtype=bool)
+        return np.where(valid, cols, -1)
+
+    def _load_preferences(self, user_ids: Sequence[Optional[int]]) -> Dict[int, Dict]:
+        known = {u for u in user_ids if u is not None}
+        if not known:
+            return {}
+        db = SessionLocal()
+        try:
+            users = db.query(User.id, User.preferences).filter(User.id.in_(known)).all()
+            return {u.id: u.preferences or {} for u in users}
+        finally:
+            db.close()
+
+    def _collaborative_scores(self, user_ids: Sequence[Optional[int]]) -> np.ndarray:
+        """Overlap-weighted mean rating of items liked by similar users"""
+        scores = np.zeros((len(user_ids), self.item_ids.size), dtype=np.float32)
+        positions = [(row, self.user_index.get(u)) for row, u in enumerate(user_ids) if u is not None]
+        positions = [(row, idx) for row, idx in positions if idx is not None]
+        if not positions:
+            return scores
+
+        rows = np.array([p[0] for p in positions])
+        user_rows = np.array([p[1] for p in positions])
+
+        liked = self.liked
+        batch_liked = liked[user_rows]
+
+        # [b, n_users] co-like counts, minus each user's overlap with itself
+        overlap = batch_liked @ liked.T
+        self_counts = np.asarray(batch_liked.sum(axis=1)).ravel()
+        overlap = overlap - sparse.csr_matrix(
+            (self_counts, (np.arange(user_rows.size), user_rows)), shape=overlap.shape
+        )
+        overlap.eliminate_zeros()
+
+        weighted = (overlap @ self.interactions).toarray()
+        weight_sum = np.asarray(overlap.sum(axis=1)).ravel()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            collaborative = np.where(weight_sum[:, None] > 0, weighted / weight_sum[:, None], 0.0)
+
+        scores[rows] = collaborative
+        return scores
+
+    def _content_scores(self, user_ids: Sequence[Optional[int]], preferences: Dict[int, Dict]) -> np.ndarray:
+        """Category, rating and price preference scores for the whole catalog"""
+        n = len(user_ids)
+        n_categories = self.category_ids.size
+        category_prefs = np.zeros((n, n_categories), dtype=np.float32)
+        max_prices = np.full(n, np.nan)
+        has_profile = np.zeros(n, dtype=bool)
+
+        for row, user_id in enumerate(user_ids):
+            prefs = preferences.get(user_id)
+            if prefs is None:
+                continue
+            has_profile[row] = True
+            preferred = np.isin(self.category_ids, prefs.get("categories", []))
+            category_prefs[row, preferred] = 1.0
+            if prefs.get("max_price") is not None:
+                max_prices[row] = prefs["max_price"]
+
+        item_categories = sparse.csr_matrix(
+            (np.ones(self.item_ids.size, dtype=np.float32),
+             (np.arange(self.item_ids.size), self.item_category_cols)),
+            shape=(self.item_ids.size, n_categories)
+        )
+        in_category = np.asarray((item_categories @ category_prefs.T).T) > 0
+
+        scores = (
+            0.3 * in_category
+            + 0.2 * (self.item_ratings >= 4.0)[None, :]
+            + 0.1 * (self.item_prices[None, :] <= max_prices[:, None])
+        ).astype(np.float32)
+
+        # Without preferred categories every item is eligible, as online
+        restricted = category_prefs.any(axis=1)
+        scores[restricted] *= in_category[restricted]
+        scores[~has_profile] = 0.0
+        return scores
+
+    def recommend_batch(self, pairs: Sequence[Tuple[Optional[int], str]], limit: int) -> List[Dict[str, Any]]:
+        """Recommend top-N items for one batch of (user_id, query) pairs"""
+        user_ids = [p[0] for p in pairs]
+        queries = [p[1] for p in pairs]
+        n_items = self.item_ids.size
+
+        # One encoder call and one vector search for the whole batch
+        embeddings = nlp_processor.embed_batch(queries)
+        hits = vector_service.search_similar_batch(embeddings.tolist(), limit * 3)
+
+        semantic = np.zeros((len(pairs), n_items), dtype=np.float32)
+        for row, query_hits in enumerate(hits):
+            if not query_hits:
+                continue
+            cols = self._item_columns(np.array([h["item_id"] for h in query_hits], dtype=np.int64))
+            values = np.array([h["score"] for h in query_hits], dtype=np.float32)
+            valid = cols >= 0
+            semantic[row, cols[valid]] = values[valid]
+
+        preferences = self._load_preferences(user_ids)
+        collaborative = self._collaborative_scores(user_ids)
+        content = self._content_scores(user_ids, preferences)
+
+        weights = recommendation_engine.algorithm_weights
+        final = (
+            weights["semantic"] * semantic
+            + weights["collaborative"] * collaborative
+            + weights["content"] * content
+        )
+        # Only items produced by at least one source are candidates
+        final[(semantic == 0) & (collaborative == 0) & (content == 0)] = -np.inf
+
+        top = batch_top_k(final, limit)
+        top_scores = np.take_along_axis(final, top, axis=1)
+
+        results = []
+        for row, (user_id, query) in enumerate(pairs):
+            valid = np.isfinite(top_scores[row])
+            results.append({
+                "user_id": user_id,
+                "query": query,
+                "recommendations": [
+                    {
+                        "item_id": int(self.item_ids[col]),
+                        "name": self.item_names[col],
+                        "score": round(float(score), 6)
+                    }
+                    for col, score in zip(top[row][valid], top_scores[row][valid])
+                ]
+            })
+        return results
+
+    async def stream(self, pairs: Sequence[Tuple[Optional[int], str]], limit: int = 10) -> AsyncIterator[Dict[str, Any]]:
+        """Yield results batch by batch; loading and scoring run in executor threads"""
+        loop = asyncio.get_running_loop()
+        if self.item_ids is None:
+            await loop.run_in_executor(None, self.load)
+
+        start = time.perf_counter()
+        count = 0
+        for offset in range(0, len(pairs), self.batch_size):
+            batch = pairs[offset:offset + self.batch_size]
+            results = await loop.run_in_executor(None, self.recommend_batch, batch, limit)
+            for result in results:
+                yield result
+            count += len(batch)
+            self.stats["batches"] += 1
+            self.stats["pairs"] += len(batch)
+        self.stats["streams"] += 1
+
+        # Rates are per stream: concurrent streams share the totals but not wall time
+        seconds = time.perf_counter() - start
+        logger.info(
+            f"Bulk recommendations: {count} pairs in {seconds:.2f}s "
+            f"({count / seconds if seconds else 0.0:.1f} pairs/s)"
+        )
+
+
+class SharedBulkRecommender:
+    """One loaded BulkRecommender shared by all bulk requests.
+
+    Reloaded in an executor thread once older than `max_age` seconds; the new
+    instance replaces the old one in a single assignment, so streams already
+    running keep the arrays they started with.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self._recommender: Optional[BulkRecommender] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._recommender is not None and time.monotonic() - self._loaded_at < self.max_age
+
+    async def get(self) -> BulkRecommender:
+        if self._fresh():
+            return self._recommender
+        # One load at a time; waiters reuse its result
+        async with self._lock:
+            if not self._fresh():
+                recommender = BulkRecommender()
+                await asyncio.get_running_loop().run_in_executor(None, recommender.load)
+                self._recommender, self._loaded_at = recommender, time.monotonic()
+        return self._recommender
+
+
+# Global instance
+bulk_recommender = SharedBulkRecommender(max_age=settings.BULK_RECOMMENDER_MAX_AGE)
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import redis_client
+
+# Version counters that participate in every response cache key. Bumping one
+# of them makes all previously cached responses unreachable; the stale
+# entries then simply expire through their TTL.
+CATALOG_VERSION = "catalog"
+VECTOR_INDEX_VERSION = "vector_index"
+
+
+class ResponseCache:
+    """Whole-response cache with TTL, version-based invalidation and
+    single-flight coalescing of concurrent identical misses"""
+
+    def __init__(self, redis, ttl: int, namespace: str = "response_cache"):
+        self.redis = redis
+        self.ttl = ttl
+        self.namespace = namespace
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def get_version(self, name: str) -> str:
+        """Current value of a version counter"""
+        try:
+            return self.redis.get(f"version:{name}") or "0"
+        except Exception as e:
+            logger.warning(f"Failed to read cache version {name}: {e}")
+            return "0"
+
+    def get_versions(self, names: List[str]) -> List[str]:
+        """Current values of several version counters in one round trip"""
+        try:
+            return [value or "0" for value in self.redis.mget([f"version:{name}" for name in names])]
+        except Exception as e:
+            logger.warning(f"Failed to read cache versions {names}: {e}")
+            return ["0"] * len(names)
+
+    def bump_version(self, name: str) -> None:
+        """Invalidate every cached response depending on this version"""
+        try:
+            self.redis.incr(f"version:{name}")
+        except Exception as e:
+            logger.warning(f"Failed to bump cache version {name}: {e}")
+
+    def invalidate_catalog(self) -> None:
+        self.bump_version(CATALOG_VERSION)
+
+    def invalidate_vector_index(self) -> None:
+        self.bump_version(VECTOR_INDEX_VERSION)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.bump_version(f"profile:{user_id}")
+
+    async def make_key(self,
+                       query: str,
+                       filters: Optional[Dict[str, Any]],
+                       limit: int,
+                       algorithm_version: str,
+                       user_id: Optional[int] = None,
+                       options: Optional[Dict[str, Any]] = None) -> str:
+        """Build a cache key from the normalized request and current versions"""
+        names = [CATALOG_VERSION, VECTOR_INDEX_VERSION] + ([f"profile:{user_id}"] if user_id else [])
+        # One MGET for all counters, run off the event loop
+        versions = await asyncio.get_running_loop().run_in_executor(None, self.get_versions, names)
+        payload = {
+            "query": " ".join(query.lower().split()),
+            "filters": filters or {},
+            "limit": limit,
+            "algorithm": algorithm_version,
+            "catalog": versions[0],
+            "vector_index": versions[1],
+            "user_id": user_id,
+            "profile": versions[2] if user_id else None,
+            "options": options or {}
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    def _get(self, key: str) -> Optional[Dict]:
+        try:
+            cached = self.redis.get(key)
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    def _set(self, key: str, value: Dict) -> None:
+        try:
+            self.redis.setex(key, self.ttl, json.dumps(value, ensure_ascii=False, default=str))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Response cache write failed: {e}")
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Return the cached response or compute it once for all concurrent callers.
+        Redis reads and writes run in executor threads."""
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self._get, key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        # Coalesce with an identical computation already in flight
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        self.stats["misses"] += 1
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+            future.set_result(result)
+            await loop.run_in_executor(None, self._set, key, result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+
+# Global instance
+response_cache = ResponseCache(redis_client, ttl=settings.RESPONSE_CACHE_TTL)
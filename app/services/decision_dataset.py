@@ -0,0 +1,218 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from loguru import logger
+
+from app.services.decision_engines import CRITERION_PREFIX
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+DEFAULT_CSV_PATH = DATA_DIR / "decision_database_main.csv"
+DEFAULT_CACHE_DIR = DATA_DIR / "cache"
+
+# Bump when the artifact layout changes so stale caches are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+ID_COLUMNS = ["Категория", "Сценарий", "Альтернатива"]
+
+NUMERIC_COLUMNS = [
+    "Общая_оценка", "Индекс_тревожности", "Время_на_решение_часы", "Уровень_сложности",
+    "Влияние_на_будущее", "Количество_заинтересованных_сторон"
+]
+
+# Ordinal factors, lowest to highest, so codes can be compared and averaged
+FACTOR_LEVELS = {
+    "Тревожность": ["Низкая", "Средняя", "Высокая"],
+    "Временное_давление": ["Нет", "Умеренное", "Высокое"],
+    "Важность_решения": ["Низкая", "Средняя", "Высокая", "Критическая"],
+    "Доступность_информации": ["Недостаточная", "Достаточная", "Избыточная"],
+    "Опыт_в_области": ["Новичок", "Средний", "Эксперт"],
+    "Финансовые_ресурсы": ["Ограниченные", "Умеренные", "Значительные"],
+    "Социальная_поддержка": ["Отсутствует", "Слабая", "Сильная"],
+    "Эмоциональное_состояние": ["Негативное", "Нейтральное", "Позитивное"],
+    "Уверенность_в_себе": ["Низкая", "Средняя", "Высокая"],
+    "Склонность_к_риску": ["Избегание", "Нейтральная", "Принятие"],
+    "Обратимость_решения": ["Необратимо", "Частично обратимо", "Легко обратимо"]
+}
+
+
+def _encode(values: pd.Series, levels: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Small-int codes (-1 for missing) and the label vocabulary.
+
+    Known levels keep their order; unexpected labels are appended after them.
+    """
+    present = values.dropna().astype(str)
+    vocabulary = list(levels or [])
+    vocabulary += sorted(set(present.unique()) - set(vocabulary))
+    lookup = {label: code for code, label in enumerate(vocabulary)}
+    codes = values.map(lambda v: lookup.get(str(v), -1) if pd.notna(v) else -1).to_numpy()
+    dtype = np.int8 if len(vocabulary) < 127 else np.int16
+    return codes.astype(dtype), np.array(vocabulary, dtype=str)
+
+
+class DecisionDataset:
+    """Columnar, memory-compact view of decision_database_main.csv.
+
+    Labels are small-int codes with vocabularies, numeric features a dense
+    float32 block, and the wide, mostly empty criteria columns a CSR float32
+    matrix. The arrays are cached as one .npz artifact next to the data.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.ids = arrays["ids"]
+        self.created_at = arrays["created_at"]
+        self.labels = {name: arrays[f"label:{name}"] for name in ID_COLUMNS}
+        self.label_vocabularies = {name: arrays[f"vocab:{name}"] for name in ID_COLUMNS}
+        self.numeric_columns = list(arrays["numeric_columns"])
+        self.numeric = arrays["numeric"]
+        self.factor_columns = list(arrays["factor_columns"])
+        self.factors = arrays["factors"]
+        self.factor_vocabularies = {name: arrays[f"vocab:{name}"] for name in self.factor_columns}
+        self.criteria_names = list(arrays["criteria_names"])
+        self.criteria = sparse.csr_matrix(
+            (arrays["criteria_data"], arrays["criteria_indices"], arrays["criteria_indptr"]),
+            shape=(self.ids.size, len(self.criteria_names))
+        )
+
+    def __len__(self) -> int:
+        return self.ids.size
+
+    @classmethod
+    def from_csv(cls, csv_path: Path) -> "DecisionDataset":
+        frame = pd.read_csv(csv_path)
+        arrays: Dict[str, np.ndarray] = {
+            "ids": frame["ID"].to_numpy(dtype=np.int32),
+            "created_at": pd.to_datetime(frame["Дата_создания"]).to_numpy().astype("datetime64[s]")
+        }
+
+        for name in ID_COLUMNS:
+            arrays[f"label:{name}"], arrays[f"vocab:{name}"] = _encode(frame[name])
+
+        arrays["numeric_columns"] = np.array(NUMERIC_COLUMNS, dtype=str)
+        arrays["numeric"] = frame[NUMERIC_COLUMNS].to_numpy(dtype=np.float32)
+
+        factor_columns = [c for c in FACTOR_LEVELS if c in frame.columns]
+        arrays["factor_columns"] = np.array(factor_columns, dtype=str)
+        factor_codes = []
+        for name in factor_columns:
+            codes, arrays[f"vocab:{name}"] = _encode(frame[name], FACTOR_LEVELS[name])
+            factor_codes.append(codes)
+        arrays["factors"] = np.stack(factor_codes, axis=1) if factor_codes else np.empty((len(frame), 0), dtype=np.int8)
+
+        criteria_columns = [c for c in frame.columns if c.startswith(CRITERION_PREFIX)]
+        arrays["criteria_names"] = np.array([c[len(CRITERION_PREFIX):] for c in criteria_columns], dtype=str)
+        values = frame[criteria_columns].to_numpy(dtype=np.float32)
+        rows, cols = np.nonzero(~np.isnan(values))
+        criteria = sparse.csr_matrix((values[rows, cols], (rows, cols)), shape=values.shape)
+        arrays["criteria_data"] = criteria.data
+        arrays["criteria_indices"] = criteria.indices
+        arrays["criteria_indptr"] = criteria.indptr
+
+        return cls(arrays)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {
+            "ids": self.ids,
+            "created_at": self.created_at,
+            "numeric_columns": np.array(self.numeric_columns, dtype=str),
+            "numeric": self.numeric,
+            "factor_columns": np.array(self.factor_columns, dtype=str),
+            "factors": self.factors,
+            "criteria_names": np.array(self.criteria_names, dtype=str),
+            "criteria_data": self.criteria.data,
+            "criteria_indices": self.criteria.indices,
+            "criteria_indptr": self.criteria.indptr
+        }
+        for name in ID_COLUMNS:
+            arrays[f"label:{name}"] = self.labels[name]
+            arrays[f"vocab:{name}"] = self.label_vocabularies[name]
+        for name in self.factor_columns:
+            arrays[f"vocab:{name}"] = self.factor_vocabularies[name]
+        return arrays
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays"""
+        return sum(a.nbytes for a in self.to_arrays().values())
+
+    def label(self, column: str, row: int) -> str:
+        """Decoded label of one row"""
+        return str(self.label_vocabularies[column][self.labels[column][row]])
+
+    def category_code(self, category: str) -> int:
+        """Code of a category label, -1 if unknown"""
+        matches = np.flatnonzero(self.label_vocabularies["Категория"] == category)
+        return int(matches[0]) if matches.size else -1
+
+    def category_block(self, category: str) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """Rows of one category with only its own criteria as a dense float32 block"""
+        rows = np.flatnonzero(self.labels["Категория"] == self.category_code(category))
+        subset = self.criteria[rows]
+        columns = np.unique(subset.indices)
+        return rows, [self.criteria_names[c] for c in columns], subset[:, columns].toarray()
+
+    def scenario_tensor(self) -> Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray]:
+        """Scenarios stacked as (B, m, n_criteria) float32, NaN-padded.
+
+        Same layout as decision_engines.scenario_tensor, built from codes
+        without touching pandas. Returns (category, scenario) keys, the
+        alternative ids per scenario (-1 for padding) and the tensor.
+        """
+        categories = self.labels["Категория"].astype(np.int64)
+        scenarios = self.labels["Сценарий"].astype(np.int64)
+        pairs, group = np.unique(
+            categories * len(self.label_vocabularies["Сценарий"]) + scenarios, return_inverse=True
+        )
+
+        order = np.argsort(group, kind="stable")
+        starts = np.searchsorted(group[order], np.arange(pairs.size))
+        position = np.empty_like(group)
+        position[order] = np.arange(group.size) - starts[group[order]]
+
+        n_alternatives = int(position.max()) + 1 if position.size else 0
+        tensor = np.full((pairs.size, n_alternatives, len(self.criteria_names)), np.nan, dtype=np.float32)
+        ids = np.full((pairs.size, n_alternatives), -1, dtype=np.int64)
+        coo = self.criteria.tocoo()
+        tensor[group[coo.row], position[coo.row], coo.col] = coo.data
+        ids[group, position] = self.ids
+
+        first = order[starts]
+        keys = [(self.label("Категория", r), self.label("Сценарий", r)) for r in first]
+        return keys, ids, tensor
+
+
+def load_decision_dataset(csv_path: Path = DEFAULT_CSV_PATH,
+                          cache_dir: Optional[Path] = DEFAULT_CACHE_DIR) -> DecisionDataset:
+    """Load the dataset from the cached artifact, rebuilding it when the CSV changed"""
+    csv_path = Path(csv_path)
+    stat = os.stat(csv_path)
+    signature = np.array([CACHE_FORMAT_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    cache_path = Path(cache_dir) / f"{csv_path.stem}.npz" if cache_dir else None
+    if cache_path is not None and cache_path.exists():
+        try:
+            with np.load(cache_path, allow_pickle=False) as cached:
+                if np.array_equal(cached["signature"], signature):
+                    return DecisionDataset({key: cached[key] for key in cached.files})
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable dataset cache {cache_path}: {e}")
+
+    dataset = DecisionDataset.from_csv(csv_path)
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp.npz")
+            np.savez(tmp_path, signature=signature, **dataset.to_arrays())
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write dataset cache {cache_path}: {e}")
+    return dataset
+
+
+@lru_cache(maxsize=1)
+def get_decision_dataset() -> DecisionDataset:
+    """Process-wide dataset, loaded on first use"""
+    return load_decision_dataset()
@@ -0,0 +1,132 @@
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+CRITERION_PREFIX = "Критерий_"
+
+# Saaty's random consistency index by matrix order
+RANDOM_INDEX = np.array([0.0, 0.0, 0.0, 0.58, 0.90, 1.12, 1.24, 1.32, 1.41, 1.45, 1.49, 1.51, 1.48, 1.56, 1.57, 1.59])
+
+# Judgements are usually accepted below this consistency ratio
+CONSISTENCY_THRESHOLD = 0.1
+
+
+def ahp_priorities(pairwise: np.ndarray, method: str = "eigenvector") -> Tuple[np.ndarray, np.ndarray]:
+    """AHP priority vectors and consistency ratios for a batch of problems.
+
+    pairwise has shape (B, n, n) (or (n, n) for a single problem) of positive
+    reciprocal comparison matrices. method is "eigenvector" (principal
+    eigenvector, Saaty) or "geometric_mean" (row geometric means). Returns
+    weights of shape (B, n) summing to 1 and consistency ratios of shape (B,).
+    """
+    pairwise = np.asarray(pairwise, dtype=np.float64)
+    single = pairwise.ndim == 2
+    if single:
+        pairwise = pairwise[np.newaxis]
+    n = pairwise.shape[-1]
+
+    if method == "eigenvector":
+        eigenvalues, eigenvectors = np.linalg.eig(pairwise)
+        principal = np.argmax(eigenvalues.real, axis=1)
+        rows = np.arange(pairwise.shape[0])
+        lambda_max = eigenvalues.real[rows, principal]
+        weights = np.abs(eigenvectors.real[rows, :, principal])
+    elif method == "geometric_mean":
+        weights = np.exp(np.log(pairwise).mean(axis=2))
+        weights_sum = weights.sum(axis=1, keepdims=True)
+        lambda_max = ((pairwise @ (weights / weights_sum)[..., np.newaxis])[..., 0]
+                      / (weights / weights_sum)).mean(axis=1)
+    else:
+        raise ValueError(f"Unknown AHP method: {method}")
+
+    weights = weights / weights.sum(axis=1, keepdims=True)
+
+    random_index = RANDOM_INDEX[n] if n < RANDOM_INDEX.size else RANDOM_INDEX[-1]
+    if random_index > 0:
+        consistency_ratio = (lambda_max - n) / (n - 1) / random_index
+    else:
+        # Matrices of order 1 and 2 are always consistent
+        consistency_ratio = np.zeros(pairwise.shape[0])
+    consistency_ratio = np.maximum(consistency_ratio, 0.0)
+
+    if single:
+        return weights[0], consistency_ratio[0]
+    return weights, consistency_ratio
+
+
+def topsis_closeness(matrix: np.ndarray,
+                     weights: np.ndarray,
+                     benefit: Optional[np.ndarray] = None) -> np.ndarray:
+    """TOPSIS relative closeness to the ideal solution for a batch of problems.
+
+    matrix has shape (B, m, n): m alternatives by n criteria per problem
+    (or (m, n) for one problem). NaN marks padding: a criterion that is NaN
+    for every alternative does not take part, and an alternative whose row
+    is all NaN gets a NaN score. weights is (n,) or (B, n); benefit is a
+    boolean mask of the same shape where False marks cost criteria
+    (default: all benefit). Returns closeness scores of shape (B, m).
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    single = matrix.ndim == 2
+    if single:
+        matrix = matrix[np.newaxis]
+    batch, _, n = matrix.shape
+
+    weights = np.broadcast_to(np.asarray(weights, dtype=np.float64), (batch, n))
+    if benefit is None:
+        benefit = np.ones((batch, n), dtype=bool)
+    benefit = np.broadcast_to(np.asarray(benefit, dtype=bool), (batch, n))
+
+    present = ~np.isnan(matrix)
+    valid_rows = present.any(axis=2)
+    active = present.any(axis=1)
+    values = np.where(present, matrix, 0.0)
+
+    # Renormalize weights over the criteria each problem actually uses
+    weights = np.where(active, weights, 0.0)
+    weight_sum = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, weight_sum, out=np.zeros_like(weights), where=weight_sum > 0)
+
+    # Vector normalization per criterion, then weighting
+    norms = np.sqrt((values ** 2).sum(axis=1, keepdims=True))
+    weighted = np.divide(values, norms, out=np.zeros_like(values), where=norms > 0) * weights[:, np.newaxis, :]
+
+    upper = np.where(present, weighted, -np.inf).max(axis=1)
+    lower = np.where(present, weighted, np.inf).min(axis=1)
+    upper = np.where(active, upper, 0.0)
+    lower = np.where(active, lower, 0.0)
+    ideal = np.where(benefit, upper, lower)[:, np.newaxis, :]
+    anti_ideal = np.where(benefit, lower, upper)[:, np.newaxis, :]
+
+    distance_ideal = np.sqrt(((weighted - ideal) ** 2 * present).sum(axis=2))
+    distance_anti = np.sqrt(((weighted - anti_ideal) ** 2 * present).sum(axis=2))
+    total = distance_ideal + distance_anti
+
+    # Identical alternatives are equally close to both solutions
+    closeness = np.divide(distance_anti, total, out=np.full_like(total, 0.5), where=total > 0)
+    closeness = np.where(valid_rows, closeness, np.nan)
+
+    return closeness[0] if single else closeness
+
+
+def scenario_tensor(frame: pd.DataFrame) -> Tuple[List[Tuple[str, str]], List[str], np.ndarray, np.ndarray]:
+    """Stack the scenarios of decision_database_main.csv into one batch.
+
+    Returns the (category, scenario) keys, the criterion names, the
+    alternative ids as a (B, m) array (-1 for padding) and a
+    (B, m, n_criteria) decision tensor padded with NaN, ready for
+    topsis_closeness.
+    """
+    criteria = [c for c in frame.columns if c.startswith(CRITERION_PREFIX)]
+    groups = frame.groupby(["Категория", "Сценарий"], sort=True)
+    keys = list(groups.groups.keys())
+    max_alternatives = int(groups.size().max()) if keys else 0
+
+    tensor = np.full((len(keys), max_alternatives, len(criteria)), np.nan)
+    ids = np.full((len(keys), max_alternatives), -1, dtype=np.int64)
+    group_index = groups.ngroup().to_numpy()
+    position = groups.cumcount().to_numpy()
+    tensor[group_index, position] = frame[criteria].to_numpy(dtype=np.float64)
+    ids[group_index, position] = frame["ID"].to_numpy()
+
+    return keys, [c[len(CRITERION_PREFIX):] for c in criteria], ids, tensor
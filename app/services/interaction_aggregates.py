@@ -0,0 +1,281 @@
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal, redis_client
+from app.models.user import POSITIVE_INTERACTION_TYPES, POSITIVE_MIN_RATING, UserInteraction
+from app.repositories.interactions import positive_signal
+
+# Half-lives per landmark epoch: stored factors stay below 2 ** 32
+EPOCH_HALF_LIVES = 32
+
+# Rows behind the watermark re-read on every catch-up, for inserts that commit out of id order
+CATCH_UP_OVERLAP = 1000
+
+
+def event_weight(interaction_type: str, rating: Optional[int]) -> float:
+    """Strength of a positive signal, rating / 5; 0 for events that are not positive.
+
+    Same rule as the collaborative filter always used (positive_signal): a like
+    or purchase rated at least POSITIVE_MIN_RATING. Unrated events do not count.
+    """
+    if interaction_type not in POSITIVE_INTERACTION_TYPES or rating is None:
+        return 0.0
+    return rating / 5.0 if rating >= POSITIVE_MIN_RATING else 0.0
+
+
+class InteractionAggregates:
+    """Exponentially decayed per-user and per-item interaction aggregates.
+
+    Uses forward decay: every event is stored as w * exp(lambda * (t - L))
+    relative to a landmark L, so an update is a single O(1) increment.
+    Reading multiplies by exp(-lambda * (now - L)), which also keeps rankings
+    comparable between users and items.
+
+    The landmark is re-based every EPOCH_HALF_LIVES half-lives: each epoch
+    writes to its own keys with L at the epoch start, so stored factors never
+    exceed 2 ** EPOCH_HALF_LIVES. Reads add the previous epoch rescaled to
+    now; older epochs contribute less than 2 ** -EPOCH_HALF_LIVES of their
+    weight and simply expire. No stored value is ever rewritten.
+
+    Every writer of user_interactions is covered by a periodic catch-up that
+    folds in the positive rows above a watermark id, so the aggregates follow
+    the database rather than any one API route.
+
+    Redis layout (e = epoch number):
+        agg:{e}:user:{user_id}   hash   item_id -> decayed weight
+        agg:{e}:item:{item_id}   zset   user_id -> decayed weight
+        agg:watermark            string highest user_interactions id folded in
+        agg:seen                 zset   ids folded in within CATCH_UP_OVERLAP of the watermark
+    """
+
+    def __init__(self, redis, half_life_days: float, landmark: datetime, prefix: str = "agg",
+                 sync_interval: int = 60, max_similar_items: int = 100,
+                 session_factory=SessionLocal):
+        self.redis = redis
+        self.decay_rate = math.log(2) / (half_life_days * 86400.0)
+        self.landmark = landmark.timestamp()
+        self.epoch_seconds = EPOCH_HALF_LIVES * half_life_days * 86400.0
+        self.prefix = prefix
+        self.sync_interval = sync_interval
+        self.max_similar_items = max_similar_items
+        self.session_factory = session_factory
+        self.clock = time.time
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Keep the aggregates in step with user_interactions in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.ensure_built)
+                await loop.run_in_executor(None, self.catch_up)
+            except Exception as e:
+                logger.error(f"Interaction aggregates catch-up failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def _user_key(self, epoch: int, user_id: int) -> str:
+        return f"{self.prefix}:{epoch}:user:{user_id}"
+
+    def _item_key(self, epoch: int, item_id: int) -> str:
+        return f"{self.prefix}:{epoch}:item:{item_id}"
+
+    def epoch(self, now: float) -> int:
+        return max(int((now - self.landmark) // self.epoch_seconds), 0)
+
+    def _epoch_start(self, epoch: int) -> float:
+        return self.landmark + epoch * self.epoch_seconds
+
+    def _read_epochs(self, now: float) -> List[Tuple[int, float]]:
+        """(epoch, factor turning its stored values into current decayed values), newest first"""
+        current = self.epoch(now)
+        return [
+            (epoch, math.exp(-self.decay_rate * (now - self._epoch_start(epoch))))
+            for epoch in (current, current - 1) if epoch >= 0
+        ]
+
+    def record(self, user_id: int, item_id: int, interaction_type: str,
+               rating: Optional[int] = None, timestamp: Optional[datetime] = None, pipe=None):
+        """Fold one interaction event into the aggregates in O(1)"""
+        weight = event_weight(interaction_type, rating)
+        if weight <= 0:
+            return
+        now = self.clock()
+        epoch = self.epoch(now)
+        # Future-dated events count as now; old ones underflow towards 0
+        t = min(timestamp.timestamp(), now) if timestamp else now
+        value = weight * math.exp(self.decay_rate * (t - self._epoch_start(epoch)))
+        # Keys are read until the end of the next epoch
+        expires_at = int(self._epoch_start(epoch + 2)) + 1
+
+        target = pipe if pipe is not None else self.redis.pipeline(transaction=False)
+        user_key, item_key = self._user_key(epoch, user_id), self._item_key(epoch, item_id)
+        target.hincrbyfloat(user_key, str(item_id), value)
+        target.zincrby(item_key, value, str(user_id))
+        target.expireat(user_key, expires_at)
+        target.expireat(item_key, expires_at)
+        if pipe is None:
+            target.execute()
+
+    def user_items(self, user_id: int) -> Dict[int, float]:
+        """Current decayed weight of every item the user interacted with"""
+        epochs = self._read_epochs(self.clock())
+        pipe = self.redis.pipeline(transaction=False)
+        for epoch, _ in epochs:
+            pipe.hgetall(self._user_key(epoch, user_id))
+
+        items: Dict[int, float] = {}
+        for (_, factor), raw in zip(epochs, pipe.execute()):
+            for item_id, value in raw.items():
+                items[int(item_id)] = items.get(int(item_id), 0.0) + float(value) * factor
+        return items
+
+    def similar_users(self, user_id: int, limit: int = 10) -> List[int]:
+        """Users with the largest decayed co-interaction mass with this user,
+        over the user's max_similar_items strongest items"""
+        epochs = self._read_epochs(self.clock())
+        items = self.user_items(user_id)
+        if not items:
+            return []
+        if len(items) > self.max_similar_items:
+            items = dict(sorted(items.items(), key=lambda kv: kv[1], reverse=True)[:self.max_similar_items])
+
+        # Weighted union of the item -> users sets of both epochs, computed inside Redis
+        weights = {
+            self._item_key(epoch, item_id): value * factor
+            for epoch, factor in epochs for item_id, value in items.items()
+        }
+        tmp_key = f"{self.prefix}:tmp:similar:{user_id}"
+        pipe = self.redis.pipeline()
+        pipe.zunionstore(tmp_key, weights)
+        pipe.zrem(tmp_key, str(user_id))
+        pipe.zrevrange(tmp_key, 0, limit - 1)
+        pipe.delete(tmp_key)
+        _, _, similar, _ = pipe.execute()
+
+        return [int(u) for u in similar]
+
+    def ensure_built(self):
+        """Bootstrap from the database once, on first start against an empty Redis"""
+        if not self.redis.exists(f"{self.prefix}:built"):
+            self.rebuild_from_db()
+
+    def _fold_rows(self, rows, pipe, seen_after: int = 0) -> int:
+        count = 0
+        for row in rows:
+            timestamp = row.timestamp
+            if timestamp is not None and timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            self.record(row.user_id, row.item_id, row.interaction_type, row.rating, timestamp, pipe=pipe)
+            if row.id > seen_after:
+                pipe.zadd(f"{self.prefix}:seen", {str(row.id): row.id})
+            count += 1
+        return count
+
+    def catch_up(self, batch_size: int = 10000) -> int:
+        """Fold in positive user_interactions rows written since the watermark.
+
+        The last CATCH_UP_OVERLAP ids below the watermark are re-read and
+        skipped if already seen, so rows whose insert commits after a higher id
+        are not lost. Increments, seen ids and the new watermark go in one
+        MULTI/EXEC; a Redis lock keeps concurrent workers from folding the
+        same rows twice.
+        """
+        lock_key = f"{self.prefix}:catch_up:lock"
+        if not self.redis.set(lock_key, "1", nx=True, ex=300):
+            return 0
+        db = self.session_factory()
+        total = 0
+        try:
+            watermark = int(self.redis.get(f"{self.prefix}:watermark") or 0)
+            after = max(watermark - CATCH_UP_OVERLAP, 0)
+            seen = {int(i) for i in self.redis.zrangebyscore(f"{self.prefix}:seen", after + 1, "+inf")}
+            while True:
+                rows = db.execute(
+                    select(
+                        UserInteraction.id, UserInteraction.user_id, UserInteraction.item_id,
+                        UserInteraction.interaction_type, UserInteraction.rating, UserInteraction.timestamp
+                    ).where(UserInteraction.id > after, positive_signal()).order_by(UserInteraction.id).limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                after = rows[-1].id
+                new = [row for row in rows if row.id not in seen]
+                if new:
+                    watermark = max(watermark, new[-1].id)
+                    pipe = self.redis.pipeline(transaction=True)
+                    total += self._fold_rows(new, pipe)
+                    pipe.set(f"{self.prefix}:watermark", watermark)
+                    pipe.zremrangebyscore(f"{self.prefix}:seen", "-inf", watermark - CATCH_UP_OVERLAP)
+                    pipe.execute()
+                if len(rows) < batch_size:
+                    break
+            if total:
+                logger.info(f"Interaction aggregates caught up {total} events")
+            return total
+        finally:
+            db.close()
+            self.redis.delete(lock_key)
+
+    def rebuild_from_db(self, batch_size: int = 10000):
+        """One-off bootstrap of the aggregates from user_interactions; later rows
+        are left to catch_up"""
+        db = self.session_factory()
+        try:
+            for pattern in (f"{self.prefix}:*:user:*", f"{self.prefix}:*:item:*"):
+                for key in self.redis.scan_iter(match=pattern, count=1000):
+                    self.redis.delete(key)
+            self.redis.delete(f"{self.prefix}:seen")
+
+            # Rows above this id are inserted during the rebuild: catch_up folds them in
+            watermark = db.execute(select(UserInteraction.id).order_by(UserInteraction.id.desc()).limit(1)).scalar() or 0
+            query = db.query(
+                UserInteraction.id, UserInteraction.user_id, UserInteraction.item_id,
+                UserInteraction.interaction_type, UserInteraction.rating, UserInteraction.timestamp
+            ).filter(positive_signal(), UserInteraction.id <= watermark).yield_per(batch_size)
+
+            count = 0
+            batch = []
+            for row in query:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    pipe = self.redis.pipeline(transaction=False)
+                    count += self._fold_rows(batch, pipe, seen_after=watermark - CATCH_UP_OVERLAP)
+                    pipe.execute()
+                    batch = []
+            pipe = self.redis.pipeline(transaction=False)
+            count += self._fold_rows(batch, pipe, seen_after=watermark - CATCH_UP_OVERLAP)
+            pipe.set(f"{self.prefix}:watermark", watermark)
+            pipe.set(f"{self.prefix}:built", datetime.now(timezone.utc).isoformat())
+            pipe.execute()
+
+            logger.info(f"Interaction aggregates rebuilt from {count} events")
+        finally:
+            db.close()
+
+
+# Global instance
+interaction_aggregates = InteractionAggregates(
+    redis_client,
+    half_life_days=settings.INTERACTION_HALF_LIFE_DAYS,
+    landmark=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    sync_interval=settings.INTERACTION_AGGREGATES_SYNC_INTERVAL
+)
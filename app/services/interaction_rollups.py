@@ -0,0 +1,305 @@
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy import Date, delete, func, insert, literal, select, text
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.partitions import (
+    add_months, create_month_partitions, default_partition_name, drop_partition, is_partitioned,
+    list_partitions, month_start
+)
+from app.models.user import ItemInteractionDaily, UserInteraction, UserInteractionDaily
+from app.repositories import interactions as interaction_repo
+
+TABLE = UserInteraction.__tablename__
+
+
+def day_bounds(day: date):
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def utc_date(timestamp: datetime) -> date:
+    """UTC calendar day of a timestamp (naive timestamps are UTC, as SQLite stores them)"""
+    return (timestamp.astimezone(timezone.utc) if timestamp.tzinfo else timestamp).date()
+
+
+class InteractionMaintenance:
+    """Keeps user_interactions bounded in time.
+
+    Each run creates monthly partitions ahead of time (PostgreSQL), rolls up
+    complete UTC days into the per-user and per-item daily tables, and removes
+    raw events older than the retention period once their days are rolled up:
+    whole partitions are dropped on PostgreSQL, rows are deleted in batches
+    elsewhere.
+
+    Late or backfilled events can land on days that are already rolled up, so
+    every run re-summarizes the last `lookback_days` rolled-up days, and the
+    days about to be removed by retention are re-summarized once more first.
+    """
+
+    def __init__(self,
+                 interval: int,
+                 retention_days: int,
+                 months_ahead: int,
+                 lookback_days: int = 3,
+                 max_days_per_run: int = 31,
+                 delete_batch_size: int = 10000,
+                 db_engine=engine):
+        self.engine = db_engine
+        self.interval = interval
+        self.retention_days = retention_days
+        self.months_ahead = months_ahead
+        self.lookback_days = lookback_days
+        self.max_days_per_run = max_days_per_run
+        self.delete_batch_size = delete_batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"runs": 0, "days_rolled_up": 0, "days_resummarized": 0, "partitions_dropped": 0,
+                      "rows_deleted": 0}
+        self.last_run: Optional[datetime] = None
+        # Raw events before this day were deleted by retention (unpartitioned tables)
+        self.expired_before: Optional[date] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.run_once)
+            except Exception as e:
+                logger.error(f"Interaction maintenance failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def run_once(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Partitions, rollups and retention up to (not including) `today`"""
+        today = today or datetime.now(timezone.utc).date()
+        partitions = self.ensure_partitions(today)
+        resummarized = self.resummarize_recent(today)
+        rolled = self.rollup_pending(today)
+        removed = self.apply_retention(today)
+        self.stats["runs"] += 1
+        self.last_run = datetime.now(timezone.utc)
+        logger.info(f"Interaction maintenance: {len(partitions)} partitions ensured, "
+                    f"{resummarized} days re-summarized, {rolled} days rolled up, "
+                    f"{removed} expired partitions/rows removed")
+        return {"partitions": partitions, "days_resummarized": resummarized, "days_rolled_up": rolled,
+                "removed": removed}
+
+    def ensure_partitions(self, today: date):
+        """Monthly partitions from the current month to `months_ahead` months ahead"""
+        with self.engine.begin() as conn:
+            if not is_partitioned(conn, TABLE):
+                return []
+            first = month_start(today)
+            return create_month_partitions(conn, TABLE, first, add_months(first, self.months_ahead))
+
+    def rollup_day(self, conn, day: date):
+        """(Re)compute both daily rollups for one day"""
+        start, end = day_bounds(day)
+        in_day = (UserInteraction.timestamp >= start, UserInteraction.timestamp < end)
+        for rollup, keys in ((UserInteractionDaily, (UserInteraction.user_id, UserInteraction.item_id)),
+                             (ItemInteractionDaily, (UserInteraction.item_id,))):
+            conn.execute(delete(rollup).where(rollup.day == day))
+            aggregated = select(
+                literal(day, Date), *keys, UserInteraction.interaction_type,
+                func.count(), func.coalesce(func.sum(UserInteraction.rating), 0), func.count(UserInteraction.rating)
+            ).where(*in_day).group_by(*keys, UserInteraction.interaction_type)
+            conn.execute(insert(rollup).from_select(
+                ["day", *(key.key for key in keys), "interaction_type", "events", "rating_sum", "rating_count"],
+                aggregated
+            ))
+
+    def rollup_range(self, first: date, end: date, partition: Optional[str] = None) -> int:
+        """Re-summarize every day in [first, end) that still has raw events
+        (looking for events only in `partition`, when given)"""
+        rolled = 0
+        since, until = day_bounds(first)[0], day_bounds(end)[0]
+        while True:
+            if partition is None:
+                statement = interaction_repo.first_event_statement(since, until)
+            else:
+                statement = text(
+                    f"SELECT min(timestamp) FROM {partition} WHERE timestamp >= :since AND timestamp < :until"
+                ).bindparams(since=since, until=until)
+            with self.engine.begin() as conn:
+                first_event = conn.execute(statement).scalar()
+                if first_event is None:
+                    break
+                day = utc_date(first_event)
+                self.rollup_day(conn, day)
+            rolled += 1
+            since = day_bounds(day + timedelta(days=1))[0]
+        return rolled
+
+    def resummarize_recent(self, today: date) -> int:
+        """Re-summarize the last `lookback_days` rolled-up days, picking up late events.
+
+        Only days whose raw events are all still retained are touched, so a
+        partly expired day keeps its rollup.
+        """
+        if self.lookback_days <= 0:
+            return 0
+        with self.engine.connect() as conn:
+            rolled_through = conn.execute(interaction_repo.rolled_through_statement()).scalar()
+        if rolled_through is None:
+            return 0
+        first = rolled_through - timedelta(days=self.lookback_days - 1)
+        if self.retention_days > 0:
+            first = max(first, today - timedelta(days=self.retention_days))
+        resummarized = self.rollup_range(first, rolled_through + timedelta(days=1))
+        self.stats["days_resummarized"] += resummarized
+        return resummarized
+
+    def rollup_pending(self, today: date) -> int:
+        """Roll up complete days after the last rolled-up one, skipping days without events"""
+        rolled = 0
+        with self.engine.connect() as conn:
+            rolled_through = conn.execute(interaction_repo.rolled_through_statement()).scalar()
+        next_day = rolled_through + timedelta(days=1) if rolled_through else None
+
+        while rolled < self.max_days_per_run:
+            with self.engine.begin() as conn:
+                since = day_bounds(next_day)[0] if next_day else None
+                first_event = conn.execute(interaction_repo.first_event_statement(since)).scalar()
+                if first_event is None or utc_date(first_event) >= today:
+                    break
+                day = utc_date(first_event)
+                self.rollup_day(conn, day)
+            rolled += 1
+            next_day = day + timedelta(days=1)
+
+        self.stats["days_rolled_up"] += rolled
+        return rolled
+
+    def merge_late_events(self, conn, until: datetime, partition: Optional[str] = None) -> int:
+        """Add raw events before `until` to the rollups of their (already expired) days
+        and delete them. Their days lost earlier raw events to retention, so the
+        rollups are added to rather than recomputed."""
+        if partition is None:
+            events = conn.execute(select(
+                UserInteraction.user_id, UserInteraction.item_id, UserInteraction.interaction_type,
+                UserInteraction.rating, UserInteraction.timestamp
+            ).where(UserInteraction.timestamp < until)).all()
+        else:
+            events = conn.execute(text(
+                f"SELECT user_id, item_id, interaction_type, rating, timestamp FROM {partition} "
+                "WHERE timestamp < :until"
+            ), {"until": until}).all()
+        if not events:
+            return 0
+
+        totals: Dict[tuple, list] = {}
+        for user_id, item_id, interaction_type, rating, timestamp in events:
+            day = utc_date(timestamp)
+            for key in ((UserInteractionDaily, day, user_id, item_id, interaction_type),
+                        (ItemInteractionDaily, day, item_id, interaction_type)):
+                counts = totals.setdefault(key, [0, 0, 0])
+                counts[0] += 1
+                counts[1] += rating or 0
+                counts[2] += rating is not None
+
+        for (rollup, day, *ids), (events_count, rating_sum, rating_count) in totals.items():
+            keys = dict(zip(["user_id", "item_id"] if rollup is UserInteractionDaily else ["item_id"], ids[:-1]))
+            match = [rollup.day == day, rollup.interaction_type == ids[-1],
+                     *(getattr(rollup, name) == value for name, value in keys.items())]
+            updated = conn.execute(rollup.__table__.update().where(*match).values(
+                events=rollup.events + events_count,
+                rating_sum=rollup.rating_sum + rating_sum,
+                rating_count=rollup.rating_count + rating_count
+            )).rowcount
+            if not updated:
+                conn.execute(insert(rollup).values(
+                    day=day, interaction_type=ids[-1], events=events_count,
+                    rating_sum=rating_sum, rating_count=rating_count, **keys
+                ))
+
+        if partition is None:
+            conn.execute(delete(UserInteraction).where(UserInteraction.timestamp < until))
+        else:
+            conn.execute(text(f"DELETE FROM {partition} WHERE timestamp < :until"), {"until": until})
+        return len(events)
+
+    def apply_retention(self, today: date) -> int:
+        """Remove raw events older than the retention period that are already rolled up.
+        Returns the number of partitions dropped (PostgreSQL) or rows deleted.
+
+        Expiring days are re-summarized first, so events that arrived after
+        their day was rolled up are kept in the rollups. Events that arrive
+        for days already expired are added to those days' rollups instead:
+        on PostgreSQL they land in the DEFAULT partition (their monthly
+        partition is gone); elsewhere they are the raw rows older than the
+        previous run's cutoff, which is known only within one process.
+        """
+        if self.retention_days <= 0:
+            return 0
+        with self.engine.connect() as conn:
+            rolled_through = conn.execute(interaction_repo.rolled_through_statement()).scalar()
+        if rolled_through is None:
+            return 0
+        cutoff = min(today - timedelta(days=self.retention_days), rolled_through + timedelta(days=1))
+        cutoff_start = day_bounds(cutoff)[0]
+
+        with self.engine.connect() as conn:
+            partitioned = is_partitioned(conn, TABLE)
+            expiring = list_partitions(conn, TABLE) if partitioned else []
+
+        if partitioned:
+            expiring = [(name, month) for name, month in expiring if add_months(month, 1) <= cutoff]
+            for name, month in expiring:
+                self.stats["days_resummarized"] += self.rollup_range(month, add_months(month, 1), name)
+            with self.engine.begin() as conn:
+                for name, _ in expiring:
+                    drop_partition(conn, TABLE, name)
+                # Stray out-of-range rows in the DEFAULT partition expire row by row
+                deleted = self.merge_late_events(conn, cutoff_start, default_partition_name(TABLE))
+            self.stats["partitions_dropped"] += len(expiring)
+            self.stats["rows_deleted"] += deleted
+            return len(expiring)
+
+        removed = 0
+        if self.expired_before is not None:
+            with self.engine.begin() as conn:
+                removed += self.merge_late_events(conn, day_bounds(self.expired_before)[0])
+        with self.engine.connect() as conn:
+            oldest = conn.execute(interaction_repo.first_event_statement(until=cutoff_start)).scalar()
+        if oldest is not None:
+            self.stats["days_resummarized"] += self.rollup_range(utc_date(oldest), cutoff)
+
+        while True:
+            with self.engine.begin() as conn:
+                batch = select(UserInteraction.id).where(
+                    UserInteraction.timestamp < cutoff_start
+                ).limit(self.delete_batch_size)
+                deleted = conn.execute(delete(UserInteraction).where(UserInteraction.id.in_(batch))).rowcount
+            removed += deleted
+            if deleted < self.delete_batch_size:
+                break
+        self.expired_before = max(self.expired_before or cutoff, cutoff)
+        self.stats["rows_deleted"] += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "last_run": self.last_run.isoformat() if self.last_run else None}
+
+
+# Global instance
+interaction_maintenance = InteractionMaintenance(
+    interval=settings.INTERACTION_MAINTENANCE_INTERVAL,
+    retention_days=settings.INTERACTION_RETENTION_DAYS,
+    months_ahead=settings.INTERACTION_PARTITION_MONTHS_AHEAD,
+    lookback_days=settings.INTERACTION_ROLLUP_LOOKBACK_DAYS
+)
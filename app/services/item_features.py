@@ -0,0 +1,234 @@
+import zlib
+from typing import Any, Dict, List, Optional
+import numpy as np
+from scipy import sparse
+from loguru import logger
+
+from app.core.database import SessionLocal
+from app.models.choice import Item
+from app.services.cache_service import response_cache, CATALOG_VERSION
+from app.services.ranking import top_k_indices
+
+# Preference weights, matching the original per-item scoring rules
+CATEGORY_WEIGHT = 0.3
+HIGH_RATING_WEIGHT = 0.2
+PRICE_WEIGHT = 0.1
+ATTRIBUTE_WEIGHT = 0.1
+HIGH_RATING_THRESHOLD = 4.0
+
+
+def _attribute_column(key: str, value: Any, n_buckets: int) -> int:
+    """Stable hash of a key=value pair (Python's hash() is salted per process)"""
+    return zlib.crc32(f"{key}={value}".encode("utf-8")) % n_buckets
+
+
+class ItemFeatureSnapshot:
+    """One build of the feature matrix and its per-item arrays.
+
+    Never modified after construction: refresh builds a new snapshot in an
+    executor thread and publishes it with a single reference assignment, so
+    readers on the event loop always see arrays of one build.
+    """
+
+    def __init__(self,
+                 n_price_buckets: int,
+                 n_attribute_buckets: int,
+                 matrix: Optional[sparse.csr_matrix] = None,
+                 item_ids: Optional[np.ndarray] = None,
+                 prices: Optional[np.ndarray] = None,
+                 ratings: Optional[np.ndarray] = None,
+                 category_ids: Optional[np.ndarray] = None,
+                 item_categories: Optional[np.ndarray] = None,
+                 price_edges: Optional[np.ndarray] = None,
+                 catalog_version: Optional[str] = None):
+        self.n_price_buckets = n_price_buckets
+        self.n_attribute_buckets = n_attribute_buckets
+        self.matrix = matrix
+        self.item_ids = item_ids if item_ids is not None else np.empty(0, dtype=np.int64)
+        self.prices = prices if prices is not None else np.empty(0)
+        self.ratings = ratings if ratings is not None else np.empty(0)
+        self.category_ids = category_ids if category_ids is not None else np.empty(0, dtype=np.int64)
+        self.item_categories = item_categories if item_categories is not None else np.empty(0, dtype=np.int64)
+        self.price_edges = price_edges if price_edges is not None else np.empty(0)
+        self.catalog_version = catalog_version
+
+    @property
+    def n_categories(self) -> int:
+        return self.category_ids.size
+
+    @property
+    def price_offset(self) -> int:
+        return self.n_categories
+
+    @property
+    def rating_offset(self) -> int:
+        return self.price_offset + self.n_price_buckets
+
+    @property
+    def attribute_offset(self) -> int:
+        return self.rating_offset + 1
+
+    @property
+    def n_features(self) -> int:
+        return self.attribute_offset + self.n_attribute_buckets
+
+
+class ItemFeatureMatrix:
+    """Precomputed sparse item feature matrix for content-based scoring.
+
+    Column layout: one-hot categories | price buckets | high-rating flag |
+    hashed attribute key=value features. A user preference vector in the
+    same space scores the whole catalog with one sparse matrix-vector product.
+    """
+
+    def __init__(self, n_price_buckets: int = 5, n_attribute_buckets: int = 1024):
+        self.n_price_buckets = n_price_buckets
+        self.n_attribute_buckets = n_attribute_buckets
+        self.snapshot = ItemFeatureSnapshot(n_price_buckets, n_attribute_buckets)
+
+    def refresh(self):
+        """Rebuild the matrix from the items table"""
+        version = response_cache.get_version(CATALOG_VERSION)
+        db = SessionLocal()
+        try:
+            items = db.query(
+                Item.id, Item.category_id, Item.price, Item.rating, Item.attributes
+            ).order_by(Item.id).all()
+        finally:
+            db.close()
+        self.snapshot = self.build(items, version)
+        logger.info(f"Item feature matrix built: {self.snapshot.item_ids.size} items x "
+                    f"{self.snapshot.n_features} features")
+
+    def build(self, items, version: Optional[str] = None) -> ItemFeatureSnapshot:
+        """Feature snapshot of (id, category_id, price, rating, attributes) rows ordered by id"""
+        item_ids = np.array([i.id for i in items], dtype=np.int64)
+        prices = np.array([i.price if i.price is not None else np.inf for i in items])
+        ratings = np.array([i.rating or 0.0 for i in items])
+        raw_categories = np.array([i.category_id if i.category_id is not None else -1 for i in items], dtype=np.int64)
+        category_ids, item_categories = np.unique(raw_categories, return_inverse=True)
+
+        # Offsets depend only on the category count
+        layout = ItemFeatureSnapshot(self.n_price_buckets, self.n_attribute_buckets, category_ids=category_ids)
+        n_items = item_ids.size
+        rows: List[np.ndarray] = []
+        cols: List[np.ndarray] = []
+
+        # One-hot categories
+        rows.append(np.arange(n_items))
+        cols.append(item_categories)
+
+        # Quantile price buckets
+        price_edges = np.empty(0)
+        finite = np.isfinite(prices)
+        if finite.any():
+            quantiles = np.linspace(0, 1, self.n_price_buckets + 1)[1:-1]
+            price_edges = np.quantile(prices[finite], quantiles)
+            buckets = np.searchsorted(price_edges, prices[finite], side="right")
+            rows.append(np.flatnonzero(finite))
+            cols.append(layout.price_offset + buckets)
+
+        # High-rating flag
+        high = np.flatnonzero(ratings >= HIGH_RATING_THRESHOLD)
+        rows.append(high)
+        cols.append(np.full(high.size, layout.rating_offset))
+
+        # Hashed attribute key=value pairs
+        attr_rows, attr_cols = [], []
+        for row, item in enumerate(items):
+            for key, value in (item.attributes or {}).items():
+                attr_rows.append(row)
+                attr_cols.append(layout.attribute_offset + _attribute_column(key, value, self.n_attribute_buckets))
+        rows.append(np.array(attr_rows, dtype=np.int64))
+        cols.append(np.array(attr_cols, dtype=np.int64))
+
+        all_rows = np.concatenate(rows)
+        all_cols = np.concatenate(cols)
+        matrix = sparse.csr_matrix(
+            (np.ones(all_rows.size, dtype=np.float32), (all_rows, all_cols)),
+            shape=(n_items, layout.n_features)
+        )
+        # Hash collisions within one item still count once
+        matrix.data = np.minimum(matrix.data, 1.0)
+
+        return ItemFeatureSnapshot(
+            self.n_price_buckets, self.n_attribute_buckets, matrix=matrix, item_ids=item_ids,
+            prices=prices, ratings=ratings, category_ids=category_ids, item_categories=item_categories,
+            price_edges=price_edges, catalog_version=version
+        )
+
+    def ensure_fresh(self):
+        """Rebuild when the catalog version has changed since the last build"""
+        snapshot = self.snapshot
+        if snapshot.matrix is None or snapshot.catalog_version != response_cache.get_version(CATALOG_VERSION):
+            self.refresh()
+
+    def user_vector(self,
+                    snapshot: ItemFeatureSnapshot,
+                    preferences: Dict[str, Any],
+                    liked_item_ids: Optional[List[int]] = None) -> np.ndarray:
+        """Project explicit preferences and liked items into the snapshot's feature space"""
+        vector = np.zeros(snapshot.n_features, dtype=np.float32)
+
+        preferred = np.isin(snapshot.category_ids, preferences.get("categories", []))
+        vector[:snapshot.n_categories][preferred] = CATEGORY_WEIGHT
+
+        vector[snapshot.rating_offset] = HIGH_RATING_WEIGHT
+
+        for key, value in (preferences.get("attributes") or {}).items():
+            vector[snapshot.attribute_offset + _attribute_column(key, value, snapshot.n_attribute_buckets)] += ATTRIBUTE_WEIGHT
+
+        # Price-bucket affinity learned from the user's liked items
+        if liked_item_ids:
+            rows = np.flatnonzero(np.isin(snapshot.item_ids, liked_item_ids))
+            if rows.size:
+                price_block = snapshot.matrix[rows, snapshot.price_offset:snapshot.rating_offset]
+                share = np.asarray(price_block.sum(axis=0)).ravel() / rows.size
+                vector[snapshot.price_offset:snapshot.rating_offset] = PRICE_WEIGHT * share
+
+        return vector
+
+    def score(self,
+              preferences: Dict[str, Any],
+              filters: Dict[str, Any],
+              limit: int,
+              liked_item_ids: Optional[List[int]] = None,
+              allowed_item_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Content scores for the full catalog, top-k as ranker candidates.
+
+        `allowed_item_ids` restricts candidates to ids already filtered in SQL
+        (e.g. by attribute containment). Reads only the published snapshot;
+        callers run `ensure_fresh` beforehand, off the event loop.
+        """
+        # One snapshot for the whole call; a concurrent refresh publishes a new one
+        snapshot = self.snapshot
+        if snapshot.item_ids.size == 0:
+            return []
+
+        scores = snapshot.matrix @ self.user_vector(snapshot, preferences, liked_item_ids)
+
+        if preferences.get("max_price") is not None:
+            scores += PRICE_WEIGHT * (snapshot.prices <= preferences["max_price"])
+
+        # Hard filters, as the SQL WHERE clauses did before
+        eligible = np.ones(snapshot.item_ids.size, dtype=bool)
+        if preferences.get("categories"):
+            preferred = np.isin(snapshot.category_ids, preferences["categories"])
+            eligible &= preferred[snapshot.item_categories]
+        if filters.get("max_price"):
+            eligible &= snapshot.prices <= filters["max_price"]
+        if filters.get("min_rating"):
+            eligible &= snapshot.ratings >= filters["min_rating"]
+        if allowed_item_ids is not None:
+            eligible &= np.isin(snapshot.item_ids, allowed_item_ids)
+
+        candidates = np.flatnonzero(eligible)
+        top = candidates[top_k_indices(scores[candidates], limit)]
+        return [
+            {"item_id": int(snapshot.item_ids[i]), "score": float(scores[i]), "source": "content"}
+            for i in top
+        ]
+
+
+# Global instance
+item_features = ItemFeatureMatrix()
@@ -0,0 +1,55 @@
+import zlib
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+
+def context_vector(features: Dict[str, Any], dim: int) -> np.ndarray:
+    """Hash categorical context features into a fixed-size unit vector.
+
+    Slot 0 is a constant bias term so every arm learns a context-free
+    baseline; crc32 keeps the hashing stable across processes.
+    """
+    x = np.zeros(dim)
+    x[0] = 1.0
+    for key, value in features.items():
+        if value is None:
+            continue
+        x[1 + zlib.crc32(f"{key}={value}".encode("utf-8")) % (dim - 1)] += 1.0
+    return x / np.linalg.norm(x)
+
+
+def initial_state(dim: int, regularization: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """A^-1 and b of an arm that has never been played (A = lambda * I)"""
+    return np.eye(dim) / regularization, np.zeros(dim)
+
+
+def sherman_morrison_update(a_inv: np.ndarray, b: np.ndarray, x: np.ndarray, reward: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Rank-one update of (A + x x^T)^-1 and b + r x in O(d^2)"""
+    a_inv_x = a_inv @ x
+    a_inv = a_inv - np.outer(a_inv_x, a_inv_x) / (1.0 + x @ a_inv_x)
+    return a_inv, b + reward * x
+
+
+def score_arms(a_inv: np.ndarray,
+               b: np.ndarray,
+               x: np.ndarray,
+               alpha: float,
+               strategy: str = "ucb",
+               rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Score every arm for one context in a single batched operation.
+
+    a_inv has shape (K, d, d) and b shape (K, d). Returns (scores,
+    expected rewards, uncertainty widths), each of shape (K,). With
+    strategy="thompson" the score is a draw from the posterior of x^T theta,
+    otherwise it is the LinUCB upper confidence bound.
+    """
+    theta = np.einsum("kij,kj->ki", a_inv, b)
+    expected = theta @ x
+    width = np.sqrt(np.maximum(np.einsum("i,kij,j->k", x, a_inv, x), 0.0))
+
+    if strategy == "thompson":
+        rng = rng or np.random.default_rng()
+        scores = expected + alpha * width * rng.standard_normal(expected.size)
+    else:
+        scores = expected + alpha * width
+    return scores, expected, width
@@ -195,5 +195,17 @@ class NLPProcessor:
             # Return zero vector as fallback
             return np.zeros(384)  # Default dimension for the model
 
+    def embed_batch(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Clean and embed many texts in one encoder call (no full NLP pass)"""
+        cleaned = [self._clean_text(text) for text in texts]
+        try:
+            return np.asarray(
+                self.embedder.encode(cleaned, batch_size=batch_size, convert_to_numpy=True),
+                dtype=np.float32
+            )
+        except Exception as e:
+            logger.error(f"Failed to generate batch embeddings: {e}")
+            return np.zeros((len(texts), 384), dtype=np.float32)
+
 # Global instance
 nlp_processor = NLPProcessor()
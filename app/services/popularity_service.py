@@ -0,0 +1,212 @@
+import asyncio
+import math
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.choice import Item
+from app.repositories import interactions as interaction_repo
+from app.services.ranking import top_k_indices
+
+# How much each interaction type contributes to an item's popularity
+INTERACTION_WEIGHTS = {
+    "view": 0.2,
+    "like": 1.0,
+    "rating": 1.0,
+    "purchase": 2.0,
+    "dislike": 0.0
+}
+
+# Bayesian average: ratings backed by fewer votes shrink towards the catalog mean
+RATING_PRIOR_COUNT = 10
+
+
+class PopularityService:
+    """Periodically refreshed in-memory popular and trending rankings per category.
+
+    Built from time-decayed counts over the daily interaction rollups (plus
+    raw user_interactions since the last rollup) and the items'
+    rating / rating_count. Serves as a cold-start candidate source and as a
+    cheap degraded mode when the full pipeline is unavailable or overloaded.
+    """
+
+    def __init__(self,
+                 refresh_interval: int,
+                 window_days: int,
+                 popular_half_life_days: float,
+                 trending_half_life_days: float,
+                 top_n: int = 100,
+                 session_factory=SessionLocal):
+        self.refresh_interval = refresh_interval
+        self.window_days = window_days
+        self.popular_half_life_days = popular_half_life_days
+        self.trending_half_life_days = trending_half_life_days
+        self.top_n = top_n
+        self.session_factory = session_factory
+        self._rankings: Dict[str, Dict[Optional[int], List[Dict]]] = {"popular": {}, "trending": {}}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshed_at: Optional[datetime] = None
+
+    async def start(self):
+        """Build the rankings and keep refreshing them in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.refresh)
+            except Exception as e:
+                logger.error(f"Popularity refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def refresh(self):
+        """Recompute popular and trending rankings from the database"""
+        now = datetime.now(timezone.utc)
+        window_start = now - timedelta(days=self.window_days)
+        db = self.session_factory()
+        try:
+            items = db.query(
+                Item.id, Item.name, Item.category_id, Item.price, Item.rating, Item.rating_count
+            ).order_by(Item.id).all()
+
+            # Complete days come from the per-item daily rollups; raw events are
+            # only read for the days after the last rollup
+            daily, raw_since = [], window_start
+            rolled_through = db.execute(interaction_repo.rolled_through_statement()).scalar()
+            if rolled_through is not None and rolled_through >= window_start.date():
+                daily = db.execute(interaction_repo.item_daily_statement(window_start.date(), rolled_through)).all()
+                raw_since = datetime.combine(rolled_through + timedelta(days=1), time.min, tzinfo=timezone.utc)
+            interactions = db.execute(interaction_repo.window_statement(raw_since)).all()
+        finally:
+            db.close()
+
+        if not items:
+            self._rankings = {"popular": {}, "trending": {}}
+            self.refreshed_at = now
+            return
+
+        item_ids = np.array([i.id for i in items], dtype=np.int64)
+        categories = np.array([i.category_id if i.category_id is not None else -1 for i in items])
+        ratings = np.array([i.rating or 0.0 for i in items])
+        rating_counts = np.array([i.rating_count or 0 for i in items], dtype=np.float64)
+
+        popular_mass = np.zeros(item_ids.size)
+        trending_mass = np.zeros(item_ids.size)
+        if daily or interactions:
+            event_items = np.array([r.item_id for r in daily] + [r.item_id for r in interactions], dtype=np.int64)
+            cols = np.clip(np.searchsorted(item_ids, event_items), 0, item_ids.size - 1)
+            known = item_ids[cols] == event_items
+
+            # A rollup row stands for `events` events: rated ones weigh rating / 5, the rest 1
+            weights = np.array([
+                INTERACTION_WEIGHTS.get(r.interaction_type, 0.5) * (r.rating_sum / 5.0 + r.events - r.rating_count)
+                for r in daily
+            ] + [
+                INTERACTION_WEIGHTS.get(r.interaction_type, 0.5) * (r.rating / 5.0 if r.rating else 1.0)
+                for r in interactions
+            ])
+            # Rolled-up events are aged from the middle of their day
+            age_days = np.array([
+                (now - datetime.combine(r.day, time(12), tzinfo=timezone.utc)).total_seconds() / 86400.0
+                for r in daily
+            ] + [
+                (now - self._as_utc(r.timestamp)).total_seconds() / 86400.0 if r.timestamp else self.window_days
+                for r in interactions
+            ])
+
+            popular_decay = np.power(0.5, age_days / self.popular_half_life_days)
+            trending_decay = np.power(0.5, age_days / self.trending_half_life_days)
+            popular_mass = np.bincount(cols[known], weights=(weights * popular_decay)[known], minlength=item_ids.size)
+            trending_mass = np.bincount(cols[known], weights=(weights * trending_decay)[known], minlength=item_ids.size)
+
+        prior_mean = ratings[rating_counts > 0].mean() if (rating_counts > 0).any() else 0.0
+        bayes_rating = (ratings * rating_counts + prior_mean * RATING_PRIOR_COUNT) / (rating_counts + RATING_PRIOR_COUNT)
+
+        popular_scores = 0.6 * self._normalize(np.log1p(popular_mass)) + 0.4 * self._normalize(bayes_rating)
+        trending_scores = self._normalize(np.log1p(trending_mass))
+
+        rankings = {"popular": {}, "trending": {}}
+        for kind, scores in (("popular", popular_scores), ("trending", trending_scores)):
+            rankings[kind][None] = self._top(items, scores, np.arange(item_ids.size))
+            for category_id in np.unique(categories):
+                members = np.flatnonzero(categories == category_id)
+                rankings[kind][int(category_id)] = self._top(items, scores, members)
+
+        self._rankings = rankings
+        self.refreshed_at = now
+        logger.info(f"Popularity rankings refreshed: {item_ids.size} items, "
+                    f"{len(daily)} daily rollup rows, {len(interactions)} raw interactions")
+
+    def _top(self, items, scores: np.ndarray, members: np.ndarray) -> List[Dict]:
+        top = members[top_k_indices(scores[members], self.top_n)]
+        return [
+            {
+                "item_id": items[i].id,
+                "name": items[i].name,
+                "category_id": items[i].category_id,
+                "price": items[i].price,
+                "rating": items[i].rating,
+                "score": float(scores[i])
+            }
+            for i in top
+        ]
+
+    @staticmethod
+    def _normalize(values: np.ndarray) -> np.ndarray:
+        peak = values.max() if values.size else 0.0
+        return values / peak if peak > 0 else np.zeros_like(values)
+
+    @staticmethod
+    def _as_utc(timestamp: datetime) -> datetime:
+        return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+    def get_items(self, category_id: Optional[int] = None, limit: int = 10, kind: str = "popular") -> List[Dict]:
+        """Top items for a category (or the whole catalog) from the last refresh"""
+        return self._rankings.get(kind, {}).get(category_id, [])[:limit]
+
+    def get_mixed_items(self, category_id: Optional[int] = None, limit: int = 10,
+                        trending_share: float = 0.3) -> List[Dict]:
+        """Popular items with the top trending ones (recent activity only) mixed in,
+        each tagged with the `kind` of ranking it came from"""
+        quotas = (("trending", math.ceil(limit * trending_share)), ("popular", limit))
+        mixed, seen = [], set()
+        for kind, quota in quotas:
+            for item in self.get_items(category_id, limit, kind):
+                if quota <= 0 or len(mixed) >= limit:
+                    break
+                if item["item_id"] in seen or (kind == "trending" and item["score"] <= 0):
+                    continue
+                seen.add(item["item_id"])
+                mixed.append({**item, "kind": kind})
+                quota -= 1
+        return mixed
+
+    def get_candidates(self, category_id: Optional[int] = None, limit: int = 10, kind: str = "popular") -> List[Dict]:
+        """Popularity candidates in the shape used by the hybrid ranker"""
+        return [
+            {"item_id": item["item_id"], "score": item["score"], "source": "popularity"}
+            for item in self.get_items(category_id, limit, kind)
+        ]
+
+
+# Global instance
+popularity_service = PopularityService(
+    refresh_interval=settings.POPULARITY_REFRESH_INTERVAL,
+    window_days=settings.POPULARITY_WINDOW_DAYS,
+    popular_half_life_days=settings.POPULARITY_HALF_LIFE_DAYS,
+    trending_half_life_days=settings.TRENDING_HALF_LIFE_DAYS
+)
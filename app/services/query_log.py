@@ -0,0 +1,110 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.repositories.choices import insert_choices
+
+
+class QueryLogWriter:
+    """Write-behind buffer for the choices table.
+
+    Requests enqueue rows without touching the database; a background task
+    drains the bounded queue and inserts rows in multi-row batches. When the
+    database falls behind and the queue is full, new rows are dropped and
+    counted instead of blocking the request path.
+    """
+
+    def __init__(self, max_queue_size: int, batch_size: int, flush_interval: float):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Rows taken off the queue but not yet written; flushed on stop if cancelled
+        self._in_flight: List[Dict[str, Any]] = []
+        self.stats = {"enqueued": 0, "written": 0, "dropped": 0, "batches": 0, "errors": 0}
+
+    async def start(self):
+        """Start the background flush task"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Query log writer started")
+
+    async def stop(self):
+        """Stop the flush task and write out whatever is still buffered"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        remaining = self._in_flight + self._drain(self._queue.qsize())
+        self._in_flight = []
+        if remaining:
+            await self._write_batch(remaining)
+        logger.info(f"Query log writer stopped: {self.stats}")
+
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        """Buffer one choices row; returns False if it had to be dropped"""
+        if self._queue is None:
+            self.stats["dropped"] += 1
+            return False
+        try:
+            self._queue.put_nowait(row)
+            self.stats["enqueued"] += 1
+            return True
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "queued": self._queue.qsize() if self._queue else 0}
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return rows
+
+    async def _run(self):
+        while True:
+            # Wait for the first row, then give the batch a short window to fill
+            self._in_flight = [await self._queue.get()]
+            await asyncio.sleep(self.flush_interval)
+            self._in_flight.extend(self._drain(self.batch_size - 1))
+            await self._write_batch(self._in_flight)
+            self._in_flight = []
+
+    async def _write_batch(self, rows: List[Dict[str, Any]]):
+        try:
+            await self._insert_rows(rows)
+            self.stats["written"] += len(rows)
+            self.stats["batches"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.stats["dropped"] += len(rows)
+            logger.error(f"Failed to write {len(rows)} query log rows: {e}")
+
+    @staticmethod
+    async def _insert_rows(rows: List[Dict[str, Any]]):
+        async with AsyncSessionLocal() as db:
+            await insert_choices(db, rows)
+            await db.commit()
+
+
+# Global instance
+query_log_writer = QueryLogWriter(
+    max_queue_size=settings.QUERY_LOG_QUEUE_SIZE,
+    batch_size=settings.QUERY_LOG_BATCH_SIZE,
+    flush_interval=settings.QUERY_LOG_FLUSH_INTERVAL
+)
@@ -0,0 +1,104 @@
+from typing import List, Dict, Sequence, Tuple
+import numpy as np
+
+
+def merge_candidate_scores(candidate_lists: Sequence[List[Dict]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Align candidate lists from several sources on the union of their item ids.
+
+    Returns an array of unique item ids of shape [n_candidates] and a score
+    matrix of shape [n_candidates, n_sources]. Items missing from a source get
+    a score of 0; duplicates within one source keep their best score.
+    """
+    n_sources = len(candidate_lists)
+    ids_per_source = [
+        np.fromiter((c["item_id"] for c in candidates), dtype=np.int64, count=len(candidates))
+        for candidates in candidate_lists
+    ]
+    scores_per_source = [
+        np.fromiter((c.get("score") or 0.0 for c in candidates), dtype=np.float64, count=len(candidates))
+        for candidates in candidate_lists
+    ]
+
+    all_ids = np.concatenate(ids_per_source) if ids_per_source else np.empty(0, dtype=np.int64)
+    if all_ids.size == 0:
+        return all_ids, np.zeros((0, n_sources))
+
+    item_ids, inverse = np.unique(all_ids, return_inverse=True)
+
+    # Fancy assignment gives no ordering guarantee for repeated indices,
+    # so duplicates are resolved explicitly with an unbuffered maximum.
+    score_matrix = np.full((item_ids.size, n_sources), -np.inf)
+    offset = 0
+    for column, (ids, scores) in enumerate(zip(ids_per_source, scores_per_source)):
+        rows = inverse[offset:offset + ids.size]
+        np.maximum.at(score_matrix, (rows, column), scores)
+        offset += ids.size
+    score_matrix[np.isneginf(score_matrix)] = 0.0
+
+    return item_ids, score_matrix
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, ordered from best to worst"""
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order]
+
+
+def batch_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise top-k column indices of a [n_queries, n_items] score matrix,
+    each row ordered from best to worst"""
+    n_items = scores.shape[1]
+    k = min(k, n_items)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+
+    if k < n_items:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_items), scores.shape)
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def mmr_rerank(relevance: np.ndarray, embeddings: np.ndarray, k: int, diversity_lambda: float) -> np.ndarray:
+    """Maximal marginal relevance selection over a candidate pool.
+
+    relevance has shape [m], embeddings [m, d]. Pairwise similarities come
+    from a single Gram matrix of the L2-normalized embeddings; each greedy step
+    is then one vectorized update. Returns up to k indices in selection order.
+    """
+    m = relevance.shape[0]
+    k = min(k, m)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = np.divide(embeddings, norms, out=np.zeros_like(embeddings, dtype=np.float64), where=norms > 0)
+    gram = unit @ unit.T
+
+    selected = np.empty(k, dtype=np.int64)
+    max_similarity = np.full(m, -np.inf)
+    available = np.ones(m, dtype=bool)
+
+    for step in range(k):
+        redundancy = np.where(np.isneginf(max_similarity), 0.0, max_similarity)
+        mmr = diversity_lambda * relevance - (1.0 - diversity_lambda) * redundancy
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected[step] = best
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, gram[best])
+
+    return selected
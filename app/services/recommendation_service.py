@@ -1,66 +1,192 @@
 import asyncio
 import json
+import time
 from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, timezone
 import numpy as np
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
-from app.models.choice import Item, Category, UserInteraction, Choice
-from app.models.user import User
+from app.repositories import interactions as interaction_repo, items as item_repo, users as user_repo
 from app.services.vector_service import vector_service
 from app.services.nlp_service import nlp_processor
-from app.core.database import get_db, redis_client
+from app.services.ranking import merge_candidate_scores, top_k_indices, mmr_rerank
+from app.services.cache_service import response_cache
+from app.services.query_log import query_log_writer
+from app.services.popularity_service import popularity_service
+from app.services.item_features import item_features
+from app.services.interaction_aggregates import interaction_aggregates
+from app.core.config import settings
+from app.core.database import replica_router
+
+class PipelineOverloaded(Exception):
+    """Raised when the full recommendation pipeline has no free slots"""
+
 
 class RecommendationEngine:
     def __init__(self):
         self.algorithm_weights = {
             "semantic": 0.4,
             "collaborative": 0.35, 
-            "content": 0.25
+            "content": 0.25,
+            "popularity": 0.25
         }
+        self.algorithm_version = "hybrid_v1"
+        self._pipeline_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_PIPELINES)
 
     async def get_recommendations(self,
                                 user_id: Optional[int],
                                 query: str,
                                 filters: Dict[str, Any] = {},
-                                limit: int = 10) -> Dict[str, Any]:
-        """Main recommendation method"""
-        start_time = datetime.now()
+                                limit: int = 10,
+                                diversity_lambda: Optional[float] = None) -> Dict[str, Any]:
+        """Main recommendation method (served through the response cache).
+
+        diversity_lambda enables MMR re-ranking: 1.0 is pure relevance,
+        lower values trade relevance for diversity.
+        """
+        start_time = time.perf_counter()
+        filters = filters or {}
+        cache_key = await response_cache.make_key(
+            query, filters, limit, self.algorithm_version, user_id,
+            options={"diversity_lambda": diversity_lambda}
+        )
+        computed = False
+
+        async def compute():
+            nonlocal computed
+            computed = True
+            return await self._run_pipeline(user_id, query, filters, limit, diversity_lambda)
 
+        try:
+            response = await response_cache.get_or_compute(cache_key, compute)
+        except PipelineOverloaded:
+            response = self._degraded_recommendations(query, filters, limit)
+        except Exception as e:
+            # Fall back to precomputed popularity if NLP or search is down
+            response = self._degraded_recommendations(query, filters, limit)
+            if not response["recommendations"]:
+                raise
+            logger.warning(f"Serving degraded recommendations after pipeline failure: {e}")
+
+        # Every served response is logged, including cache hits and fallbacks
+        processing_time = int((time.perf_counter() - start_time) * 1000)
+        stage_timings = response.get("stage_timings_ms", {}) if computed else {"cache": processing_time}
+        query_id = self._save_query(user_id, query, response, processing_time, stage_timings)
+        return {**response, "query_id": query_id}
+
+    async def _run_pipeline(self,
+                            user_id: Optional[int],
+                            query: str,
+                            filters: Dict[str, Any],
+                            limit: int,
+                            diversity_lambda: Optional[float] = None) -> Dict[str, Any]:
+        """Run the full pipeline unless too many are already in flight"""
+        if self._pipeline_slots.locked():
+            raise PipelineOverloaded()
+        async with self._pipeline_slots:
+            return await self._compute_recommendations(user_id, query, filters, limit, diversity_lambda)
+
+    def _degraded_recommendations(self, query: str, filters: Dict[str, Any], limit: int) -> Dict[str, Any]:
+        """Cheap response built only from the in-memory popularity and trending rankings"""
+        items = popularity_service.get_mixed_items(filters.get("category_id"), limit)
+        recommendations = [
+            {
+                "item_id": item["item_id"],
+                "item": {
+                    "id": item["item_id"],
+                    "name": item["name"],
+                    "price": item["price"],
+                    "rating": item["rating"]
+                },
+                "score": item["score"],
+                "confidence": min(item["score"] * self.algorithm_weights["popularity"] * 2, 1.0),
+                "explanation": (
+                    f"Набирает популярность: {item['name']} всё чаще выбирают в последние дни."
+                    if item["kind"] == "trending" else
+                    f"Популярный выбор: {item['name']} пользуется спросом."
+                ),
+                "reasoning_factors": [
+                    "Растущий интерес пользователей" if item["kind"] == "trending" else "Популярно среди пользователей"
+                ]
+            }
+            for item in items
+        ]
+
+        return {
+            "original_query": query,
+            "processed_query": query.lower().strip(),
+            "intent": "search",
+            "intent_confidence": 0.0,
+            "recommendations": recommendations,
+            "total_found": len(recommendations),
+            "processing_time_ms": 0,
+            "degraded": True,
+            "explanation": "Рекомендации основаны на популярных и набирающих популярность товарах"
+        }
+
+    async def _compute_recommendations(self,
+                                       user_id: Optional[int],
+                                       query: str,
+                                       filters: Dict[str, Any],
+                                       limit: int,
+                                       diversity_lambda: Optional[float] = None) -> Dict[str, Any]:
+        """Run the full NLP, search and ranking pipeline"""
+        start_time = time.perf_counter()
+        stage_timings: Dict[str, float] = {}
+        stage_start = start_time
+
+        # Read-only pipeline: a replica within the lag limit serves it, except
+        # right after this user's own writes. Connections are only checked out
+        # from the pool while a query runs
+        db = replica_router.read_session(user_id)
         try:
             # Process NLP
             nlp_result = await nlp_processor.process_query(query)
-
-            # Get database session
-            db = next(get_db())
+            stage_start = self._record_stage(stage_timings, "nlp", stage_start)
 
             # Get user profile if available
             user_profile = None
             if user_id:
                 user_profile = await self._get_user_profile(db, user_id)
+            stage_start = self._record_stage(stage_timings, "profile", stage_start)
 
             # Merge filters from NLP and request
             combined_filters = {**nlp_result.get("filters", {}), **filters}
 
+            # Attribute predicates run in SQL (JSONB containment on PostgreSQL);
+            # candidates from every source are then restricted to the matching ids
+            attribute_item_ids = None
+            if combined_filters.get("attributes"):
+                attribute_item_ids = await item_repo.item_ids_with_attributes(db, combined_filters["attributes"])
+
             # Get candidate items using different algorithms
             semantic_candidates = await self._semantic_search(
                 nlp_result["embedding"],
                 combined_filters,
                 limit * 3
             )
+            stage_start = self._record_stage(stage_timings, "semantic", stage_start)
 
             collaborative_candidates = []
             if user_id and user_profile:
                 collaborative_candidates = await self._collaborative_filtering(
                     db, user_id, user_profile, limit * 2
                 )
+            stage_start = self._record_stage(stage_timings, "collaborative", stage_start)
 
             content_candidates = []
             if user_profile:
                 content_candidates = await self._content_filtering(
-                    db, user_profile, combined_filters, limit * 2
+                    db, user_profile, combined_filters, limit * 2, attribute_item_ids
+                )
+            stage_start = self._record_stage(stage_timings, "content", stage_start)
+
+            # Cold start: no personal signals and nothing semantically similar
+            popularity_candidates = []
+            if not (semantic_candidates or collaborative_candidates or content_candidates):
+                popularity_candidates = popularity_service.get_candidates(
+                    combined_filters.get("category_id"), limit * 2
                 )
 
             # Combine and rank all candidates
@@ -70,27 +196,24 @@ class RecommendationEngine:
                 collaborative_candidates, 
                 content_candidates,
                 user_profile,
-                limit
+                limit,
+                popularity_candidates,
+                diversity_lambda,
+                attribute_item_ids
             )
+            stage_start = self._record_stage(stage_timings, "ranking", stage_start)
 
             # Generate explanations
             for rec in final_recommendations:
                 rec["explanation"] = await self._explain_recommendation(
                     rec, nlp_result, user_profile
                 )
+            self._record_stage(stage_timings, "explanation", stage_start)
 
             # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds() * 1000
-
-            # Save query to database
-            query_id = await self._save_query(
-                db, user_id, query, nlp_result, final_recommendations
-            )
-
-            db.close()
+            processing_time = (time.perf_counter() - start_time) * 1000
 
             return {
-                "query_id": query_id,
                 "original_query": query,
                 "processed_query": nlp_result["cleaned_text"],
                 "intent": nlp_result["intent"],
@@ -98,38 +221,34 @@ class RecommendationEngine:
                 "recommendations": final_recommendations,
                 "total_found": len(final_recommendations),
                 "processing_time_ms": int(processing_time),
+                "stage_timings_ms": stage_timings,
                 "explanation": "Рекомендации основаны на семантическом поиске, коллаборативной фильтрации и анализе контента"
             }
 
         except Exception as e:
             logger.error(f"Error getting recommendations: {e}")
             raise
+        finally:
+            await db.close()
 
-    async def _get_user_profile(self, db: Session, user_id: int) -> Optional[Dict]:
+    async def _get_user_profile(self, db: AsyncSession, user_id: int) -> Optional[Dict]:
         """Get user profile and preferences"""
         try:
-            user = db.query(User).filter(User.id == user_id).first()
+            user = await user_repo.get_user(db, user_id)
             if not user:
                 return None
 
-            # Get user interactions
-            interactions = db.query(UserInteraction).filter(
-                UserInteraction.user_id == user_id
-            ).all()
+            # Whole history per (item, type) from the daily rollups plus raw events
+            # of days not rolled up yet; the most recently seen PROFILE_HISTORY_LIMIT entries
+            interactions = await interaction_repo.get_user_interaction_totals(
+                db, user_id, settings.PROFILE_HISTORY_LIMIT
+            )
 
             # Build profile
             profile = {
                 "id": user.id,
                 "preferences": user.preferences or {},
-                "interactions": [
-                    {
-                        "item_id": i.item_id,
-                        "type": i.interaction_type,
-                        "rating": i.rating,
-                        "timestamp": i.timestamp.isoformat()
-                    }
-                    for i in interactions
-                ]
+                "interactions": interactions
             }
 
             return profile
@@ -154,7 +273,7 @@ class RecommendationEngine:
             logger.error(f"Semantic search failed: {e}")
             return []
 
-    async def _collaborative_filtering(self, db: Session, user_id: int, user_profile: Dict, limit: int) -> List[Dict]:
+    async def _collaborative_filtering(self, db: AsyncSession, user_id: int, user_profile: Dict, limit: int) -> List[Dict]:
         """Collaborative filtering based on similar users"""
         try:
             # Find users with similar preferences
@@ -163,39 +282,21 @@ class RecommendationEngine:
             if not similar_users:
                 return []
 
-            # Get items liked by similar users
-            candidate_items = []
+            # Time-decayed item weights of similar users; recent likes count most
+            loop = asyncio.get_running_loop()
+            unique_items: Dict[int, float] = {}
             for similar_user_id in similar_users:
-                interactions = db.query(UserInteraction).filter(
-                    and_(
-                        UserInteraction.user_id == similar_user_id,
-                        UserInteraction.interaction_type.in_(["like", "purchase"]),
-                        UserInteraction.rating >= 4
-                    )
-                ).all()
-
-                for interaction in interactions:
-                    candidate_items.append({
-                        "item_id": interaction.item_id,
-                        "score": interaction.rating / 5.0,
-                        "source": "collaborative"
-                    })
-
-            # Remove duplicates and sort by score
-            unique_items = {}
-            for item in candidate_items:
-                if item["item_id"] not in unique_items:
-                    unique_items[item["item_id"]] = item
-                else:
-                    unique_items[item["item_id"]]["score"] = max(
-                        unique_items[item["item_id"]]["score"], 
-                        item["score"]
-                    )
+                weights = await loop.run_in_executor(None, interaction_aggregates.user_items, similar_user_id)
+                for item_id, weight in weights.items():
+                    unique_items[item_id] = max(unique_items.get(item_id, 0.0), min(weight, 1.0))
 
             # Sort by score and return top items
             sorted_items = sorted(
-                unique_items.values(), 
-                key=lambda x: x["score"], 
+                (
+                    {"item_id": item_id, "score": score, "source": "collaborative"}
+                    for item_id, score in unique_items.items()
+                ),
+                key=lambda x: x["score"],
                 reverse=True
             )
 
@@ -205,139 +306,81 @@ class RecommendationEngine:
             logger.error(f"Collaborative filtering failed: {e}")
             return []
 
-    async def _content_filtering(self, db: Session, user_profile: Dict, filters: Dict, limit: int) -> List[Dict]:
+    async def _content_filtering(self, db: AsyncSession, user_profile: Dict, filters: Dict, limit: int,
+                                 allowed_item_ids: Optional[List[int]] = None) -> List[Dict]:
         """Content-based filtering based on user preferences"""
         try:
-            # Get user's preferred categories and attributes
             preferences = user_profile.get("preferences", {})
-            preferred_categories = preferences.get("categories", [])
-            preferred_attributes = preferences.get("attributes", {})
+            liked_item_ids = [
+                i["item_id"] for i in user_profile.get("interactions", [])
+                if i["type"] in ("like", "purchase")
+            ]
 
-            # Build query
-            query = db.query(Item)
-            
-            if preferred_categories:
-                query = query.filter(Item.category_id.in_(preferred_categories))
-            
-            if filters.get("max_price"):
-                query = query.filter(Item.price <= filters["max_price"])
-            
-            if filters.get("min_rating"):
-                query = query.filter(Item.rating >= filters["min_rating"])
+            # A catalog change rebuilds the matrix from the sync engine, off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, item_features.ensure_fresh)
 
-            # Get items
-            items = query.limit(limit * 2).all()
-            
-            # Score items based on user preferences
-            scored_items = []
-            for item in items:
-                score = 0.0
-                
-                # Category preference
-                if item.category_id in preferred_categories:
-                    score += 0.3
-                
-                # Rating preference
-                if item.rating >= 4.0:
-                    score += 0.2
-                
-                # Price preference
-                if "max_price" in preferences and item.price <= preferences["max_price"]:
-                    score += 0.1
-                
-                # Attribute matching
-                for attr, value in preferred_attributes.items():
-                    if attr in item.attributes and item.attributes[attr] == value:
-                        score += 0.1
-
-                scored_items.append({
-                    "item_id": item.id,
-                    "score": score,
-                    "source": "content"
-                })
-
-            # Sort by score and return top items
-            sorted_items = sorted(scored_items, key=lambda x: x["score"], reverse=True)
-            return sorted_items[:limit]
+            # One sparse matrix-vector product over the whole catalog
+            return item_features.score(preferences, filters, limit, liked_item_ids, allowed_item_ids)
 
         except Exception as e:
             logger.error(f"Content filtering failed: {e}")
             return []
 
-    async def _hybrid_ranking(self, db: Session, semantic_candidates: List, 
+    async def _hybrid_ranking(self, db: AsyncSession, semantic_candidates: List, 
                              collaborative_candidates: List, content_candidates: List,
-                             user_profile: Optional[Dict], limit: int) -> List[Dict]:
+                             user_profile: Optional[Dict], limit: int,
+                             popularity_candidates: Optional[List] = None,
+                             diversity_lambda: Optional[float] = None,
+                             allowed_item_ids: Optional[List[int]] = None) -> List[Dict]:
         """Combine and rank all candidates using hybrid approach"""
         try:
-            # Combine all candidates
-            all_candidates = {}
-            
-            # Add semantic candidates
-            for item in semantic_candidates:
-                item_id = item["item_id"]
-                if item_id not in all_candidates:
-                    all_candidates[item_id] = {
-                        "item_id": item_id,
-                        "semantic_score": item.get("score", 0),
-                        "collaborative_score": 0,
-                        "content_score": 0,
-                        "final_score": 0
-                    }
-
-            # Add collaborative candidates
-            for item in collaborative_candidates:
-                item_id = item["item_id"]
-                if item_id not in all_candidates:
-                    all_candidates[item_id] = {
-                        "item_id": item_id,
-                        "semantic_score": 0,
-                        "collaborative_score": item.get("score", 0),
-                        "content_score": 0,
-                        "final_score": 0
-                    }
-                else:
-                    all_candidates[item_id]["collaborative_score"] = item.get("score", 0)
-
-            # Add content candidates
-            for item in content_candidates:
-                item_id = item["item_id"]
-                if item_id not in all_candidates:
-                    all_candidates[item_id] = {
-                        "item_id": item_id,
-                        "semantic_score": 0,
-                        "collaborative_score": 0,
-                        "content_score": item.get("score", 0),
-                        "final_score": 0
-                    }
-                else:
-                    all_candidates[item_id]["content_score"] = item.get("score", 0)
-
-            # Calculate final scores
-            for item_id, candidate in all_candidates.items():
-                final_score = (
-                    candidate["semantic_score"] * self.algorithm_weights["semantic"] +
-                    candidate["collaborative_score"] * self.algorithm_weights["collaborative"] +
-                    candidate["content_score"] * self.algorithm_weights["content"]
-                )
-                candidate["final_score"] = final_score
+            sources = ("semantic", "collaborative", "content", "popularity")
+
+            # Align all candidates in a [n_candidates, n_sources] score matrix
+            item_ids, score_matrix = merge_candidate_scores([
+                semantic_candidates, collaborative_candidates,
+                content_candidates, popularity_candidates or []
+            ])
+            if allowed_item_ids is not None:
+                keep = np.isin(item_ids, allowed_item_ids)
+                item_ids, score_matrix = item_ids[keep], score_matrix[keep]
+            if item_ids.size == 0:
+                return []
 
-            # Sort by final score
-            sorted_candidates = sorted(
-                all_candidates.values(), 
-                key=lambda x: x["final_score"], 
-                reverse=True
-            )
+            # Weighted final scores and top-k selection
+            weights = np.array([self.algorithm_weights[source] for source in sources])
+            final_scores = score_matrix @ weights
+            if diversity_lambda is None:
+                top_indices = top_k_indices(final_scores, limit)
+            else:
+                # MMR over a larger pool; embeddings are fetched only for this pool
+                pool = top_k_indices(final_scores, limit * settings.MMR_POOL_FACTOR)
+                embeddings, _ = await vector_service.get_embeddings(item_ids[pool].tolist())
+                top_indices = pool[mmr_rerank(final_scores[pool], embeddings, limit, diversity_lambda)]
+
+            # Only the top-k candidates are materialized as dicts
+            sorted_candidates = [
+                {
+                    "item_id": int(item_ids[i]),
+                    "semantic_score": float(score_matrix[i, 0]),
+                    "collaborative_score": float(score_matrix[i, 1]),
+                    "content_score": float(score_matrix[i, 2]),
+                    "popularity_score": float(score_matrix[i, 3]),
+                    "final_score": float(final_scores[i])
+                }
+                for i in top_indices
+            ]
 
             # Get item details for top candidates
-            top_item_ids = [c["item_id"] for c in sorted_candidates[:limit]]
-            items = db.query(Item).filter(Item.id.in_(top_item_ids)).all()
+            top_item_ids = [c["item_id"] for c in sorted_candidates]
+            items = await item_repo.get_items_by_ids(db, top_item_ids)
             
             # Create item lookup
             item_lookup = {item.id: item for item in items}
             
             # Build final recommendations
             final_recommendations = []
-            for candidate in sorted_candidates[:limit]:
+            for candidate in sorted_candidates:
                 item = item_lookup.get(candidate["item_id"])
                 if item:
                     final_recommendations.append({
@@ -373,6 +416,9 @@ class RecommendationEngine:
         
         if candidate["content_score"] > 0.5:
             factors.append("Соответствует вашим предпочтениям")
+
+        if candidate.get("popularity_score", 0) > 0.5:
+            factors.append("Популярно среди пользователей")
         
         return factors
 
@@ -395,60 +441,41 @@ class RecommendationEngine:
             logger.error(f"Error generating explanation: {e}")
             return "Рекомендация основана на анализе вашего запроса и предпочтений."
 
-    async def _save_query(self, db: Session, user_id: Optional[int], query: str, 
-                         nlp_result: Dict, recommendations: List[Dict]) -> str:
-        """Save query and results to database"""
-        try:
-            # Generate query ID
-            query_id = f"q_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hash(query) % 10000}"
-            
-            # Create choice record
-            choice = Choice(
-                user_id=user_id,
-                query_text=query,
-                processed_query=nlp_result["cleaned_text"],
-                intent=nlp_result["intent"],
-                selected_items=[r["item_id"] for r in recommendations],
-                algorithm_version="hybrid_v1",
-                processing_time_ms=0
-            )
-            
-            db.add(choice)
-            db.commit()
-            
-            return query_id
-
-        except Exception as e:
-            logger.error(f"Error saving query: {e}")
-            return f"q_{datetime.now().strftime('%Y%m%d_%H%M%S')}_error"
-
-    async def _find_similar_users(self, db: Session, user_id: int, user_profile: Dict) -> List[int]:
+    @staticmethod
+    def _record_stage(stage_timings: Dict[str, float], stage: str, stage_start: float) -> float:
+        """Record elapsed milliseconds for a pipeline stage and return the new stage start"""
+        now = time.perf_counter()
+        stage_timings[stage] = round((now - stage_start) * 1000, 2)
+        return now
+
+    def _save_query(self, user_id: Optional[int], query: str, response: Dict,
+                    processing_time_ms: int, stage_timings: Dict[str, float]) -> str:
+        """Queue query and results for asynchronous persistence"""
+        # Generate query ID
+        query_id = f"q_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hash(query) % 10000}"
+
+        # Rows are flushed in batches by the query log writer
+        query_log_writer.enqueue({
+            "user_id": user_id,
+            "query_text": query,
+            "processed_query": response["processed_query"],
+            "intent": response["intent"],
+            "selected_items": [r["item_id"] for r in response["recommendations"]],
+            "algorithm_version": self.algorithm_version,
+            "processing_time_ms": processing_time_ms,
+            "stage_timings": stage_timings,
+            "created_at": datetime.now(timezone.utc)
+        })
+
+        return query_id
+
+    async def _find_similar_users(self, db: AsyncSession, user_id: int, user_profile: Dict) -> List[int]:
         """Find users with similar preferences"""
         try:
-            # Simple implementation - find users who liked similar items
-            user_interactions = db.query(UserInteraction).filter(
-                UserInteraction.user_id == user_id,
-                UserInteraction.interaction_type.in_(["like", "purchase"]),
-                UserInteraction.rating >= 4
-            ).all()
-            
-            if not user_interactions:
-                return []
-            
-            # Get items liked by current user
-            liked_item_ids = [i.item_id for i in user_interactions]
-            
-            # Find users who also liked these items
-            similar_users = db.query(UserInteraction.user_id).filter(
-                and_(
-                    UserInteraction.item_id.in_(liked_item_ids),
-                    UserInteraction.user_id != user_id,
-                    UserInteraction.interaction_type.in_(["like", "purchase"]),
-                    UserInteraction.rating >= 4
-                )
-            ).distinct().limit(10).all()
-            
-            return [u[0] for u in similar_users]
+            # Decayed co-interaction mass, maintained incrementally per event
+            return await asyncio.get_running_loop().run_in_executor(
+                None, interaction_aggregates.similar_users, user_id, 10
+            )
 
         except Exception as e:
             logger.error(f"Error finding similar users: {e}")
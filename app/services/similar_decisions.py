@@ -0,0 +1,233 @@
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.services.decision_dataset import DATA_DIR, DecisionDataset, get_decision_dataset
+from app.services.ranking import top_k_indices
+
+OUTCOMES_PATH = DATA_DIR / "decision_outcomes.csv"
+LINKS_PATH = DATA_DIR / "user_decision_links.csv"
+
+# Share of the similarity that comes from the scenario text embedding
+TEXT_WEIGHT = 0.5
+
+# Criteria are rated on a 1-10 scale
+CRITERION_SCALE = 10.0
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _aligned(frame: pd.DataFrame, id_column: str, ids: np.ndarray, columns: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """Per-decision means of outcome columns, aligned to ids (NaN when absent)"""
+    grouped = frame.groupby(id_column)[list(columns)].mean().reindex(ids)
+    return {name: grouped[column].to_numpy(dtype=np.float32) for column, name in columns.items()}
+
+
+class SimilarDecisionIndex:
+    """In-memory index of historical decisions for "people in a similar situation chose...".
+
+    Each decision is one row of unit-normalized structured features (ordinal
+    stress/context factors, standardized numeric features, criteria ratings)
+    next to a unit-normalized embedding of its scenario text. Cosine
+    similarity is a weighted sum of both parts, so a query is one
+    matrix-vector product. Outcomes and process metrics are pre-joined into
+    arrays aligned with the index rows.
+    """
+
+    def __init__(self, text_weight: float = TEXT_WEIGHT):
+        self.text_weight = text_weight
+        self.dataset: Optional[DecisionDataset] = None
+        self.structured: Optional[np.ndarray] = None
+        self.text: Optional[np.ndarray] = None
+        self.numeric_mean = np.empty(0)
+        self.numeric_std = np.empty(0)
+        self.outcomes: Dict[str, np.ndarray] = {}
+
+    @property
+    def is_built(self) -> bool:
+        return self.dataset is not None
+
+    def _factor_block(self, codes: np.ndarray) -> np.ndarray:
+        """Ordinal codes scaled to [0, 1]; missing levels sit in the middle"""
+        sizes = np.array([len(self.dataset.factor_vocabularies[c]) for c in self.dataset.factor_columns])
+        scaled = codes / np.maximum(sizes - 1, 1)
+        return np.where(codes < 0, 0.5, scaled).astype(np.float32)
+
+    def build(self,
+              dataset: DecisionDataset,
+              embed: Callable[[List[str]], np.ndarray],
+              outcomes: Optional[pd.DataFrame] = None,
+              links: Optional[pd.DataFrame] = None):
+        """Precompute feature rows, scenario embeddings and joined outcomes"""
+        self.dataset = dataset
+
+        self.numeric_mean = np.nanmean(dataset.numeric, axis=0)
+        self.numeric_std = np.nanstd(dataset.numeric, axis=0)
+        self.numeric_std[self.numeric_std == 0] = 1.0
+        numeric = np.nan_to_num((dataset.numeric - self.numeric_mean) / self.numeric_std)
+
+        structured = np.hstack([
+            self._factor_block(dataset.factors),
+            numeric,
+            dataset.criteria.toarray() / CRITERION_SCALE
+        ]).astype(np.float32)
+        self.structured = _unit_rows(structured)
+
+        # Embed each distinct scenario once
+        scenario_codes = dataset.labels["Сценарий"]
+        unique_codes, inverse = np.unique(scenario_codes, return_inverse=True)
+        texts = [
+            f"{dataset.label('Категория', int(np.flatnonzero(scenario_codes == code)[0]))}. "
+            f"{dataset.label_vocabularies['Сценарий'][code]}"
+            for code in unique_codes
+        ]
+        self.text = _unit_rows(np.asarray(embed(texts), dtype=np.float32))[inverse]
+
+        self.outcomes = {}
+        if outcomes is not None:
+            self.outcomes.update(_aligned(outcomes, "ID_решения", dataset.ids, {
+                "Было_выбрано": "chosen",
+                "Удовлетворенность_результатом": "satisfaction",
+                "Рекомендовал_бы_другим": "would_recommend",
+                "Пришлось_ли_корректировать": "needed_correction",
+                "Стресс_при_принятии_решения": "stress_during",
+                "Стресс_после_принятия_решения": "stress_after"
+            }))
+        if links is not None:
+            self.outcomes.update(_aligned(links, "ID_решения", dataset.ids, {
+                "Время_обдумывания_часы": "deliberation_hours",
+                "Изменил_мнение_в_процессе": "changed_mind",
+                "Уровень_удовлетворенности_процессом": "process_satisfaction"
+            }))
+
+        logger.info(f"Similar decision index built: {len(dataset)} decisions")
+
+    def query_vector(self,
+                     text_embedding: Optional[np.ndarray],
+                     factors: Optional[Dict[str, str]] = None,
+                     numeric: Optional[Dict[str, float]] = None,
+                     criteria: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Project a described situation into the index space.
+
+        Only the structured features that are given take part, so a query
+        with just a text matches on scenario meaning alone.
+        """
+        dataset = self.dataset
+        n_factors = len(dataset.factor_columns)
+        n_numeric = len(dataset.numeric_columns)
+        structured = np.zeros(self.structured.shape[1], dtype=np.float32)
+
+        for name, label in (factors or {}).items():
+            if name in dataset.factor_columns:
+                column = dataset.factor_columns.index(name)
+                levels = list(dataset.factor_vocabularies[name])
+                if label in levels:
+                    structured[column] = levels.index(label) / max(len(levels) - 1, 1)
+        for name, value in (numeric or {}).items():
+            if name in dataset.numeric_columns:
+                column = dataset.numeric_columns.index(name)
+                structured[n_factors + column] = (value - self.numeric_mean[column]) / self.numeric_std[column]
+        for name, value in (criteria or {}).items():
+            if name in dataset.criteria_names:
+                structured[n_factors + n_numeric + dataset.criteria_names.index(name)] = value / CRITERION_SCALE
+
+        text_part = np.zeros(self.text.shape[1], dtype=np.float32)
+        if text_embedding is not None:
+            text_part = _unit_rows(np.asarray(text_embedding, dtype=np.float32).reshape(1, -1))[0]
+
+        return np.concatenate([
+            np.sqrt(1.0 - self.text_weight) * _unit_rows(structured[np.newaxis])[0],
+            np.sqrt(self.text_weight) * text_part
+        ])
+
+    def search(self, query: np.ndarray, limit: int = 5, category: Optional[str] = None,
+               exclude_id: Optional[int] = None) -> Dict[str, Any]:
+        """Top-k similar decisions with their outcomes, optionally within one category"""
+        dataset = self.dataset
+        n_structured = self.structured.shape[1]
+        scores = (np.sqrt(1.0 - self.text_weight) * (self.structured @ query[:n_structured])
+                  + np.sqrt(self.text_weight) * (self.text @ query[n_structured:]))
+
+        eligible = np.ones(len(dataset), dtype=bool)
+        if category:
+            eligible &= dataset.labels["Категория"] == dataset.category_code(category)
+        if exclude_id is not None:
+            eligible &= dataset.ids != exclude_id
+
+        candidates = np.flatnonzero(eligible)
+        top = candidates[top_k_indices(scores[candidates], limit)]
+
+        hits = []
+        for row in top:
+            outcome = {
+                name: (None if np.isnan(values[row]) else round(float(values[row]), 3))
+                for name, values in self.outcomes.items()
+            }
+            hits.append({
+                "decision_id": int(dataset.ids[row]),
+                "category": dataset.label("Категория", row),
+                "scenario": dataset.label("Сценарий", row),
+                "alternative": dataset.label("Альтернатива", row),
+                "similarity": round(float(scores[row]), 4),
+                "outcome": outcome
+            })
+
+        return {"results": hits, "summary": self._summary(top)}
+
+    def _summary(self, rows: np.ndarray) -> Dict[str, Any]:
+        """What people in these situations chose and how it turned out"""
+        summary: Dict[str, Any] = {"matches": int(rows.size)}
+        if rows.size == 0:
+            return summary
+        for name in ("chosen", "would_recommend", "changed_mind"):
+            if name in self.outcomes:
+                values = self.outcomes[name][rows]
+                summary[f"{name}_share"] = round(float(np.nanmean(values)), 3) if (~np.isnan(values)).any() else None
+        if "satisfaction" in self.outcomes and "chosen" in self.outcomes:
+            chosen = self.outcomes["chosen"][rows] == 1
+            satisfaction = self.outcomes["satisfaction"][rows][chosen]
+            summary["satisfaction_when_chosen"] = (
+                round(float(np.nanmean(satisfaction)), 2) if (~np.isnan(satisfaction)).any() else None
+            )
+        return summary
+
+    def similar_to(self, decision_id: int, limit: int = 5, category: Optional[str] = None) -> Dict[str, Any]:
+        """Decisions most similar to an existing one"""
+        rows = np.flatnonzero(self.dataset.ids == decision_id)
+        if rows.size == 0:
+            return {"results": [], "summary": {"matches": 0}}
+        row = rows[0]
+        query = np.concatenate([
+            np.sqrt(1.0 - self.text_weight) * self.structured[row],
+            np.sqrt(self.text_weight) * self.text[row]
+        ])
+        return self.search(query, limit, category, exclude_id=decision_id)
+
+    def ensure_built(self):
+        """Build from the bundled CSVs on first use"""
+        if self.is_built:
+            return
+        # Imported here so the index can be built and tested without the NLP models
+        from app.services.nlp_service import nlp_processor
+        self.build(
+            get_decision_dataset(),
+            nlp_processor.embed_batch,
+            outcomes=pd.read_csv(OUTCOMES_PATH),
+            links=pd.read_csv(LINKS_PATH)
+        )
+
+    def find(self, text: str, limit: int = 5, category: Optional[str] = None,
+             factors: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Similar decisions for a free-text situation and optional factor labels"""
+        from app.services.nlp_service import nlp_processor
+        self.ensure_built()
+        embedding = nlp_processor.embed_batch([text])[0] if text else None
+        return self.search(self.query_vector(embedding, factors=factors), limit, category)
+
+
+# Global instance
+similar_decisions = SimilarDecisionIndex()
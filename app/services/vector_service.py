@@ -1,4 +1,7 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 from pymilvus import (
     connections, Collection, FieldSchema, CollectionSchema, DataType,
@@ -6,11 +9,17 @@ from pymilvus import (
 )
 from loguru import logger
 from app.core.config import settings
+from app.services.cache_service import response_cache
 
 class VectorService:
     def __init__(self):
         self.collection_name = "item_embeddings"
         self.collection = None
+        # LRU of item embeddings fetched for diversity re-ranking
+        self.embedding_cache: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self.embedding_cache_size = settings.EMBEDDING_CACHE_SIZE
+        # Fetches run in executor threads
+        self._cache_lock = threading.Lock()
         self._connect_and_setup()
 
     def _connect_and_setup(self):
@@ -104,6 +113,7 @@ class VectorService:
             # Flush to ensure data is persisted
             self.collection.flush()
             
+            response_cache.invalidate_vector_index()
             logger.info(f"Inserted {len(items_data)} embeddings successfully")
             return True
 
@@ -177,6 +187,88 @@ class VectorService:
             logger.error(f"Search failed: {e}")
             return []
 
+    def _cache_embedding(self, item_id: Optional[int], embedding: Optional[List[float]]):
+        if item_id is None or embedding is None:
+            return
+        with self._cache_lock:
+            self.embedding_cache[item_id] = np.asarray(embedding, dtype=np.float32)
+            self.embedding_cache.move_to_end(item_id)
+            while len(self.embedding_cache) > self.embedding_cache_size:
+                self.embedding_cache.popitem(last=False)
+
+    def get_cached_embeddings(self, item_ids: List[int], dim: int = 384) -> Tuple[np.ndarray, np.ndarray]:
+        """Embeddings already held in memory as a [n, dim] matrix plus a found mask.
+
+        Items that are not cached get a zero row; nothing is fetched from Milvus.
+        """
+        matrix = np.zeros((len(item_ids), dim), dtype=np.float32)
+        found = np.zeros(len(item_ids), dtype=bool)
+        with self._cache_lock:
+            for row, item_id in enumerate(item_ids):
+                embedding = self.embedding_cache.get(item_id)
+                if embedding is not None:
+                    matrix[row] = embedding
+                    found[row] = True
+        return matrix, found
+
+    def fetch_embeddings(self, item_ids: List[int], dim: int = 384) -> Tuple[np.ndarray, np.ndarray]:
+        """Embeddings for a candidate pool: cached rows plus one Milvus query by id
+        for the missing ones. Items Milvus does not have keep a zero row.
+        Blocking; use `get_embeddings` from the event loop."""
+        matrix, found = self.get_cached_embeddings(item_ids, dim)
+        missing = [int(item_id) for item_id, hit in zip(item_ids, found) if not hit]
+        if not missing or not self.collection:
+            return matrix, found
+
+        try:
+            rows = self.collection.query(
+                expr=f"item_id in {missing}",
+                output_fields=["item_id", "embedding"]
+            )
+        except Exception as e:
+            logger.error(f"Failed to fetch embeddings for {len(missing)} items: {e}")
+            return matrix, found
+
+        for row in rows:
+            self._cache_embedding(row.get("item_id"), row.get("embedding"))
+        return self.get_cached_embeddings(item_ids, dim)
+
+    async def get_embeddings(self, item_ids: List[int], dim: int = 384) -> Tuple[np.ndarray, np.ndarray]:
+        """`fetch_embeddings` in an executor thread, so the Milvus query does not block the loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.fetch_embeddings, item_ids, dim)
+
+    def search_similar_batch(self, query_embeddings: List[List[float]],
+                             limit: int = 10) -> List[List[Dict]]:
+        """Search for many query vectors in a single Milvus request (blocking; call from an executor)"""
+        try:
+            if not self.collection:
+                logger.error("Collection not initialized")
+                return [[] for _ in query_embeddings]
+
+            self.collection.load()
+
+            search_params = {
+                "metric_type": "COSINE",
+                "params": {"ef": 64}
+            }
+
+            results = self.collection.search(
+                data=[list(map(float, embedding)) for embedding in query_embeddings],
+                anns_field="embedding",
+                param=search_params,
+                limit=limit,
+                output_fields=["item_id"]
+            )
+
+            return [
+                [{"item_id": hit.entity.get("item_id"), "score": hit.score} for hit in hits]
+                for hits in results
+            ]
+
+        except Exception as e:
+            logger.error(f"Batch search failed: {e}")
+            return [[] for _ in query_embeddings]
+
     async def update_embedding(self, item_id: int, new_embedding: List[float]) -> bool:
         """Update embedding for existing item"""
         try:
@@ -192,6 +284,9 @@ class VectorService:
             self.collection.insert(data)
             self.collection.flush()
 
+            with self._cache_lock:
+                self.embedding_cache.pop(item_id, None)
+            response_cache.invalidate_vector_index()
             logger.info(f"Updated embedding for item {item_id}")
             return True
 
@@ -209,6 +304,9 @@ class VectorService:
             self.collection.delete(delete_expr)
             self.collection.flush()
 
+            with self._cache_lock:
+                self.embedding_cache.pop(item_id, None)
+            response_cache.invalidate_vector_index()
             logger.info(f"Deleted embedding for item {item_id}")
             return True
 
@@ -244,6 +342,9 @@ class VectorService:
             self.collection.delete("id >= 0")
             self.collection.flush()
 
+            with self._cache_lock:
+                self.embedding_cache.clear()
+            response_cache.invalidate_vector_index()
             logger.info("Collection cleared successfully")
             return True
 
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Ranking micro-benchmarks for SmartChoice AI
+
+Measures the in-process cost of the hybrid ranking stages on synthetic
+candidate pools: candidate merging + weighted top-k, and the optional MMR
+diversity re-ranking. With --milvus, MMR is also timed end to end against a
+running Milvus: fetching the pool's embeddings (cold and cached) plus the
+re-ranking, which is what a diversified request actually pays.
+
+Usage:
+    python benchmarks/bench_ranking.py [--repeat 50] [--milvus]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.ranking import merge_candidate_scores, top_k_indices, mmr_rerank
+
+WEIGHTS = np.array([0.4, 0.35, 0.25, 0.25])
+EMBEDDING_DIM = 384
+
+
+def make_candidates(rng: np.random.Generator, n_candidates: int):
+    """Three overlapping candidate lists plus an empty popularity list"""
+    catalog = n_candidates * 2
+    return [
+        [{"item_id": int(i), "score": float(s)}
+         for i, s in zip(rng.choice(catalog, n_candidates, replace=False), rng.random(n_candidates))]
+        for _ in range(3)
+    ] + [[]]
+
+
+def timeit(fn, repeat: int) -> float:
+    """Median wall time in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def bench_hybrid(rng, repeat: int):
+    print("Hybrid merge + top-k (limit=10)")
+    print(f"{'candidates':>12} {'median ms':>10}")
+    for n in (100, 1_000, 10_000):
+        lists = make_candidates(rng, n)
+
+        def run():
+            item_ids, matrix = merge_candidate_scores(lists)
+            top_k_indices(matrix @ WEIGHTS, 10)
+
+        print(f"{n:>12} {timeit(run, repeat):>10.3f}")
+
+
+def bench_mmr(rng, repeat: int):
+    print("MMR re-ranking (extra latency over plain top-k)")
+    print(f"{'limit':>6} {'pool':>6} {'median ms':>10}")
+    for limit in (10, 20, 50):
+        pool = limit * 3
+        relevance = rng.random(pool)
+        embeddings = rng.standard_normal((pool, EMBEDDING_DIM)).astype(np.float32)
+        ms = timeit(lambda: mmr_rerank(relevance, embeddings, limit, 0.7), repeat)
+        print(f"{limit:>6} {pool:>6} {ms:>10.3f}")
+
+
+def bench_mmr_with_fetch(rng, repeat: int):
+    """Embedding fetch for the MMR pool plus re-ranking, against the configured Milvus"""
+    from app.services.vector_service import vector_service
+
+    print("MMR with embedding fetch (Milvus)")
+    print(f"{'limit':>6} {'pool':>6} {'cold ms':>10} {'cached ms':>10}")
+    for limit in (10, 20, 50):
+        pool = limit * 3
+        rows = vector_service.collection.query(expr="item_id >= 0", output_fields=["item_id"], limit=pool)
+        item_ids = [row["item_id"] for row in rows]
+        if not item_ids:
+            print("collection is empty")
+            return
+        relevance = rng.random(len(item_ids))
+
+        def run():
+            embeddings, _ = asyncio.run(vector_service.get_embeddings(item_ids))
+            mmr_rerank(relevance, embeddings, limit, 0.7)
+
+        def cold():
+            with vector_service._cache_lock:
+                vector_service.embedding_cache.clear()
+            run()
+
+        print(f"{limit:>6} {len(item_ids):>6} {timeit(cold, repeat):>10.3f} {timeit(run, repeat):>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranking micro-benchmarks")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--milvus", action="store_true", help="Also time the embedding fetch against Milvus")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    bench_hybrid(rng, args.repeat)
+    print()
+    bench_mmr(rng, args.repeat)
+    if args.milvus:
+        print()
+        bench_mmr_with_fetch(rng, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ import pandas as pd
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import psycopg2
+import redis
 from pymilvus import connections, Collection, utility
 import logging
 
@@ -26,6 +27,9 @@ DB_CONFIG = {
     'password': 'password'
 }
 
+# Redis configuration (response cache version counters)
+REDIS_URL = 'redis://localhost:6379/0'
+
 # Milvus configuration
 MILVUS_CONFIG = {
     'host': 'localhost',
@@ -296,6 +300,16 @@ class DataLoader:
             logger.error(f"Failed to load sample queries: {e}")
             self.db_conn.rollback()
 
+    def invalidate_response_cache(self):
+        """Bump catalog and vector index versions used by the API response cache"""
+        try:
+            client = redis.from_url(REDIS_URL)
+            client.incr("version:catalog")
+            client.incr("version:vector_index")
+            logger.info("Response cache invalidated")
+        except Exception as e:
+            logger.warning(f"Failed to invalidate response cache: {e}")
+
     def run(self):
         """Run the complete data loading process"""
         try:
@@ -312,6 +326,9 @@ class DataLoader:
             
             # Load sample queries
             self.load_sample_queries()
+
+            # Invalidate cached API responses
+            self.invalidate_response_cache()
             
             logger.info("Data loading completed successfully!")
             
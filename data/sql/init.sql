@@ -3,6 +3,8 @@
 
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- Trigram matching for fuzzy item name search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Create users table
 CREATE TABLE IF NOT EXISTS users (
@@ -41,18 +43,65 @@ CREATE TABLE IF NOT EXISTS items (
     is_available BOOLEAN DEFAULT TRUE,
     stock_quantity INTEGER,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    ) STORED
 );
 
--- Create user interactions table
+-- Create user interactions table, partitioned by month on timestamp
+-- (the partition key must be part of the primary key)
 CREATE TABLE IF NOT EXISTS user_interactions (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     user_id INTEGER NOT NULL,
     item_id INTEGER NOT NULL,
     interaction_type VARCHAR(20) NOT NULL,
     rating INTEGER CHECK (rating >= 1 AND rating <= 5),
     feedback TEXT,
-    timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Partitions for the current and next three months; the app's maintenance task creates later ones
+DO $$
+DECLARE
+    month_start DATE := date_trunc('month', now() AT TIME ZONE 'UTC')::date;
+BEGIN
+    FOR i IN 0..3 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS user_interactions_p%s PARTITION OF user_interactions FOR VALUES FROM (%L) TO (%L)',
+            to_char(month_start + make_interval(months => i), 'YYYYMM'),
+            (month_start + make_interval(months => i))::date::text || ' 00:00:00+00',
+            (month_start + make_interval(months => i + 1))::date::text || ' 00:00:00+00'
+        );
+    END LOOP;
+END $$;
+
+-- Rows outside every monthly partition (clock-skewed clients, months not yet created)
+CREATE TABLE IF NOT EXISTS user_interactions_default PARTITION OF user_interactions DEFAULT;
+
+-- Daily rollups of user_interactions, kept beyond raw-event retention:
+-- per user and item (user profiles) and per item (popularity, dashboards)
+CREATE TABLE IF NOT EXISTS user_interaction_daily (
+    day DATE NOT NULL,
+    user_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    interaction_type VARCHAR(20) NOT NULL,
+    events INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, user_id, item_id, interaction_type)
+);
+
+CREATE TABLE IF NOT EXISTS item_interaction_daily (
+    day DATE NOT NULL,
+    item_id INTEGER NOT NULL,
+    interaction_type VARCHAR(20) NOT NULL,
+    events INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, item_id, interaction_type)
 );
 
 -- Create choices table  
@@ -67,9 +116,37 @@ CREATE TABLE IF NOT EXISTS choices (
     feedback_text TEXT,
     algorithm_version VARCHAR(20),
     processing_time_ms INTEGER,
+    stage_timings JSONB,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Dashboard summary tables, refreshed by the analytics summary task
+CREATE TABLE IF NOT EXISTS analytics_totals (
+    metric VARCHAR(50) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS query_intent_daily (
+    day DATE NOT NULL,
+    intent VARCHAR(50) NOT NULL,
+    queries INTEGER NOT NULL DEFAULT 0,
+    processing_ms_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, intent)
+);
+
+CREATE TABLE IF NOT EXISTS category_interaction_counts (
+    category_id INTEGER PRIMARY KEY,
+    events BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS recent_decisions (
+    choice_id INTEGER PRIMARY KEY,
+    query_text TEXT NOT NULL,
+    intent VARCHAR(50),
+    created_at TIMESTAMP WITH TIME ZONE
+);
+
 -- Create query sessions table
 CREATE TABLE IF NOT EXISTS query_sessions (
     id SERIAL PRIMARY KEY,
@@ -88,11 +165,24 @@ CREATE INDEX IF NOT EXISTS idx_items_category ON items(category_id);
 CREATE INDEX IF NOT EXISTS idx_items_price ON items(price);
 CREATE INDEX IF NOT EXISTS idx_items_rating ON items(rating);
 CREATE INDEX IF NOT EXISTS idx_items_available ON items(is_available);
+CREATE INDEX IF NOT EXISTS idx_items_search_vector ON items USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_items_name_trgm ON items USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_items_attributes ON items USING GIN (attributes jsonb_path_ops);
 CREATE INDEX IF NOT EXISTS idx_user_interactions_user ON user_interactions(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_interactions_item ON user_interactions(item_id);
 CREATE INDEX IF NOT EXISTS idx_user_interactions_type ON user_interactions(interaction_type);
+CREATE INDEX IF NOT EXISTS ix_user_interactions_user_time ON user_interactions(user_id, timestamp)
+    INCLUDE (item_id, interaction_type, rating);
+CREATE INDEX IF NOT EXISTS ix_user_interactions_positive ON user_interactions(user_id, item_id, rating)
+    WHERE interaction_type IN ('like', 'purchase') AND rating >= 4;
+CREATE INDEX IF NOT EXISTS ix_user_interactions_item_type_rating ON user_interactions(item_id, interaction_type, rating);
+CREATE INDEX IF NOT EXISTS ix_user_interactions_time ON user_interactions(timestamp)
+    INCLUDE (item_id, interaction_type, rating);
+CREATE INDEX IF NOT EXISTS ix_user_interaction_daily_user ON user_interaction_daily(user_id, day);
+CREATE INDEX IF NOT EXISTS ix_item_interaction_daily_item ON item_interaction_daily(item_id, day);
 CREATE INDEX IF NOT EXISTS idx_choices_user ON choices(user_id);
 CREATE INDEX IF NOT EXISTS idx_choices_intent ON choices(intent);
+CREATE INDEX IF NOT EXISTS ix_choices_created_at ON choices(created_at);
 CREATE INDEX IF NOT EXISTS idx_query_sessions_user ON query_sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_query_sessions_session ON query_sessions(session_id);
 
@@ -125,6 +125,17 @@ def get_categories():
     except:
         return []
 
+@st.cache_data(ttl=60)
+def get_analytics(days=30):
+    """Precomputed dashboard analytics (refreshed server-side on a schedule)"""
+    try:
+        response = requests.get(f"{API_BASE_URL}/analytics/stats", params={"days": days}, timeout=10)
+        if response.status_code == 200:
+            return response.json()
+        return None
+    except:
+        return None
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">🧠 SmartChoice AI</h1>', unsafe_allow_html=True)
@@ -263,64 +274,58 @@ def main():
     with tab3:
         st.markdown('<h2 class="sub-header">📊 Аналитика и статистика</h2>', unsafe_allow_html=True)
         
-        # Metrics
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown("""
-            <div class="metric-card">
-                <h3>📈 Всего запросов</h3>
-                <h2>1,234</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div class="metric-card">
-                <h3>🎯 Успешность</h3>
-                <h2>94.2%</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown("""
-            <div class="metric-card">
-                <h3>⚡ Среднее время</h3>
-                <h2>245 мс</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            st.markdown("""
-            <div class="metric-card">
-                <h3>👥 Пользователи</h3>
-                <h2>567</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Charts
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("📊 Популярные категории")
-            categories_data = {
-                'Категория': ['Электроника', 'Одежда', 'Книги', 'Спорт', 'Дом'],
-                'Запросы': [45, 32, 28, 19, 15]
-            }
-            df_cat = pd.DataFrame(categories_data)
-            fig = px.bar(df_cat, x='Категория', y='Запросы', color='Запросы')
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            st.subheader("📈 Время обработки")
-            time_data = {
-                'Время': list(range(24)),
-                'Запросы': [12, 8, 5, 3, 2, 1, 2, 8, 15, 22, 28, 35, 42, 38, 32, 28, 25, 30, 35, 28, 22, 18, 15, 12]
-            }
-            df_time = pd.DataFrame(time_data)
-            fig = px.line(df_time, x='Время', y='Запросы', title='Запросы по часам')
-            st.plotly_chart(fig, use_container_width=True)
-    
+        analytics = get_analytics()
+        if not analytics:
+            st.info("📭 Аналитика пока недоступна")
+        else:
+            totals = analytics.get("totals", {})
+            intents = pd.DataFrame(analytics.get("intents", []))
+            avg_time = None
+            if not intents.empty and intents["queries"].sum():
+                avg_time = (intents["avg_processing_ms"].fillna(0) * intents["queries"]).sum() / intents["queries"].sum()
+
+            # Metrics
+            col1, col2, col3, col4 = st.columns(4)
+            metrics = [
+                (col1, "📈 Всего запросов", f"{totals.get('queries', 0):,}"),
+                (col2, "🖱️ Взаимодействия", f"{totals.get('interactions', 0):,}"),
+                (col3, "⚡ Среднее время", f"{avg_time:.0f} мс" if avg_time is not None else "—"),
+                (col4, "👥 Пользователи", f"{totals.get('users', 0):,}")
+            ]
+            for col, title, value in metrics:
+                with col:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <h3>{title}</h3>
+                        <h2>{value}</h2>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+            # Charts
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.subheader("📊 Популярные категории")
+                df_cat = pd.DataFrame(analytics.get("categories", []))
+                if not df_cat.empty:
+                    df_cat = df_cat.rename(columns={"name": "Категория", "events": "Взаимодействия"})
+                    fig = px.bar(df_cat, x='Категория', y='Взаимодействия', color='Взаимодействия')
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.info("📭 Нет данных")
+
+            with col2:
+                st.subheader("📈 Запросы по намерениям")
+                if not intents.empty:
+                    df_time = intents.rename(columns={"day": "День", "queries": "Запросы", "intent": "Намерение"})
+                    fig = px.line(df_time, x='День', y='Запросы', color='Намерение', title='Запросы по дням')
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.info("📭 Нет данных")
+
+            if analytics.get("updated_at"):
+                st.caption(f"Обновлено: {analytics['updated_at']}")
+
     with tab4:
         st.markdown('<h2 class="sub-header">🧠 NLP Анализ текста</h2>', unsafe_allow_html=True)
         
@@ -0,0 +1,42 @@
+"""
+Behavioral analysis endpoints
+"""
+
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from app.services.behavioral import behavioral_engine
+
+router = APIRouter()
+
+
+class DecisionEvent(BaseModel):
+    user_id: str
+    timestamp: Optional[float] = None  # unix seconds, defaults to now
+    deliberation_hours: Optional[float] = Field(None, ge=0)
+    changed_mind: Optional[bool] = None
+    satisfaction: Optional[float] = Field(None, ge=0, le=10)
+    risk_preference: Optional[str] = None
+
+
+@router.post("/decisions")
+async def record_decision(event: DecisionEvent) -> Dict[str, Any]:
+    """Add a decision to the user's rolling behavioral aggregates"""
+    accepted = behavioral_engine.record_decision(
+        event.user_id,
+        timestamp=event.timestamp,
+        deliberation_hours=event.deliberation_hours,
+        changed_mind=event.changed_mind,
+        satisfaction=event.satisfaction,
+        risk_preference=event.risk_preference
+    )
+    if not accepted:
+        raise HTTPException(status_code=422, detail="Decision is older than the pattern window or in the future")
+    return {"status": "recorded"}
+
+
+@router.get("/users/{user_id}/patterns")
+async def get_patterns(user_id: str) -> Dict[str, Any]:
+    """Behavioral pattern summary over the configured window"""
+    return behavioral_engine.get_patterns(user_id)
@@ -0,0 +1,52 @@
+"""
+Emotion analysis endpoints
+"""
+
+from typing import Any, Dict, List
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from loguru import logger
+
+from app.core.config import VALIDATION_RULES
+from app.services.emotion import emotion_analyzer
+
+router = APIRouter()
+
+MAX_BATCH_TEXTS = 64
+
+
+class EmotionRequest(BaseModel):
+    text: str = Field(..., min_length=1, max_length=VALIDATION_RULES["max_text_length"])
+
+
+class EmotionBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_TEXTS)
+
+
+@router.post("/analyze")
+async def analyze_emotion(request: EmotionRequest) -> Dict[str, Any]:
+    """Dominant emotion and per-label scores for one text"""
+    try:
+        return await emotion_analyzer.analyze(request.text)
+    except Exception as e:
+        logger.error(f"Emotion analysis failed: {e}")
+        raise HTTPException(status_code=503, detail="Emotion model unavailable")
+
+
+@router.post("/analyze/batch")
+async def analyze_emotions(request: EmotionBatchRequest) -> Dict[str, Any]:
+    """Emotions for a list of texts, in input order"""
+    too_long = [i for i, text in enumerate(request.texts) if len(text) > VALIDATION_RULES["max_text_length"]]
+    if too_long:
+        raise HTTPException(status_code=422, detail=f"Texts too long at positions {too_long}")
+    try:
+        return {"results": await emotion_analyzer.analyze_many(request.texts)}
+    except Exception as e:
+        logger.error(f"Emotion batch analysis failed: {e}")
+        raise HTTPException(status_code=503, detail="Emotion model unavailable")
+
+
+@router.get("/stats")
+async def emotion_stats() -> Dict[str, Any]:
+    """Batching and cache statistics"""
+    return emotion_analyzer.get_stats()
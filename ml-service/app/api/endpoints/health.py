@@ -0,0 +1,22 @@
+"""
+Health and resource endpoints
+"""
+
+from typing import Any, Dict
+from fastapi import APIRouter
+
+from app.services.model_loader import model_registry
+
+router = APIRouter()
+
+
+@router.get("/")
+async def health() -> Dict[str, Any]:
+    """Liveness check"""
+    return {"status": "healthy"}
+
+
+@router.get("/models")
+async def models() -> Dict[str, Any]:
+    """Model registry: resident models, memory budget, load/evict/hit counters"""
+    return model_registry.get_stats()
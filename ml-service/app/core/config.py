@@ -74,17 +74,21 @@ settings = Settings()
 MODEL_CONFIG = {
     "emotion": {
         "model_name": "j-hartmann/emotion-english-distilroberta-base",
+        "task": "text-classification",
+        "preload": True,
         "cache_key": "emotion_model",
         "max_length": 512,
         "return_all_scores": True
     },
     "sentiment": {
         "model_name": "cardiffnlp/twitter-roberta-base-sentiment-latest",
+        "task": "text-classification",
         "cache_key": "sentiment_model",
         "max_length": 512
     },
     "text_classification": {
         "model_name": "microsoft/DialoGPT-medium",
+        "task": "text-generation",
         "cache_key": "text_model",
         "max_length": 1024
     }
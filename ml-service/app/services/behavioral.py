@@ -0,0 +1,193 @@
+"""
+Behavioral pattern analysis over a rolling window of user decisions
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import numpy as np
+
+from app.core.config import ALGORITHM_CONFIG
+
+SECONDS_PER_DAY = 86400
+
+# Client clocks may run this far ahead; later timestamps are rejected
+MAX_CLOCK_SKEW_SECONDS = 300
+
+# Accepted risk labels: the dataset's Russian levels and English aliases
+RISK_LEVELS = {
+    "Избегание": 0, "avoid": 0, "averse": 0,
+    "Нейтральная": 1, "neutral": 1,
+    "Принятие": 2, "seek": 2, "seeking": 2
+}
+
+# Columns of a day bucket
+COUNT, HOURS, HOURS_SQ, HOURS_N, CHANGED, SATISFACTION, SATISFACTION_N, RISK_AVOID, RISK_NEUTRAL, RISK_SEEK = range(10)
+N_METRICS = 10
+
+
+class RollingWindow:
+    """Per-day metric buckets in a ring of `window` days.
+
+    Adding a decision touches one bucket; summarizing sums at most `window`
+    rows, so both are O(1) in the length of the decision history.
+    """
+
+    __slots__ = ("days", "buckets")
+
+    def __init__(self, window: int):
+        self.days = np.full(window, -1, dtype=np.int64)
+        self.buckets = np.zeros((window, N_METRICS))
+
+    def add(self, day: int, values: np.ndarray) -> bool:
+        slot = day % self.days.size
+        if self.days[slot] != day:
+            if self.days[slot] > day:
+                # Older than the window already covered by this slot
+                return False
+            self.days[slot] = day
+            self.buckets[slot] = 0.0
+        self.buckets[slot] += values
+        return True
+
+    def totals(self, today: int) -> np.ndarray:
+        live = (self.days > today - self.days.size) & (self.days <= today)
+        return self.buckets[live].sum(axis=0)
+
+
+class BehavioralEngine:
+    """Incremental per-user behavioral aggregates over the last `pattern_window` days"""
+
+    def __init__(self,
+                 pattern_window: int,
+                 min_decisions: int,
+                 confidence_threshold: float,
+                 max_users: int = 100000):
+        self.pattern_window = pattern_window
+        self.min_decisions = min_decisions
+        self.confidence_threshold = confidence_threshold
+        self.max_users = max_users
+        self._users: "OrderedDict[str, RollingWindow]" = OrderedDict()
+        self._population = RollingWindow(pattern_window)
+        self._lock = threading.Lock()
+
+    def _encode(self,
+                deliberation_hours: Optional[float],
+                changed_mind: Optional[bool],
+                satisfaction: Optional[float],
+                risk_preference: Optional[str]) -> np.ndarray:
+        values = np.zeros(N_METRICS)
+        values[COUNT] = 1.0
+        if deliberation_hours is not None:
+            values[HOURS] = deliberation_hours
+            values[HOURS_SQ] = deliberation_hours ** 2
+            values[HOURS_N] = 1.0
+        values[CHANGED] = 1.0 if changed_mind else 0.0
+        if satisfaction is not None:
+            values[SATISFACTION] = satisfaction
+            values[SATISFACTION_N] = 1.0
+        risk = RISK_LEVELS.get(risk_preference) if risk_preference else None
+        if risk is not None:
+            values[RISK_AVOID + risk] = 1.0
+        return values
+
+    def record_decision(self,
+                        user_id: str,
+                        timestamp: Optional[float] = None,
+                        deliberation_hours: Optional[float] = None,
+                        changed_mind: Optional[bool] = None,
+                        satisfaction: Optional[float] = None,
+                        risk_preference: Optional[str] = None) -> bool:
+        """Fold one decision into the user's window; False if it is too old or in the future"""
+        now = time.time()
+        timestamp = timestamp if timestamp is not None else now
+        if timestamp > now + MAX_CLOCK_SKEW_SECONDS:
+            # A future day's slot still holds a live day of the ring
+            return False
+        day = int(min(timestamp, now) // SECONDS_PER_DAY)
+        if day <= int(now // SECONDS_PER_DAY) - self.pattern_window:
+            return False
+
+        values = self._encode(deliberation_hours, changed_mind, satisfaction, risk_preference)
+        with self._lock:
+            window = self._users.get(user_id)
+            if window is None:
+                window = self._users[user_id] = RollingWindow(self.pattern_window)
+                if len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(user_id)
+            accepted = window.add(day, values)
+            if accepted:
+                self._population.add(day, values)
+        return accepted
+
+    @staticmethod
+    def _stats(totals: np.ndarray) -> Dict[str, Any]:
+        totals = totals.tolist()
+        count = totals[COUNT]
+        hours_n = totals[HOURS_N]
+        mean_hours = totals[HOURS] / hours_n if hours_n else None
+        std_hours = (
+            max(totals[HOURS_SQ] / hours_n - mean_hours ** 2, 0.0) ** 0.5 if hours_n else None
+        )
+        risk_counts = totals[RISK_AVOID:RISK_SEEK + 1]
+        risk_total = sum(risk_counts)
+        return {
+            "decisions": int(count),
+            "avg_deliberation_hours": round(mean_hours, 2) if mean_hours is not None else None,
+            "std_deliberation_hours": round(std_hours, 2) if std_hours is not None else None,
+            "changed_mind_rate": round(totals[CHANGED] / count, 3) if count else None,
+            "avg_satisfaction": (
+                round(totals[SATISFACTION] / totals[SATISFACTION_N], 2) if totals[SATISFACTION_N] else None
+            ),
+            "risk_profile": {
+                level: round(n / risk_total, 3)
+                for level, n in zip(("avoid", "neutral", "seek"), risk_counts)
+            } if risk_total else None
+        }
+
+    def get_patterns(self, user_id: str) -> Dict[str, Any]:
+        """Pattern summary for a user from the rolling aggregates"""
+        today = int(time.time() // SECONDS_PER_DAY)
+        with self._lock:
+            window = self._users.get(user_id)
+            user_totals = window.totals(today) if window is not None else np.zeros(N_METRICS)
+            population_totals = self._population.totals(today)
+
+        summary = self._stats(user_totals)
+        population = self._stats(population_totals)
+        summary.update({
+            "user_id": user_id,
+            "window_days": self.pattern_window,
+            "sufficient_data": summary["decisions"] >= self.min_decisions,
+            "patterns": []
+        })
+        if not summary["sufficient_data"]:
+            return summary
+
+        patterns = summary["patterns"]
+        if summary["changed_mind_rate"] >= self.confidence_threshold:
+            patterns.append("frequently_changes_mind")
+        if summary["risk_profile"]:
+            if summary["risk_profile"]["seek"] >= self.confidence_threshold:
+                patterns.append("risk_seeking")
+            elif summary["risk_profile"]["avoid"] >= self.confidence_threshold:
+                patterns.append("risk_averse")
+        user_hours = summary["avg_deliberation_hours"]
+        population_hours = population["avg_deliberation_hours"]
+        if user_hours is not None and population_hours:
+            if user_hours <= 0.5 * population_hours:
+                patterns.append("quick_decider")
+            elif user_hours >= 1.5 * population_hours:
+                patterns.append("slow_decider")
+        return summary
+
+
+# Global instance
+behavioral_engine = BehavioralEngine(
+    pattern_window=ALGORITHM_CONFIG["behavioral_analysis"]["pattern_window"],
+    min_decisions=ALGORITHM_CONFIG["behavioral_analysis"]["min_decisions"],
+    confidence_threshold=ALGORITHM_CONFIG["behavioral_analysis"]["confidence_threshold"]
+)
@@ -0,0 +1,116 @@
+"""
+Emotion analysis with micro-batched inference across concurrent requests
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from app.core.config import ALGORITHM_CONFIG, MODEL_CONFIG
+from app.services.cache import get_cache, text_key
+from app.services.model_loader import model_registry
+
+
+class EmotionAnalyzer:
+    """Collects texts from concurrent callers into one classifier call.
+
+    A request waits at most `max_wait_ms` for others to join its batch
+    (or until `max_batch_size` texts are pending). Results are cached by
+    text hash, and identical texts already in flight share one prediction.
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.config = MODEL_CONFIG["emotion"]
+        self.weights = ALGORITHM_CONFIG["emotion_analysis"]["emotion_weights"]
+        self.confidence_threshold = ALGORITHM_CONFIG["emotion_analysis"]["confidence_threshold"]
+        self.cache = get_cache("emotion_results")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"batches": 0, "texts": 0, "max_batch": 0}
+
+    def _predict(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """One forward pass over the batch, truncated to the model's max_length"""
+        return model_registry.get("emotion")(
+            texts,
+            batch_size=len(texts),
+            truncation=True,
+            max_length=self.config["max_length"]
+        )
+
+    def _summarize(self, scores: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ranked = sorted(scores, key=lambda s: s["score"], reverse=True)
+        top = ranked[0]
+        return {
+            "emotion": top["label"],
+            "confidence": round(float(top["score"]), 4),
+            "confident": top["score"] >= self.confidence_threshold,
+            "decision_weight": self.weights.get(top["label"], 1.0),
+            "scores": {s["label"]: round(float(s["score"]), 4) for s in ranked}
+        }
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, str, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(batch)
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+            try:
+                predictions = await loop.run_in_executor(None, self._predict, [text for _, text, _ in batch])
+                for (key, _, future), scores in zip(batch, predictions):
+                    result = self._summarize(scores)
+                    self.cache.set(key, result)
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                logger.error(f"Emotion batch of {len(batch)} failed: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for key, _, _ in batch:
+                    self._inflight.pop(key, None)
+
+    async def analyze(self, text: str) -> Dict[str, Any]:
+        """Emotion of one text, cached, batched with concurrent callers"""
+        key = text_key(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(key)
+        if future is None:
+            self._ensure_worker()
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            self._queue.put_nowait((key, text, future))
+        return await asyncio.shield(future)
+
+    async def analyze_many(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Emotions of several texts through the same batching engine"""
+        return list(await asyncio.gather(*(self.analyze(text) for text in texts)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "cache": self.cache.stats()}
+
+
+# Global instance
+emotion_analyzer = EmotionAnalyzer()
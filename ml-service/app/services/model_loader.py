@@ -0,0 +1,175 @@
+"""
+Model registry: on-demand loading within a fixed memory budget
+"""
+
+import asyncio
+import gc
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from loguru import logger
+
+from app.core.config import settings, MODEL_CONFIG
+
+BYTES_PER_MB = 1024 * 1024
+
+
+class ModelBudgetExceeded(Exception):
+    """Raised when a model does not fit in the memory budget even alone"""
+
+
+def _load_pipeline(name: str):
+    """Build the Hugging Face pipeline for a MODEL_CONFIG entry"""
+    from transformers import pipeline
+    config = MODEL_CONFIG[name]
+    kwargs = {"top_k": None} if config.get("return_all_scores") else {}
+    return pipeline(
+        config.get("task", "text-classification"),
+        model=config["model_name"],
+        model_kwargs={"cache_dir": settings.MODEL_CACHE_DIR},
+        **kwargs
+    )
+
+
+def estimate_size_mb(model: Any) -> float:
+    """Resident size of a pipeline's (or module's) parameters and buffers"""
+    module = getattr(model, "model", model)
+    try:
+        tensors = list(module.parameters()) + list(module.buffers())
+    except AttributeError:
+        return 0.0
+    return sum(t.numel() * t.element_size() for t in tensors) / BYTES_PER_MB
+
+
+class ModelRegistry:
+    """Loads models on first use and evicts the least recently used ones
+    whenever the estimated resident size would exceed `budget_mb`."""
+
+    def __init__(self,
+                 budget_mb: float,
+                 loader: Callable[[str], Any] = _load_pipeline,
+                 size_of: Callable[[Any], float] = estimate_size_mb):
+        self.budget_mb = budget_mb
+        self.loader = loader
+        self.size_of = size_of
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.stats = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0, "load_seconds": 0.0}
+
+    @property
+    def resident_mb(self) -> float:
+        return sum(self._sizes[name] for name in self._models)
+
+    def _evict_until(self, free_mb: float, keep: Optional[str] = None):
+        """Drop LRU models until `free_mb` fits in the budget"""
+        for name in list(self._models):
+            if self.resident_mb + free_mb <= self.budget_mb:
+                break
+            if name == keep:
+                continue
+            del self._models[name]
+            self.stats["evictions"] += 1
+            logger.info(f"Evicted model {name} ({self._sizes[name]:.0f} MB)")
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def get(self, name: str) -> Any:
+        """The loaded model, loading (and evicting others) if needed.
+
+        The loader runs outside the registry lock under a per-name lock, so a
+        slow load only blocks callers of the same model; hits and loads of
+        other models proceed meanwhile.
+        """
+        with self._lock:
+            model = self._hit(name)
+            if model is not None:
+                return model
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # Another caller may have finished loading it while we waited
+                model = self._hit(name)
+                if model is not None:
+                    return model
+
+                self.stats["misses"] += 1
+                # Make room before loading when the size is known from an earlier load
+                known = self._sizes.get(name)
+                if known is not None:
+                    if known > self.budget_mb:
+                        raise ModelBudgetExceeded(f"Model {name} needs {known:.0f} MB, budget is {self.budget_mb} MB")
+                    self._evict_until(known)
+
+            start = time.perf_counter()
+            model = self.loader(name)
+            elapsed = time.perf_counter() - start
+            size = self.size_of(model)
+
+            with self._lock:
+                self.stats["load_seconds"] += elapsed
+                self.stats["loads"] += 1
+                self._sizes[name] = size
+                if size > self.budget_mb:
+                    del model
+                    gc.collect()
+                    raise ModelBudgetExceeded(f"Model {name} needs {size:.0f} MB, budget is {self.budget_mb} MB")
+
+                self._models[name] = model
+                self._evict_until(0.0, keep=name)
+                logger.info(f"Loaded model {name} ({size:.0f} MB, resident {self.resident_mb:.0f}/{self.budget_mb} MB)")
+            return model
+
+    def _hit(self, name: str) -> Optional[Any]:
+        """The resident model marked as most recently used, or None (call under the lock)"""
+        model = self._models.get(name)
+        if model is not None:
+            self._models.move_to_end(name)
+            self.stats["hits"] += 1
+        return model
+
+    def evict(self, name: str) -> bool:
+        """Unload a model explicitly"""
+        with self._lock:
+            if self._models.pop(name, None) is None:
+                return False
+            self.stats["evictions"] += 1
+            gc.collect()
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "load_seconds": round(self.stats["load_seconds"], 2),
+                "hit_rate": round(self.stats["hits"] / total, 3) if total else 0.0,
+                "budget_mb": self.budget_mb,
+                "resident_mb": round(self.resident_mb, 1),
+                "loaded": [{"name": n, "size_mb": round(self._sizes[n], 1)} for n in self._models],
+                "known_sizes_mb": {n: round(s, 1) for n, s in self._sizes.items()}
+            }
+
+
+# Global instance
+model_registry = ModelRegistry(budget_mb=settings.MAX_MODEL_MEMORY)
+
+
+async def load_models():
+    """Preload the models marked with "preload" in MODEL_CONFIG; others load on demand"""
+    loop = asyncio.get_running_loop()
+    for name, config in MODEL_CONFIG.items():
+        if not config.get("preload"):
+            continue
+        try:
+            await loop.run_in_executor(None, model_registry.get, name)
+        except Exception as e:
+            logger.error(f"Failed to preload model {name}: {e}")
@@ -0,0 +1,44 @@
+import pytest
+import os
+import sys
+import time
+
+# Add ml-service root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.behavioral import SECONDS_PER_DAY, BehavioralEngine
+
+
+@pytest.fixture
+def engine():
+    return BehavioralEngine(pattern_window=3, min_decisions=1, confidence_threshold=0.7)
+
+
+class TestBehavioralEngine:
+    def test_future_timestamp_is_rejected(self, engine):
+        """A future-dated decision does not overwrite a live day of the user or population window"""
+        now = time.time()
+        assert engine.record_decision("u1", timestamp=now - 2 * SECONDS_PER_DAY, satisfaction=4.0)
+        assert engine.record_decision("u1", timestamp=now, satisfaction=2.0)
+
+        assert not engine.record_decision("u1", timestamp=now + 2 * SECONDS_PER_DAY, satisfaction=5.0)
+        assert not engine.record_decision("u2", timestamp=now + 1e9)
+
+        patterns = engine.get_patterns("u1")
+        assert patterns["decisions"] == 2
+        assert patterns["avg_satisfaction"] == 3.0
+        assert engine._stats(engine._population.totals(int(now // SECONDS_PER_DAY)))["decisions"] == 2
+
+    def test_small_skew_counts_as_now(self, engine):
+        """A timestamp slightly ahead of the server clock is recorded for today"""
+        assert engine.record_decision("u1", timestamp=time.time() + 60)
+        assert engine.get_patterns("u1")["decisions"] == 1
+
+    def test_old_timestamp_is_rejected(self, engine):
+        """Decisions older than the pattern window are not recorded"""
+        assert not engine.record_decision("u1", timestamp=time.time() - 5 * SECONDS_PER_DAY)
+        assert engine.get_patterns("u1")["decisions"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
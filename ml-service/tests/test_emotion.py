@@ -0,0 +1,121 @@
+import pytest
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# Add ml-service root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services import cache as cache_module
+from app.services import emotion as emotion_module
+from app.services.cache import TTLCache, text_key
+from app.services.emotion import EmotionAnalyzer
+from app.services.model_loader import ModelRegistry
+
+
+class FakeClassifier:
+    """Stands in for the emotion pipeline and records every batch it is given"""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def __call__(self, texts, batch_size, truncation, max_length):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("inference failed")
+        return [[{"label": "joy", "score": 0.9}, {"label": "fear", "score": 0.1}] for _ in texts]
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    classifier = FakeClassifier()
+    registry = ModelRegistry(budget_mb=100, loader=lambda name: classifier, size_of=lambda m: 0.0)
+    monkeypatch.setattr(emotion_module, "model_registry", registry)
+    return classifier
+
+
+def analyzer(max_batch_size: int = 32, max_wait_ms: float = 50.0) -> EmotionAnalyzer:
+    analyzer = EmotionAnalyzer(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    analyzer.cache = TTLCache(max_size=100, ttl=60)
+    return analyzer
+
+
+class TestEmotionBatching:
+    def test_concurrent_calls_share_batches_up_to_max_size(self, classifier):
+        """Concurrent analyze calls become one classifier call per max_batch_size texts"""
+        engine = analyzer(max_batch_size=3)
+        texts = [f"text {i}" for i in range(7)]
+        results = asyncio.run(engine.analyze_many(texts))
+
+        assert [len(batch) for batch in classifier.batches] == [3, 3, 1]
+        assert sorted(sum(classifier.batches, [])) == sorted(texts)
+        assert all(r["emotion"] == "joy" and r["confident"] for r in results)
+        assert engine.stats == {"batches": 3, "texts": 7, "max_batch": 3}
+
+    def test_identical_inflight_texts_share_one_prediction(self, classifier):
+        """The same text requested concurrently is predicted once, later calls hit the cache"""
+        engine = analyzer()
+
+        async def run():
+            results = await asyncio.gather(*(engine.analyze(t) for t in ("same", "same", "  same ", "other")))
+            return results + [await engine.analyze("same")]
+
+        results = asyncio.run(run())
+        assert classifier.batches == [["same", "other"]]
+        assert results[0] == results[1] == results[2] == results[4]
+        assert engine.cache.hits == 1
+
+    def test_failed_batch_reaches_every_waiter(self, classifier):
+        """Every caller of a failed batch gets the error and the texts can be retried"""
+        engine = analyzer()
+
+        async def run():
+            classifier.fail = True
+            failed = await asyncio.gather(*(engine.analyze(t) for t in ("a", "a", "b")), return_exceptions=True)
+            inflight = dict(engine._inflight)
+            classifier.fail = False
+            return failed, inflight, await engine.analyze("a")
+
+        failed, inflight, retried = asyncio.run(run())
+        assert all(isinstance(e, RuntimeError) for e in failed)
+        assert inflight == {}
+        assert retried["emotion"] == "joy"
+        assert classifier.batches == [["a", "b"], ["a"]]
+
+
+class TestTTLCache:
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        """An entry is served until its ttl passes and then dropped"""
+        now = [1000.0]
+        monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+        cache = TTLCache(max_size=10, ttl=5)
+        cache.set("k", {"v": 1})
+
+        now[0] += 4.9
+        assert cache.get("k") == {"v": 1}
+        now[0] += 0.2
+        assert cache.get("k") is None
+        assert cache.stats()["size"] == 0
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_size_bound_evicts_least_recently_used(self):
+        """Past max_size the least recently used entry goes first"""
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+        assert cache.stats()["size"] == 2
+
+    def test_text_key_ignores_whitespace(self):
+        """Texts differing only in whitespace share a cache key"""
+        assert text_key(" hello   world ") == text_key("hello world") != text_key("hello")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,75 @@
+import pytest
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add ml-service root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.model_loader import ModelBudgetExceeded, ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name: str, size_mb: float):
+        self.name = name
+        self.size_mb = size_mb
+
+
+class TestModelRegistry:
+    def test_slow_load_does_not_block_other_models(self):
+        """A resident model is served while another model is still loading"""
+        release = threading.Event()
+        started = threading.Event()
+
+        def loader(name):
+            if name == "slow":
+                started.set()
+                assert release.wait(5)
+            return FakeModel(name, 10)
+
+        registry = ModelRegistry(budget_mb=100, loader=loader, size_of=lambda m: m.size_mb)
+        registry.get("fast")
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            slow = pool.submit(registry.get, "slow")
+            assert started.wait(5)
+            assert registry.get("fast").name == "fast"
+            release.set()
+            assert slow.result(5).name == "slow"
+        assert registry.stats["loads"] == 2 and registry.stats["hits"] == 1
+
+    def test_concurrent_misses_load_once(self):
+        """Callers of a model being loaded wait for that load instead of repeating it"""
+        calls = []
+        barrier = threading.Barrier(4)
+
+        def loader(name):
+            calls.append(name)
+            return FakeModel(name, 10)
+
+        registry = ModelRegistry(budget_mb=100, loader=loader, size_of=lambda m: m.size_mb)
+
+        def get():
+            barrier.wait(5)
+            return registry.get("emotion")
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            models = [f.result(5) for f in [pool.submit(get) for _ in range(4)]]
+        assert calls == ["emotion"]
+        assert all(m is models[0] for m in models)
+
+    def test_budget_evicts_least_recently_used(self):
+        """Loading past the budget evicts the LRU model; oversized models are refused"""
+        registry = ModelRegistry(budget_mb=25, loader=lambda n: FakeModel(n, 30 if n == "huge" else 10),
+                                 size_of=lambda m: m.size_mb)
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")
+        assert [m["name"] for m in registry.get_stats()["loaded"]] == ["a", "c"]
+        with pytest.raises(ModelBudgetExceeded):
+            registry.get("huge")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,142 @@
+import pytest
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import Base
+from app.models.analytics import AnalyticsTotal, CategoryInteractionCount, QueryIntentDaily, RecentDecision
+from app.models.choice import Category, Choice, Item
+from app.models.user import ItemInteractionDaily, User, UserInteraction, UserInteractionDaily
+from app.repositories import analytics as analytics_repo
+from app.services.analytics_summary import AnalyticsSummary
+from app.services.interaction_rollups import InteractionMaintenance
+
+TODAY = date(2026, 10, 19)
+
+
+def at(days_ago: int, hour: int = 12) -> datetime:
+    return datetime(TODAY.year, TODAY.month, TODAY.day, hour, tzinfo=timezone.utc) - timedelta(days=days_ago)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "analytics.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[
+        model.__table__ for model in (User, Category, Item, Choice, UserInteraction, UserInteractionDaily,
+                                      ItemInteractionDaily, AnalyticsTotal, QueryIntentDaily,
+                                      CategoryInteractionCount, RecentDecision)
+    ])
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": i, "username": f"u{i}", "email": f"u{i}@example.com", "hashed_password": "x"} for i in (1, 2)
+        ])
+        conn.execute(Category.__table__.insert(), [{"id": 1, "name": "Электроника"}, {"id": 2, "name": "Книги"}])
+        conn.execute(Item.__table__.insert(), [
+            {"id": 10, "name": "Ноутбук", "category_id": 1},
+            {"id": 11, "name": "Роман", "category_id": 2}
+        ])
+        conn.execute(UserInteraction.__table__.insert(), [
+            {"user_id": 1, "item_id": 10, "interaction_type": "view", "timestamp": at(0)},
+            {"user_id": 1, "item_id": 10, "interaction_type": "like", "timestamp": at(2)},
+            {"user_id": 2, "item_id": 11, "interaction_type": "view", "timestamp": at(2)}
+        ])
+        conn.execute(Choice.__table__.insert(), [
+            {"id": 1, "query_text": "ноутбук", "intent": "search", "processing_time_ms": 100, "created_at": at(2)},
+            {"id": 2, "query_text": "сравни", "intent": "compare", "processing_time_ms": 300, "created_at": at(2)},
+            {"id": 3, "query_text": "книга", "intent": None, "processing_time_ms": 50, "created_at": at(0)}
+        ])
+    engine.dispose()
+    return path
+
+
+def run_summary(path, **kwargs):
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        InteractionMaintenance(interval=3600, retention_days=0, months_ahead=1, db_engine=engine).run_once(TODAY)
+        summary = AnalyticsSummary(interval=300, db_engine=engine, **kwargs)
+        summary.refresh(TODAY)
+        return summary, engine
+    except Exception:
+        engine.dispose()
+        raise
+
+
+async def read_stats(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with AsyncSession(engine) as session:
+            return (
+                await analytics_repo.get_totals(session),
+                await analytics_repo.category_counts(session),
+                await analytics_repo.recent_decisions(session, limit=5)
+            )
+    finally:
+        await engine.dispose()
+
+
+class TestAnalyticsSummary:
+    def test_summary_tables(self, db_path):
+        """Totals, per-category counts and the recent list match the source tables"""
+        summary, engine = run_summary(db_path)
+        engine.dispose()
+        totals, categories, recent = asyncio.run(read_stats(db_path))
+        assert totals["totals"] == {"users": 2, "items": 2, "queries": 3, "interactions": 3}
+        assert totals["updated_at"] is not None
+        assert [(c["name"], c["events"]) for c in categories] == [("Электроника", 2), ("Книги", 1)]
+        assert [r[0] for r in recent] == [3, 2, 1]
+
+    def test_intents_are_incremental(self, db_path):
+        """Only the last summarized day and newer ones are recomputed"""
+        summary, engine = run_summary(db_path)
+        try:
+            with engine.begin() as conn:
+                conn.execute(Choice.__table__.insert(), [
+                    {"id": 4, "query_text": "ещё", "intent": "search", "processing_time_ms": 70, "created_at": at(0, 18)}
+                ])
+            assert summary.refresh_intents(TODAY) == 1
+            with engine.connect() as conn:
+                rows = conn.execute(select(
+                    QueryIntentDaily.day, QueryIntentDaily.intent, QueryIntentDaily.queries, QueryIntentDaily.processing_ms_sum
+                ).order_by(QueryIntentDaily.day, QueryIntentDaily.intent)).all()
+        finally:
+            engine.dispose()
+        two_days_ago = TODAY - timedelta(days=2)
+        assert rows == [
+            (two_days_ago, "compare", 1, 300), (two_days_ago, "search", 1, 100),
+            (TODAY, "search", 1, 70), (TODAY, "unknown", 1, 50)
+        ]
+
+    def test_recent_list_is_trimmed(self, db_path):
+        """The recent-decision copy keeps only the newest rows"""
+        summary, engine = run_summary(db_path, recent_limit=2)
+        engine.dispose()
+        totals, categories, recent = asyncio.run(read_stats(db_path))
+        assert [r[0] for r in recent] == [3, 2]
+
+
+    def test_recent_list_includes_late_commits(self, db_path):
+        """A choice committed after a higher id still appears in the recent list"""
+        summary, engine = run_summary(db_path, recent_limit=3)
+        try:
+            for choice_id, hour in ((5, 13), (4, 14)):
+                with engine.begin() as conn:
+                    conn.execute(Choice.__table__.insert(), [
+                        {"id": choice_id, "query_text": "поздний", "intent": "search", "created_at": at(0, hour)}
+                    ])
+                summary.refresh_recent()
+        finally:
+            engine.dispose()
+        totals, categories, recent = asyncio.run(read_stats(db_path))
+        assert [r[0] for r in recent] == [4, 5, 3]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,48 @@
+import pytest
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.decision_dataset import DEFAULT_CSV_PATH, load_decision_dataset
+from app.services.decision_engines import scenario_tensor
+
+class TestDecisionDataset:
+    """Test the compact columnar decision dataset"""
+
+    def test_cache_round_trip(self, tmp_path):
+        """Test that the cached artifact loads back identical arrays"""
+        built = load_decision_dataset(DEFAULT_CSV_PATH, cache_dir=tmp_path)
+        cached = load_decision_dataset(DEFAULT_CSV_PATH, cache_dir=tmp_path)
+
+        assert (tmp_path / "decision_database_main.npz").exists()
+        for name, array in built.to_arrays().items():
+            np.testing.assert_array_equal(cached.to_arrays()[name], array)
+
+    def test_matches_csv(self, tmp_path):
+        """Test codes, criteria and scenario batching against pandas"""
+        frame = pd.read_csv(DEFAULT_CSV_PATH)
+        dataset = load_decision_dataset(DEFAULT_CSV_PATH, cache_dir=None)
+
+        assert len(dataset) == len(frame)
+        assert dataset.label("Категория", 5) == frame["Категория"][5]
+        risk = dataset.factor_columns.index("Склонность_к_риску")
+        assert dataset.factor_vocabularies["Склонность_к_риску"][dataset.factors[0, risk]] == frame["Склонность_к_риску"][0]
+
+        rows, criteria, block = dataset.category_block(frame["Категория"][0])
+        assert block.dtype == np.float32
+        assert not np.isnan(block).any()
+        expected = frame.loc[rows, [f"Критерий_{c}" for c in criteria]].to_numpy(dtype=np.float32)
+        np.testing.assert_array_equal(block, expected)
+
+        keys, ids, tensor = dataset.scenario_tensor()
+        expected_keys, _, expected_ids, expected_tensor = scenario_tensor(frame)
+        assert keys == expected_keys
+        np.testing.assert_array_equal(ids, expected_ids)
+        np.testing.assert_array_equal(tensor, expected_tensor.astype(np.float32))
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,93 @@
+import pytest
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.decision_engines import ahp_priorities, topsis_closeness, scenario_tensor
+
+SAATY_EXAMPLE = np.array([
+    [1.0, 3.0, 5.0],
+    [1 / 3, 1.0, 2.0],
+    [1 / 5, 1 / 2, 1.0]
+])
+
+class TestAHP:
+    """Test AHP priority vectors and consistency"""
+
+    @pytest.mark.parametrize("method", ["eigenvector", "geometric_mean"])
+    def test_consistent_matrix(self, method):
+        """Test that a perfectly consistent matrix recovers its weights with CR 0"""
+        w = np.array([0.5, 0.3, 0.2])
+        weights, cr = ahp_priorities(w[:, None] / w[None, :], method=method)
+
+        np.testing.assert_allclose(weights, w)
+        assert cr == pytest.approx(0.0, abs=1e-9)
+
+    def test_batch_matches_single(self):
+        """Test that a stacked batch gives the same result as one-by-one calls"""
+        inconsistent = SAATY_EXAMPLE.copy()
+        inconsistent[0, 2], inconsistent[2, 0] = 1 / 5, 5.0
+        weights, cr = ahp_priorities(np.stack([SAATY_EXAMPLE, inconsistent]))
+
+        for k, matrix in enumerate([SAATY_EXAMPLE, inconsistent]):
+            single_weights, single_cr = ahp_priorities(matrix)
+            np.testing.assert_allclose(weights[k], single_weights)
+            assert cr[k] == pytest.approx(single_cr)
+        assert cr[0] < 0.1 < cr[1]
+
+class TestTOPSIS:
+    """Test TOPSIS closeness scores"""
+
+    def test_dominant_alternative(self):
+        """Test that a dominating alternative scores 1 and a dominated one 0"""
+        scores = topsis_closeness(np.array([[9.0, 9.0], [5.0, 6.0], [1.0, 2.0]]), [0.5, 0.5])
+
+        assert scores[0] == pytest.approx(1.0)
+        assert scores[2] == pytest.approx(0.0)
+        assert scores[0] > scores[1] > scores[2]
+
+    def test_cost_criterion(self):
+        """Test that cost criteria prefer lower values"""
+        scores = topsis_closeness(np.array([[100.0], [200.0]]), [1.0], benefit=[False])
+
+        assert scores[0] > scores[1]
+
+    def test_nan_padding(self):
+        """Test that padded alternatives and unused criteria do not change the scores"""
+        matrix = np.array([[7.0, 8.0], [9.0, 6.0], [6.0, 9.0]])
+        padded = np.full((2, 4, 3), np.nan)
+        padded[0, :3, :2] = matrix
+        padded[1, :3, 1:] = matrix
+
+        scores = topsis_closeness(padded, [0.4, 0.4, 0.4])
+        expected = topsis_closeness(matrix, [0.5, 0.5])
+
+        np.testing.assert_allclose(scores[:, :3], [expected, expected])
+        assert np.isnan(scores[:, 3]).all()
+
+class TestScenarioTensor:
+    """Test stacking CSV scenarios into a batch"""
+
+    def test_shapes_and_padding(self):
+        """Test grouping, alternative ids and NaN padding"""
+        frame = pd.DataFrame({
+            "ID": [1, 2, 3, 4, 5],
+            "Категория": ["A", "A", "A", "B", "B"],
+            "Сценарий": ["s1", "s1", "s1", "s2", "s2"],
+            "Критерий_Цена": [1.0, 2.0, 3.0, None, None],
+            "Критерий_Качество": [None, None, None, 4.0, 5.0]
+        })
+        keys, criteria, ids, tensor = scenario_tensor(frame)
+
+        assert keys == [("A", "s1"), ("B", "s2")]
+        assert criteria == ["Цена", "Качество"]
+        assert ids.tolist() == [[1, 2, 3], [4, 5, -1]]
+        assert tensor.shape == (2, 3, 2)
+        assert np.isnan(tensor[1, 2]).all()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
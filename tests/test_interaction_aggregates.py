@@ -0,0 +1,143 @@
+import pytest
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.user import UserInteraction
+import app.models.choice  # noqa: F401
+from app.services.interaction_aggregates import InteractionAggregates
+
+DAY = 86400.0
+
+
+@pytest.fixture
+def redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'interactions.db'}")
+    UserInteraction.__table__.create(engine)
+    return engine
+
+
+def insert(engine, *rows, timestamp=None):
+    timestamp = timestamp or datetime.now(timezone.utc) - timedelta(minutes=1)
+    with engine.begin() as conn:
+        conn.execute(UserInteraction.__table__.insert(), [
+            {"id": i, "user_id": u, "item_id": item, "interaction_type": t, "rating": r, "timestamp": timestamp}
+            for i, u, item, t, r in rows
+        ])
+
+
+def aggregates(redis, now: float, landmark_days_ago: float, half_life_days: float = 1.0, **kwargs):
+    landmark = datetime.fromtimestamp(now - landmark_days_ago * DAY, tz=timezone.utc)
+    agg = InteractionAggregates(redis, half_life_days=half_life_days, landmark=landmark, **kwargs)
+    agg.clock = lambda: now
+    return agg
+
+
+class TestInteractionAggregates:
+    def test_record_decays_by_half_life(self, redis):
+        """Weights halve every half-life; only likes and purchases rated 4+ count"""
+        now = time.time()
+        agg = aggregates(redis, now, landmark_days_ago=3)
+        agg.record(1, 10, "like", rating=5, timestamp=datetime.fromtimestamp(now, tz=timezone.utc))
+        agg.record(1, 11, "purchase", rating=4, timestamp=datetime.fromtimestamp(now - 2 * DAY, tz=timezone.utc))
+        agg.record(1, 12, "view", rating=5)
+        agg.record(1, 13, "like", rating=3)
+        agg.record(1, 14, "like")
+        agg.record(1, 15, "rating", rating=5)
+
+        items = agg.user_items(1)
+        assert set(items) == {10, 11}
+        assert items[10] == pytest.approx(1.0)
+        assert items[11] == pytest.approx(0.8 * 0.25)
+
+    def test_weights_survive_landmark_rebase(self, redis):
+        """Values written before the landmark moves keep decaying from their event time"""
+        now = time.time()
+        # 1-day half-life: 32-day epochs, the current one started 8 days ago
+        writer = aggregates(redis, now - 9 * DAY, landmark_days_ago=40 - 9)
+        writer.record(1, 10, "like", 5, timestamp=datetime.fromtimestamp(now - 10 * DAY, tz=timezone.utc))
+        writer.record(2, 10, "like", 5, timestamp=datetime.fromtimestamp(now - 10 * DAY, tz=timezone.utc))
+        reader = aggregates(redis, now, landmark_days_ago=40)
+        reader.record(1, 11, "like", 5)
+        reader.record(3, 11, "like", 5)
+        reader.record(3, 12, "like", 5)
+
+        assert writer.epoch(now - 9 * DAY) == 0 and reader.epoch(now) == 1
+        items = reader.user_items(1)
+        assert items[10] == pytest.approx(2 ** -10)
+        assert items[11] == pytest.approx(1.0)
+        # The recent co-interaction outweighs the decayed one
+        assert reader.similar_users(1) == [3, 2]
+
+    def test_small_half_life_does_not_overflow(self, redis):
+        """Years past the landmark with a short half-life stay finite"""
+        agg = InteractionAggregates(redis, half_life_days=0.01, landmark=datetime(2024, 1, 1, tzinfo=timezone.utc))
+        agg.record(1, 10, "like", 5)
+        agg.record(1, 11, "like", 5, timestamp=datetime.now(timezone.utc) + timedelta(days=365))
+        assert agg.user_items(1) == {10: pytest.approx(1.0, rel=1e-3), 11: pytest.approx(1.0, rel=1e-3)}
+
+    def test_similar_users_reads_only_the_strongest_items(self, redis):
+        """The ZUNIONSTORE input is capped at the user's top weighted items"""
+        now = time.time()
+        agg = aggregates(redis, now, landmark_days_ago=3, max_similar_items=2)
+        for item_id, rating in ((10, 5), (11, 5), (12, 4)):
+            agg.record(1, item_id, "like", rating)
+        agg.record(2, 12, "like", 5)
+        agg.record(3, 10, "like", 4)
+        assert agg.similar_users(1) == [3]
+
+    def test_ensure_built_bootstraps_once(self, redis, tmp_path):
+        """The aggregates are rebuilt from positive database events on first start only"""
+        engine = database(tmp_path)
+        insert(engine, (1, 1, 10, "like", 5), (2, 1, 11, "view", None), (3, 2, 10, "purchase", 4),
+               (4, 4, 10, "rating", 5), (5, 5, 10, "like", None))
+        agg = InteractionAggregates(redis, half_life_days=30, landmark=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                                    session_factory=sessionmaker(bind=engine))
+        try:
+            agg.ensure_built()
+            assert set(agg.user_items(1)) == {10}
+            assert agg.similar_users(1) == [2]
+
+            insert(engine, (6, 3, 10, "like", 5))
+            agg.ensure_built()
+            assert agg.similar_users(1) == [2]
+        finally:
+            engine.dispose()
+
+    def test_catch_up_folds_in_rows_from_any_writer(self, redis, tmp_path):
+        """Rows written after the bootstrap arrive once each, including ids that commit late"""
+        engine = database(tmp_path)
+        insert(engine, (1, 1, 10, "like", 5), (2, 2, 10, "like", 5))
+        agg = InteractionAggregates(redis, half_life_days=30, landmark=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                                    session_factory=sessionmaker(bind=engine))
+        try:
+            agg.ensure_built()
+            insert(engine, (5, 3, 10, "like", 5), (6, 3, 11, "purchase", 4), (7, 3, 12, "view", None))
+            assert agg.catch_up() == 2
+            assert agg.catch_up() == 0
+
+            # Id 4 was allocated before 5 but its transaction committed after the last catch-up
+            insert(engine, (4, 4, 10, "like", 5))
+            assert agg.catch_up(batch_size=1) == 1
+            assert redis.get("agg:watermark") == "6"
+
+            weights = {u: agg.user_items(u).get(10) for u in (1, 2, 3, 4)}
+            assert weights == {u: pytest.approx(1.0, rel=1e-3) for u in (1, 2, 3, 4)}
+            assert sorted(agg.similar_users(1)) == [2, 3, 4]
+        finally:
+            engine.dispose()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,70 @@
+import pytest
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, select
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.user import UserInteraction
+import app.models.choice  # noqa: F401
+from app.repositories import interactions as interaction_repo
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine("sqlite://")
+    UserInteraction.__table__.create(engine)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(UserInteraction.__table__.insert(), [
+            {"user_id": u, "item_id": i, "interaction_type": t, "rating": r, "timestamp": now - timedelta(days=i)}
+            for u in range(50) for i, t, r in [(1, "view", None), (2, "like", 5), (3, "purchase", 3), (4, "rating", 4)]
+        ])
+        conn.exec_driver_sql("ANALYZE")
+    yield engine
+    engine.dispose()
+
+
+def query_plan(engine, statement) -> str:
+    """SQLite EXPLAIN QUERY PLAN of a statement, with its parameters bound as at runtime"""
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+class TestInteractionIndexes:
+    def test_history_uses_user_time_index(self, engine):
+        """Newest-first history seeks (user_id, timestamp) without a sort step"""
+        plan = query_plan(engine, interaction_repo.history_statement(7, limit=20))
+        assert "ix_user_interactions_user_time" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_positive_signals_use_partial_index(self, engine):
+        """The positive-signal scan reads only the partial index's rows"""
+        plan = query_plan(engine, interaction_repo.positive_signals_statement())
+        assert "INDEX ix_user_interactions_positive" in plan
+
+    def test_window_uses_time_index(self, engine):
+        """Recent-window scans seek on timestamp"""
+        since = datetime.now(timezone.utc) - timedelta(days=2)
+        plan = query_plan(engine, interaction_repo.window_statement(since))
+        assert "ix_user_interactions_time" in plan
+
+    def test_item_signals_use_item_type_rating_index(self, engine):
+        """Per-item lookups by type and rating are covered"""
+        statement = select(UserInteraction.item_id, UserInteraction.rating).where(
+            UserInteraction.item_id.in_([1, 2, 3]),
+            UserInteraction.interaction_type == "like",
+            UserInteraction.rating >= 4
+        )
+        plan = query_plan(engine, statement)
+        assert "COVERING INDEX ix_user_interactions_item_type_rating" in plan
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,174 @@
+import pytest
+import asyncio
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.partitions import add_months, partition_name
+from app.models.user import ItemInteractionDaily, UserInteraction, UserInteractionDaily
+import app.models.choice  # noqa: F401
+from app.repositories import interactions as interaction_repo
+from app.services.interaction_rollups import InteractionMaintenance
+
+TODAY = date(2026, 10, 19)
+ROLLUPS = (UserInteraction, UserInteractionDaily, ItemInteractionDaily)
+
+
+def at(days_ago: int, hour: int = 12) -> datetime:
+    return datetime(TODAY.year, TODAY.month, TODAY.day, hour, tzinfo=timezone.utc) - timedelta(days=days_ago)
+
+
+def add_events(engine, events):
+    with engine.begin() as conn:
+        conn.execute(UserInteraction.__table__.insert(), [
+            {"user_id": u, "item_id": i, "interaction_type": t, "rating": r, "timestamp": ts}
+            for u, i, t, r, ts in events
+        ])
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "interactions.db"
+    engine = create_engine(f"sqlite:///{path}")
+    for model in ROLLUPS:
+        model.__table__.create(engine)
+    add_events(engine, [
+        (1, 10, "view", None, at(0)),
+        (1, 10, "like", None, at(1)),
+        (1, 10, "rating", 5, at(1, 23)),
+        (2, 10, "rating", 3, at(1, 0)),
+        (2, 11, "purchase", 4, at(3)),
+        (3, 11, "view", None, at(40)),
+    ])
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def engine(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    yield engine
+    engine.dispose()
+
+
+def maintenance(engine, retention_days: int = 30, lookback_days: int = 3) -> InteractionMaintenance:
+    return InteractionMaintenance(interval=3600, retention_days=retention_days, months_ahead=2,
+                                  lookback_days=lookback_days, db_engine=engine)
+
+
+def rows(engine, statement):
+    with engine.connect() as conn:
+        return conn.execute(statement).all()
+
+
+def item_events(engine, day: date) -> int:
+    return rows(engine, select(func.coalesce(func.sum(ItemInteractionDaily.events), 0))
+                .where(ItemInteractionDaily.day == day))[0][0]
+
+
+async def profile_totals(path, user_id: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with AsyncSession(engine) as session:
+            return await interaction_repo.get_user_interaction_totals(session, user_id)
+    finally:
+        await engine.dispose()
+
+
+class TestDailyRollups:
+    def test_complete_days_are_rolled_up(self, engine):
+        """Each complete UTC day becomes per-item and per-user rows; today stays raw"""
+        result = maintenance(engine, retention_days=0).run_once(TODAY)
+        assert result["days_rolled_up"] == 3
+
+        item_rows = rows(engine, select(
+            ItemInteractionDaily.day, ItemInteractionDaily.item_id, ItemInteractionDaily.interaction_type,
+            ItemInteractionDaily.events, ItemInteractionDaily.rating_sum, ItemInteractionDaily.rating_count
+        ))
+        yesterday = TODAY - timedelta(days=1)
+        assert (yesterday, 10, "rating", 2, 8, 2) in item_rows
+        assert (yesterday, 10, "like", 1, 0, 0) in item_rows
+        assert all(row.day < TODAY for row in item_rows)
+
+        user_rows = rows(engine, select(
+            UserInteractionDaily.user_id, UserInteractionDaily.item_id, UserInteractionDaily.interaction_type,
+            UserInteractionDaily.events, UserInteractionDaily.rating_sum
+        ).where(UserInteractionDaily.day == yesterday))
+        assert sorted(user_rows) == [(1, 10, "like", 1, 0), (1, 10, "rating", 1, 5), (2, 10, "rating", 1, 3)]
+        assert sum(row.events for row in item_rows) == 5
+
+    def test_runs_are_incremental(self, engine):
+        """A second run finds nothing new; the next day's run adds only that day"""
+        job = maintenance(engine, retention_days=0)
+        job.run_once(TODAY)
+        assert job.run_once(TODAY)["days_rolled_up"] == 0
+        assert job.run_once(TODAY + timedelta(days=1))["days_rolled_up"] == 1
+
+    def test_late_event_is_resummarized(self, engine):
+        """An event landing on an already rolled-up day is picked up by the next run"""
+        job = maintenance(engine, retention_days=0, lookback_days=3)
+        job.run_once(TODAY)
+        two_days_ago = TODAY - timedelta(days=2)
+        assert item_events(engine, two_days_ago) == 0
+
+        add_events(engine, [(4, 12, "like", 5, at(2))])
+        assert job.run_once(TODAY)["days_resummarized"] >= 1
+        assert item_events(engine, two_days_ago) == 1
+
+    def test_retention_keeps_recent_and_unrolled_events(self, engine):
+        """Raw events past retention are deleted only once rolled up"""
+        maintenance(engine, retention_days=30).run_once(TODAY)
+        remaining = rows(engine, select(func.count()).select_from(UserInteraction))[0][0]
+        assert remaining == 5
+        rolled = rows(engine, select(func.sum(ItemInteractionDaily.events)))[0][0]
+        assert rolled == 5
+
+    def test_backfilled_event_is_rolled_up_before_expiry(self, engine):
+        """A backfilled event older than the lookback reaches the rollups before retention removes it"""
+        job = maintenance(engine, retention_days=30, lookback_days=1)
+        job.run_once(TODAY)
+        old_day = TODAY - timedelta(days=40)
+        assert item_events(engine, old_day) == 1
+
+        add_events(engine, [(5, 11, "like", 4, at(40, 8)), (5, 12, "view", None, at(35))])
+        job.run_once(TODAY)
+        assert item_events(engine, old_day) == 2
+        assert item_events(engine, TODAY - timedelta(days=35)) == 1
+        expired = rows(engine, select(func.count()).select_from(UserInteraction)
+                       .where(UserInteraction.timestamp < at(30, 0)))[0][0]
+        assert expired == 0
+
+
+class TestUserProfileTotals:
+    def test_profile_combines_rollups_and_raw_events(self, engine, db_path):
+        """Rolled-up days, expired raw events and today's raw events all reach the profile"""
+        maintenance(engine, retention_days=30).run_once(TODAY)
+        add_events(engine, [(1, 11, "like", None, at(0, 13))])
+
+        totals = asyncio.run(profile_totals(db_path, 1))
+        by_key = {(t["item_id"], t["type"]): t for t in totals}
+        assert by_key[(10, "view")]["events"] == 1
+        assert by_key[(10, "rating")]["rating"] == 5.0
+        assert by_key[(11, "like")]["last_seen"] == TODAY.isoformat()
+        assert totals[-1]["last_seen"] == (TODAY - timedelta(days=1)).isoformat()
+
+        # User 3's only event is past retention: it survives in the rollup
+        old = asyncio.run(profile_totals(db_path, 3))
+        assert [(t["item_id"], t["type"], t["events"]) for t in old] == [(11, "view", 1)]
+
+
+class TestPartitionNames:
+    def test_month_arithmetic(self):
+        """Monthly partition names and month rollover"""
+        assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+        assert partition_name("user_interactions", date(2027, 1, 1)) == "user_interactions_p202701"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,54 @@
+import pytest
+import numpy as np
+import os
+import sys
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.item_features import ItemFeatureMatrix
+
+
+def _rows(*items):
+    return [SimpleNamespace(id=i, category_id=c, price=p, rating=r, attributes=a) for i, c, p, r, a in items]
+
+
+class TestItemFeatureSnapshot:
+    def test_snapshot_is_consistent(self):
+        """Ids, arrays and matrix of one build share the same shape"""
+        features = ItemFeatureMatrix(n_price_buckets=2, n_attribute_buckets=8)
+        snapshot = features.build(_rows((1, 10, 100.0, 4.5, {"brand": "Dell"}), (2, 20, 300.0, 3.0, {})))
+        assert snapshot.matrix.shape == (2, snapshot.n_features)
+        assert snapshot.item_ids.tolist() == [1, 2]
+        assert snapshot.prices.size == snapshot.ratings.size == snapshot.item_categories.size == 2
+
+        vector = features.user_vector(snapshot, {"categories": [10], "attributes": {"brand": "Dell"}})
+        scores = snapshot.matrix @ vector
+        assert scores[0] > scores[1]
+
+    def test_new_build_leaves_published_snapshot_intact(self):
+        """A reader holding the old snapshot keeps a complete old build"""
+        features = ItemFeatureMatrix(n_price_buckets=2, n_attribute_buckets=8)
+        features.snapshot = features.build(_rows((1, 10, 100.0, 4.5, {})))
+        old = features.snapshot
+        features.snapshot = features.build(_rows((1, 10, 100.0, 4.5, {}), (2, 20, 50.0, 2.0, {}), (3, 30, None, 0.0, {})))
+        assert old.item_ids.tolist() == [1]
+        assert old.matrix.shape[0] == 1
+        assert np.isinf(features.snapshot.prices[2])
+
+    def test_score_reads_only_the_snapshot(self):
+        """Scoring never checks the catalog version or rebuilds"""
+        features = ItemFeatureMatrix(n_price_buckets=2, n_attribute_buckets=8)
+        features.snapshot = features.build(_rows((1, 10, 100.0, 4.5, {}), (2, 20, 300.0, 3.0, {})))
+
+        def fail():
+            raise AssertionError("score() must not refresh")
+
+        features.ensure_fresh = features.refresh = fail
+        results = features.score({"categories": [10]}, {}, limit=5)
+        assert [r["item_id"] for r in results] == [1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
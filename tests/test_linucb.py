@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.linucb import context_vector, initial_state, sherman_morrison_update, score_arms
+
+class TestShermanMorrison:
+    """Test incremental inverse updates"""
+
+    def test_matches_direct_inverse(self):
+        """Test that rank-one updates track the explicit inverse"""
+        rng = np.random.default_rng(0)
+        dim = 8
+        a_inv, b = initial_state(dim)
+        a = np.eye(dim)
+        for _ in range(200):
+            x = rng.standard_normal(dim)
+            a_inv, b = sherman_morrison_update(a_inv, b, x, 1.0)
+            a += np.outer(x, x)
+
+        np.testing.assert_allclose(a_inv, np.linalg.inv(a), atol=1e-10)
+
+class TestScoreArms:
+    """Test batched arm scoring"""
+
+    def test_fresh_arms_tie(self):
+        """Test that arms without data get identical scores and zero expected reward"""
+        a_inv, b = initial_state(4)
+        x = context_vector({"decision_type": "purchase"}, 4)
+        scores, expected, width = score_arms(np.stack([a_inv] * 3), np.stack([b] * 3), x, alpha=1.0)
+
+        assert np.allclose(scores, scores[0])
+        assert np.allclose(expected, 0.0)
+        assert np.allclose(width, 1.0)
+
+    def test_rewarded_arm_wins(self):
+        """Test that a consistently rewarded arm outranks a failing one"""
+        dim = 8
+        x = context_vector({"decision_type": "purchase"}, dim)
+        good = initial_state(dim)
+        bad = initial_state(dim)
+        for _ in range(20):
+            good = sherman_morrison_update(*good, x, 1.0)
+            bad = sherman_morrison_update(*bad, x, 0.0)
+
+        scores, expected, width = score_arms(
+            np.stack([bad[0], good[0]]), np.stack([bad[1], good[1]]), x, alpha=1.0
+        )
+
+        assert scores[1] > scores[0]
+        assert expected[1] > 0.9
+        assert width[1] < 0.3
+
+class TestContextualBandit:
+    """Test reward tokens of served decisions"""
+
+    @pytest.fixture
+    def bandit(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        from app.services.bandit_service import ContextualBandit
+        return ContextualBandit(fakeredis.FakeRedis(), dim=8, alpha=1.0)
+
+    def test_token_is_consumed(self, bandit):
+        """Test that a decision can be rewarded only once"""
+        token, _ = bandit.rank(["a", "b"], {"decision_type": "purchase"})
+        assert bandit.update(token, "a", 1.0) is True
+        assert bandit.update(token, "a", 1.0) is False
+        assert bandit._load(["a"])[2] == [1]
+
+    def test_unserved_arm_is_rejected(self, bandit):
+        """Test that only arms shown for the decision can be credited"""
+        token, _ = bandit.rank(["a", "b"], {"decision_type": "purchase"})
+        with pytest.raises(ValueError):
+            bandit.update(token, "c", 1.0)
+        assert bandit._load(["c"])[2] == [0]
+        # The token stays valid for a served arm
+        assert bandit.update(token, "b", 0.0) is True
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,61 @@
+import pytest
+import os
+import re
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.api.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.models.choice import Item
+import app.models.user  # noqa: F401
+from app.repositories.items import _search_statement, explain_statement
+
+
+class TestCursor:
+    def test_round_trip(self):
+        """Cursors decode to the exact key they were issued for"""
+        filters = {"query": "смартфон", "min_price": 10.0}
+        for key in [(0.123456789012345, 42), (None, 7), (-3.5e-7, 1)]:
+            assert decode_cursor(encode_cursor(key, filters), filters) == key
+
+    def test_rejects_other_filters(self):
+        """A cursor cannot continue a different query"""
+        cursor = encode_cursor((1.0, 5), {"query": "a"})
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, {"query": "b"})
+
+    def test_rejects_garbage(self):
+        """Malformed cursors raise InvalidCursor, not a server error"""
+        for cursor in ["", "!!!", "e30", encode_cursor((1.0, 5), {})[:-3]]:
+            with pytest.raises(InvalidCursor):
+                decode_cursor(cursor, {})
+
+
+def _explain(**filters):
+    dialect = asyncpg_dialect()
+    statement, _ = _search_statement(select(Item.id), "postgresql", **filters)
+    return explain_statement(statement, dialect)
+
+
+class TestEstimatedCount:
+    def test_attributes_filter(self):
+        """JSONB containment compiles for EXPLAIN as a bound parameter"""
+        sql, params = _explain(attributes={"brand": "Dell", "ram_gb": 16}, min_price=100.0)
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "@>" in sql and "$1::JSONB" in sql
+        assert {"brand": "Dell", "ram_gb": 16} in params and 100.0 in params
+
+    def test_colon_in_query(self):
+        """User text with ":word" stays a value, not a bind placeholder"""
+        sql, params = _explain(query="iphone :pro")
+        assert ":pro" not in sql
+        assert "iphone :pro" in params
+        assert len(set(re.findall(r"\$(\d+)", sql))) == len(params)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,60 @@
+import pytest
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.choice import Category, Item
+from app.models.user import ItemInteractionDaily, UserInteraction
+from app.services.popularity_service import PopularityService
+
+
+@pytest.fixture
+def popularity(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'popularity.db'}")
+    for model in (Category, Item, UserInteraction, ItemInteractionDaily):
+        model.__table__.create(engine)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(Item.__table__.insert(), [
+            {"id": i, "name": name, "category_id": None, "price": 100.0, "rating": 4.0, "rating_count": 0}
+            for i, name in ((1, "Классика"), (2, "Новинка"), (3, "Забытый"))
+        ])
+        # Item 1: many purchases three weeks ago; item 2: a few likes today
+        conn.execute(UserInteraction.__table__.insert(), [
+            {"user_id": u, "item_id": 1, "interaction_type": "purchase", "rating": None, "timestamp": now - timedelta(days=21)}
+            for u in range(20)
+        ] + [
+            {"user_id": u, "item_id": 2, "interaction_type": "like", "rating": None, "timestamp": now - timedelta(hours=2)}
+            for u in range(3)
+        ])
+    service = PopularityService(refresh_interval=600, window_days=90, popular_half_life_days=14,
+                                trending_half_life_days=1, session_factory=sessionmaker(bind=engine))
+    service.refresh()
+    yield service
+    engine.dispose()
+
+
+class TestPopularityService:
+    def test_decayed_scores(self, popularity):
+        """Long half-life favors sustained volume, short half-life favors recent activity"""
+        popular = popularity.get_items(kind="popular")
+        trending = popularity.get_items(kind="trending")
+        assert [i["item_id"] for i in popular][:2] == [1, 2]
+        assert [i["item_id"] for i in trending][:2] == [2, 1]
+        assert trending[0]["score"] == pytest.approx(1.0)
+        assert next(i["score"] for i in trending if i["item_id"] == 3) == 0.0
+
+    def test_mixed_items_lead_with_trending(self, popularity):
+        """The fallback list mixes in trending items with recent activity, without duplicates"""
+        mixed = popularity.get_mixed_items(limit=3)
+        assert [(i["item_id"], i["kind"]) for i in mixed] == [(2, "trending"), (1, "popular"), (3, "popular")]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
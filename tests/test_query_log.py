@@ -0,0 +1,94 @@
+import pytest
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.query_log import QueryLogWriter
+
+
+class RecordingWriter(QueryLogWriter):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.written = []
+
+    async def _insert_rows(self, rows):
+        self.written.extend(rows)
+
+
+class FailingOnceWriter(RecordingWriter):
+    """The first batch insert raises, later ones succeed"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.attempts = 0
+
+    async def _insert_rows(self, rows):
+        self.attempts += 1
+        if self.attempts == 1:
+            raise RuntimeError("database unavailable")
+        await super()._insert_rows(rows)
+
+
+class TestQueryLogWriter:
+    def test_stop_flushes_in_flight_batch(self):
+        """Rows already taken off the queue are written when the task is cancelled"""
+        async def run():
+            writer = RecordingWriter(max_queue_size=10, batch_size=5, flush_interval=60)
+            await writer.start()
+            for i in range(3):
+                writer.enqueue({"query_text": f"q{i}"})
+            # Let the task take the first row and start its flush window
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            await writer.stop()
+            return writer
+
+        writer = asyncio.run(run())
+        assert [r["query_text"] for r in writer.written] == ["q0", "q1", "q2"]
+        assert writer.stats["written"] == 3 and writer.stats["dropped"] == 0
+
+    def test_full_queue_drops_and_counts_rows(self):
+        """Past max_queue_size enqueue returns False without blocking and counts the drop"""
+        async def run():
+            writer = RecordingWriter(max_queue_size=3, batch_size=10, flush_interval=60)
+            assert writer.enqueue({"query_text": "before start"}) is False
+            await writer.start()
+            accepted = [writer.enqueue({"query_text": f"q{i}"}) for i in range(5)]
+            stats = writer.get_stats()
+            await writer.stop()
+            return writer, accepted, stats
+
+        writer, accepted, stats = asyncio.run(run())
+        assert accepted == [True, True, True, False, False]
+        assert stats == {"enqueued": 3, "written": 0, "dropped": 3, "batches": 0, "errors": 0, "queued": 3}
+        assert [r["query_text"] for r in writer.written] == ["q0", "q1", "q2"]
+
+    def test_failed_insert_keeps_the_writer_running(self):
+        """A batch whose insert raises is counted as dropped and later batches are still written"""
+        async def run():
+            writer = FailingOnceWriter(max_queue_size=10, batch_size=5, flush_interval=0)
+            await writer.start()
+            writer.enqueue({"query_text": "lost0"})
+            writer.enqueue({"query_text": "lost1"})
+            for _ in range(5):
+                await asyncio.sleep(0)
+            writer.enqueue({"query_text": "kept"})
+            for _ in range(5):
+                await asyncio.sleep(0)
+            running = not writer._task.done()
+            await writer.stop()
+            return writer, running
+
+        writer, running = asyncio.run(run())
+        assert running
+        assert writer.attempts == 2
+        assert [r["query_text"] for r in writer.written] == ["kept"]
+        assert writer.stats["errors"] == 1 and writer.stats["dropped"] == 2
+        assert writer.stats["written"] == 1 and writer.stats["batches"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
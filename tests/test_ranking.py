@@ -0,0 +1,93 @@
+import pytest
+import numpy as np
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.ranking import merge_candidate_scores, top_k_indices, batch_top_k, mmr_rerank
+
+class TestMergeCandidateScores:
+    """Test alignment of candidate lists into a score matrix"""
+
+    def test_union_of_item_ids(self):
+        """Test that every source contributes to the union of ids"""
+        item_ids, matrix = merge_candidate_scores([
+            [{"item_id": 3, "score": 0.9}, {"item_id": 1, "score": 0.5}],
+            [{"item_id": 1, "score": 0.8}],
+            [{"item_id": 7, "score": 0.4}]
+        ])
+
+        assert item_ids.tolist() == [1, 3, 7]
+        assert matrix.shape == (3, 3)
+        assert matrix[0].tolist() == [0.5, 0.8, 0.0]
+        assert matrix[1].tolist() == [0.9, 0.0, 0.0]
+        assert matrix[2].tolist() == [0.0, 0.0, 0.4]
+
+    def test_duplicates_keep_best_score(self):
+        """Test duplicate ids within one source"""
+        item_ids, matrix = merge_candidate_scores([
+            [{"item_id": 1, "score": 0.2}, {"item_id": 1, "score": 0.6}],
+            [],
+            []
+        ])
+
+        assert item_ids.tolist() == [1]
+        assert matrix[0, 0] == 0.6
+
+    def test_empty_sources(self):
+        """Test merging with no candidates at all"""
+        item_ids, matrix = merge_candidate_scores([[], [], []])
+        assert item_ids.size == 0
+        assert matrix.shape == (0, 3)
+
+class TestTopK:
+    """Test top-k selection"""
+
+    def test_top_k_ordering(self):
+        """Test that indices are ordered from best to worst"""
+        scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+        assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+
+    def test_k_larger_than_candidates(self):
+        """Test k exceeding the number of candidates"""
+        scores = np.array([0.2, 0.8])
+        assert top_k_indices(scores, 10).tolist() == [1, 0]
+
+    def test_zero_k(self):
+        """Test non-positive k"""
+        assert top_k_indices(np.array([0.5]), 0).size == 0
+
+    def test_batch_top_k(self):
+        """Test row-wise top-k over a score matrix"""
+        scores = np.array([
+            [0.1, 0.9, 0.5, 0.7],
+            [0.8, 0.2, 0.6, 0.0]
+        ])
+        assert batch_top_k(scores, 2).tolist() == [[1, 3], [0, 2]]
+        assert batch_top_k(scores, 10).shape == (2, 4)
+
+class TestMMR:
+    """Test diversity-aware re-ranking"""
+
+    def test_pure_relevance(self):
+        """Test that lambda=1 keeps relevance order"""
+        relevance = np.array([0.9, 0.8, 0.1])
+        embeddings = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+        assert mmr_rerank(relevance, embeddings, 3, 1.0).tolist() == [0, 1, 2]
+
+    def test_near_duplicates_pushed_down(self):
+        """Test that a near-duplicate loses to a diverse item"""
+        relevance = np.array([0.9, 0.85, 0.6])
+        embeddings = np.array([[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]])
+        assert mmr_rerank(relevance, embeddings, 2, 0.5).tolist() == [0, 2]
+
+    def test_missing_embeddings(self):
+        """Test that zero vectors add no redundancy penalty"""
+        relevance = np.array([0.9, 0.8])
+        embeddings = np.zeros((2, 4))
+        assert mmr_rerank(relevance, embeddings, 2, 0.3).tolist() == [0, 1]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+import pytest
+import asyncio
+import os
+import sys
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.replicas import Replica, ReplicaRouter
+
+
+def _replica(name: str, **kwargs) -> Replica:
+    engine = create_async_engine("sqlite+aiosqlite://", **kwargs)
+    return Replica(name, engine, async_sessionmaker(engine, class_=AsyncSession))
+
+
+async def _refuse_connection():
+    raise ConnectionRefusedError("replica is down")
+
+
+async def _routed(replicas, prepare=None, key=None):
+    primary_engine = create_async_engine("sqlite+aiosqlite://")
+    primary = async_sessionmaker(primary_engine, class_=AsyncSession)
+    router = ReplicaRouter(primary, replicas, max_lag=5, check_interval=5)
+    try:
+        await router.start()
+        if prepare:
+            prepare(router)
+        return router, router.read_sessionmaker(key), primary
+    finally:
+        await router.stop()
+        await primary_engine.dispose()
+
+
+class TestReplicaRouter:
+    def test_reads_go_to_healthy_replica(self):
+        """Reads use a reachable replica within the lag limit"""
+        replica = _replica("replica0")
+        router, chosen, primary = asyncio.run(_routed([replica]))
+        assert chosen is replica.sessionmaker
+        assert router.stats["replica_reads"] == 1
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        """A replica behind by more than max_lag is skipped"""
+        replica = _replica("replica0")
+
+        def lag(router):
+            replica.lag = 30.0
+
+        router, chosen, primary = asyncio.run(_routed([replica], lag))
+        assert chosen is primary
+        assert router.stats["fallbacks"] == 1
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        """A replica that fails its check is out of rotation"""
+        replica = _replica("replica0", async_creator=_refuse_connection)
+        router, chosen, primary = asyncio.run(_routed([replica]))
+        assert chosen is primary
+        assert router.get_stats()["replicas"][0]["healthy"] is False
+        assert "replica is down" in replica.error
+
+    def test_recent_writer_reads_from_primary(self):
+        """Keys noted as writers are pinned to the primary"""
+        replica = _replica("replica0")
+        router, chosen, primary = asyncio.run(_routed([replica], lambda r: r.note_write(7), key=7))
+        assert chosen is primary
+        assert router.stats["pinned_reads"] == 1
+
+    def test_no_replicas_uses_primary(self):
+        """Without configured replicas every read goes to the primary"""
+        router, chosen, primary = asyncio.run(_routed([]))
+        assert chosen is primary
+        assert router.stats["fallbacks"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,88 @@
+import pytest
+import asyncio
+import os
+import sys
+import threading
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.cache_service import ResponseCache
+
+
+@pytest.fixture
+def cache():
+    fakeredis = pytest.importorskip("fakeredis")
+    return ResponseCache(fakeredis.FakeRedis(decode_responses=True), ttl=60)
+
+
+class TestResponseCache:
+    def test_version_bump_changes_key(self, cache):
+        """Bumping a version makes previously cached responses unreachable"""
+        async def run():
+            keys = [await cache.make_key("Ноутбук  Dell", {}, 10, "v1", user_id=7)]
+            assert await cache.make_key("ноутбук dell", {}, 10, "v1", user_id=7) == keys[0]
+            for invalidate in (cache.invalidate_catalog, cache.invalidate_vector_index,
+                               lambda: cache.invalidate_user(7)):
+                invalidate()
+                keys.append(await cache.make_key("ноутбук dell", {}, 10, "v1", user_id=7))
+            # Another user's profile version does not affect this key
+            cache.invalidate_user(8)
+            keys.append(await cache.make_key("ноутбук dell", {}, 10, "v1", user_id=7))
+            return keys
+
+        keys = asyncio.run(run())
+        assert len(set(keys)) == 4 and keys[-1] == keys[-2]
+        assert cache.get_versions(["catalog", "vector_index", "profile:7", "profile:9"]) == ["1", "1", "1", "0"]
+
+    def test_concurrent_misses_compute_once(self, cache):
+        """Identical concurrent misses share one computation, later calls hit the cache"""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"total": len(calls)}
+
+        async def run():
+            key = await cache.make_key("q", {}, 10, "v1")
+            results = await asyncio.gather(*[cache.get_or_compute(key, compute) for _ in range(5)])
+            return results + [await cache.get_or_compute(key, compute)]
+
+        results = asyncio.run(run())
+        assert calls == [1]
+        assert results == [{"total": 1}] * 6
+        assert cache.stats["misses"] == 1 and cache.stats["coalesced"] == 4 and cache.stats["hits"] == 1
+
+    def test_redis_calls_run_off_the_event_loop(self, cache):
+        """Version reads, response reads and writes all run in executor threads"""
+        loop_threads, redis_threads = [], []
+        redis = cache.redis
+
+        class RecordingRedis:
+            def __getattr__(self, name):
+                method = getattr(redis, name)
+
+                def call(*args, **kwargs):
+                    redis_threads.append(threading.get_ident())
+                    return method(*args, **kwargs)
+                return call
+
+        cache.redis = RecordingRedis()
+
+        async def compute():
+            return {"items": []}
+
+        async def run():
+            loop_threads.append(threading.get_ident())
+            key = await cache.make_key("q", {}, 10, "v1")
+            await cache.get_or_compute(key, compute)
+            await cache.get_or_compute(key, compute)
+
+        asyncio.run(run())
+        assert len(redis_threads) == 4
+        assert loop_threads[0] not in redis_threads
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,57 @@
+import pytest
+import numpy as np
+import pandas as pd
+import os
+import sys
+import zlib
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.decision_dataset import load_decision_dataset
+from app.services.similar_decisions import SimilarDecisionIndex, OUTCOMES_PATH, LINKS_PATH
+
+def hashed_embed(texts):
+    """Deterministic stand-in for the sentence encoder: one direction per text"""
+    vectors = np.zeros((len(texts), 1024), dtype=np.float32)
+    for row, text in enumerate(texts):
+        vectors[row, zlib.crc32(text.encode("utf-8")) % 1024] = 1.0
+    return vectors
+
+@pytest.fixture(scope="module")
+def index():
+    index = SimilarDecisionIndex()
+    index.build(
+        load_decision_dataset(cache_dir=None),
+        hashed_embed,
+        outcomes=pd.read_csv(OUTCOMES_PATH),
+        links=pd.read_csv(LINKS_PATH)
+    )
+    return index
+
+class TestSimilarDecisionIndex:
+    """Test nearest-similar-decision lookup"""
+
+    def test_similar_to_prefers_same_scenario(self, index):
+        """Test that the closest decisions share the scenario and carry outcomes"""
+        result = index.similar_to(1, limit=3)
+
+        assert len(result["results"]) == 3
+        assert all(hit["decision_id"] != 1 for hit in result["results"])
+        assert result["results"][0]["scenario"] == index.dataset.label("Сценарий", 0)
+        assert result["results"][0]["outcome"]["satisfaction"] is not None
+        assert result["results"][0]["outcome"]["deliberation_hours"] is not None
+        assert result["summary"]["matches"] == 3
+
+    def test_category_filter(self, index):
+        """Test that a category filter restricts every hit"""
+        query = index.query_vector(hashed_embed(["Смена работы"])[0], factors={"Тревожность": "Высокая"})
+        result = index.search(query, limit=10, category="Финансы и инвестиции")
+
+        assert len(result["results"]) == 10
+        assert {hit["category"] for hit in result["results"]} == {"Финансы и инвестиции"}
+        similarities = [hit["similarity"] for hit in result["results"]]
+        assert similarities == sorted(similarities, reverse=True)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
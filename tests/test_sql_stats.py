@@ -0,0 +1,84 @@
+import pytest
+import os
+import sys
+
+from sqlalchemy import create_engine, text
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.sql_stats import SQLStatementStats, fingerprint
+
+
+class TestFingerprint:
+    def test_literals_and_placeholders_collapse(self):
+        """Statements differing only in values share a fingerprint"""
+        a = fingerprint("SELECT * FROM items WHERE id = 5 AND name = 'x'")
+        b = fingerprint("SELECT *  FROM items\nWHERE id = :id_1 AND name = ?")
+        assert a == b == "SELECT * FROM items WHERE id = ? AND name = ?"
+
+    def test_in_lists_collapse(self):
+        """IN lists of any length map to one shape"""
+        assert fingerprint("SELECT 1 WHERE id IN (?, ?, ?)") == fingerprint("SELECT 1 WHERE id IN (%s)")
+
+
+class TestSQLStatementStats:
+    def test_engine_executions_are_counted_per_fingerprint(self):
+        """Attached engines report counts and histograms without echo"""
+        engine = create_engine("sqlite://")
+        stats = SQLStatementStats(sample_rate=0.0, slow_ms=0)
+        stats.attach(engine)
+        with engine.connect() as conn:
+            for value in range(3):
+                conn.execute(text("SELECT :v"), {"v": value})
+        result = stats.get_stats()
+        top = next(s for s in result["statements"] if s["statement"] == "SELECT ?")
+        assert top["count"] == 3
+        assert sum(top["latency_histogram_ms"].values()) == 3
+        assert result["sampled"] == 0 and result["slow_queries"] == 0
+
+    def test_errors_and_slow_queries(self):
+        """Failed statements count as errors; slow ones are flagged"""
+        engine = create_engine("sqlite://")
+        stats = SQLStatementStats(sample_rate=0.0, slow_ms=0)
+        stats.attach(engine)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT 1 FROM missing_table"))
+        statements = {s["statement"]: s for s in stats.get_stats()["statements"]}
+        assert statements["SELECT ? FROM missing_table"]["errors"] == 1
+        assert statements["SELECT ? FROM missing_table"]["count"] == 0
+
+        stats.slow_ms = 1000
+        stats.observe("SELECT 1", 2.0)
+        stats.observe("SELECT 1", 0.01)
+        assert stats.slow_queries == 1
+
+    def test_fingerprint_limit(self):
+        """New shapes past the limit are counted as untracked"""
+        stats = SQLStatementStats(max_fingerprints=1)
+        stats.observe("SELECT a FROM t", 0.001)
+        stats.observe("SELECT b FROM t", 0.001)
+        result = stats.get_stats()
+        assert result["fingerprints"] == 1 and result["untracked"] == 1 and result["queries"] == 2
+
+    def test_parameters_are_not_logged_by_default(self):
+        """Slow-query logs carry the statement and fingerprint, parameters only when enabled"""
+        from loguru import logger
+        messages = []
+        handler = logger.add(messages.append, format="{message}")
+        try:
+            stats = SQLStatementStats(slow_ms=1)
+            stats.observe("SELECT * FROM users WHERE email = ?", 1.0, ("alice@example.com",))
+            stats.log_parameters = True
+            stats.observe("SELECT * FROM users WHERE email = ?", 1.0, ("bob@example.com",))
+        finally:
+            logger.remove(handler)
+        assert "SELECT * FROM users WHERE email = ?" in messages[0]
+        assert "alice@example.com" not in messages[0] and "params=" not in messages[0]
+        assert "bob@example.com" in messages[1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
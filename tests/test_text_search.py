@@ -0,0 +1,118 @@
+import pytest
+import asyncio
+import os
+import sys
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.text_search import create_text_search, fts5_query
+from app.models.choice import Category, Item
+import app.models.user  # noqa: F401
+from app.repositories import items as item_repo
+
+ITEMS = [
+    ("Смартфон Galaxy", "Android смартфон с камерой 200 МП", 1, 89990.0, {"brand": "Samsung", "storage_gb": 256}),
+    ("Ноутбук MacBook Air", "Лёгкий ноутбук для работы", 1, 129990.0, {"brand": "Apple", "ram": "16GB"}),
+    ("Чехол для смартфона", "Силиконовый чехол", 1, 990.0, {"brand": "Samsung", "color": "black"}),
+    ("Книга о камерах", "Как выбрать камеру и объектив", 2, 1490.0, {}),
+]
+
+
+async def _with_items(work):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda c: Item.metadata.create_all(c, tables=[Category.__table__, Item.__table__]))
+            await conn.run_sync(create_text_search)
+        async with AsyncSession(engine) as session:
+            session.add_all([Item(name=n, description=d, category_id=c, price=p, attributes=a) for n, d, c, p, a in ITEMS])
+            await session.commit()
+            return await work(session)
+    finally:
+        await engine.dispose()
+
+
+async def _search(**kwargs):
+    async def work(session):
+        items, _ = await item_repo.search_items(session, **kwargs)
+        filters = {k: v for k, v in kwargs.items() if k not in ("limit", "offset", "after")}
+        return [item.name for item in items], await item_repo.count_items(session, **filters)
+    return await _with_items(work)
+
+
+async def _walk_pages(limit: int, **filters):
+    """Names page by page via keyset keys, and in one offset query"""
+    async def work(session):
+        pages, after = [], None
+        while True:
+            items, after = await item_repo.search_items(session, limit=limit, after=after, **filters)
+            pages.append([item.name for item in items])
+            if after is None:
+                break
+        everything, _ = await item_repo.search_items(session, limit=100, **filters)
+        return pages, [item.name for item in everything]
+    return await _with_items(work)
+
+
+class TestFTS5Query:
+    def test_words_become_prefix_terms(self):
+        """Each word is quoted (no FTS syntax injection) and prefix-matched"""
+        assert fts5_query('Смартфон "AND" камера*') == '"смартфон"* "and"* "камера"*'
+
+    def test_no_words(self):
+        """Punctuation-only queries have no match expression"""
+        assert fts5_query("?!") is None
+
+
+class TestItemTextSearch:
+    def test_name_matches_rank_first(self):
+        """Name hits outrank description hits; word prefixes match inflections"""
+        names, total = asyncio.run(_search(query="камер"))
+        assert names == ["Книга о камерах", "Смартфон Galaxy"] and total == 2
+
+    def test_all_words_required_with_filters(self):
+        """Multi-word queries require every word and combine with filters"""
+        names, total = asyncio.run(_search(query="смартфон камер", max_price=100000))
+        assert names == ["Смартфон Galaxy"] and total == 1
+
+    def test_index_follows_updates(self):
+        """Rows inserted after the index was built are searchable"""
+        names, _ = asyncio.run(_search(query="macbook"))
+        assert names == ["Ноутбук MacBook Air"]
+
+
+class TestAttributeFilter:
+    def test_all_pairs_must_match(self):
+        """Attribute predicates are pushed into SQL and combine with text search"""
+        names, total = asyncio.run(_search(attributes={"brand": "Samsung"}))
+        assert names == ["Смартфон Galaxy", "Чехол для смартфона"] and total == 2
+        names, _ = asyncio.run(_search(attributes={"brand": "Samsung", "storage_gb": 256}))
+        assert names == ["Смартфон Galaxy"]
+        names, _ = asyncio.run(_search(query="чехол", attributes={"brand": "Apple"}))
+        assert names == []
+
+    def test_non_scalar_values_rejected_outside_postgres(self):
+        """Nested values need JSONB containment"""
+        with pytest.raises(ValueError):
+            item_repo.attribute_filter("sqlite", {"sizes": [1, 2]})
+
+
+class TestKeysetPagination:
+    def test_pages_follow_relevance_order(self):
+        """Keyset pages over a ranked search concatenate to the full ordering"""
+        pages, everything = asyncio.run(_walk_pages(1, query="смартфон"))
+        assert [name for page in pages for name in page] == everything
+        assert all(len(page) == 1 for page in pages)
+
+    def test_pages_without_query(self):
+        """Unranked listings page by id with no duplicates or gaps"""
+        pages, everything = asyncio.run(_walk_pages(3, max_price=200000))
+        assert [len(page) for page in pages] == [3, 1]
+        assert [name for page in pages for name in page] == everything
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])